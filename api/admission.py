@@ -0,0 +1,272 @@
+# ================================
+# SensorPulse API - Admission Control
+# ================================
+#
+# Keeps expensive requests (report previews, long history windows) from
+# starving cheap ones of database connections. Requests are sorted into
+# route classes; each class has a concurrency cap and a FIFO queue, and a
+# global capacity (the interactive connection pool size) is shared by the
+# classes using that pool. Reports run on the reporting pool, so only
+# their own cap (sized to that pool) applies. Freed slots go to the
+# highest-priority class with a waiter that fits.
+#
+# A request that can't be admitted within its class's queue-time budget,
+# or finds the queue full, is shed with a fast 503 and Retry-After instead
+# of piling up.
+
+import asyncio
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional
+from urllib.parse import parse_qs
+
+import structlog
+from fastapi import status
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from config import settings
+
+logger = structlog.get_logger(__name__)
+
+# Route classes, highest priority first
+INTERACTIVE = "interactive"
+LONG_HISTORY = "long_history"
+REPORTS = "reports"
+
+
+class Overloaded(Exception):
+    """A request was shed; retry after `retry_after` seconds."""
+
+    def __init__(self, route_class: str, reason: str, retry_after: int):
+        super().__init__(f"{route_class} requests overloaded ({reason})")
+        self.route_class = route_class
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass
+class RouteClass:
+    """Limits and counters for one class of routes."""
+    name: str
+    priority: int              # lower is served first
+    max_concurrent: int
+    queue_budget: float        # seconds a request may wait for a slot
+    max_queue: int = 50
+    shares_capacity: bool = True  # counts against the controller's capacity
+    in_flight: int = 0
+    waiters: Deque[asyncio.Future] = field(default_factory=deque)
+    admitted: int = 0
+    shed_timeout: int = 0
+    shed_queue_full: int = 0
+    max_queue_depth: int = 0
+    queue_wait_ms: float = 0.0  # total, for the average
+
+    @property
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.queue_budget))
+
+
+class AdmissionController:
+    """
+    Per-route-class concurrency limiter with priority queues.
+
+    `acquire()` admits immediately when the class and (for classes sharing
+    it) the global capacity have room and nobody in the class is queued; otherwise it waits in the
+    class queue for up to the class budget. `release()` hands the slot to
+    the next waiter, trying classes in priority order.
+    """
+
+    def __init__(self, capacity: int, classes):
+        self.capacity = capacity
+        self.in_flight = 0
+        self.classes: Dict[str, RouteClass] = {c.name: c for c in classes}
+        self._by_priority = sorted(self.classes.values(), key=lambda c: c.priority)
+
+    def _has_room(self, route_class: RouteClass) -> bool:
+        if route_class.shares_capacity and self.in_flight >= self.capacity:
+            return False
+        return route_class.in_flight < route_class.max_concurrent
+
+    def _admit(self, route_class: RouteClass):
+        if route_class.shares_capacity:
+            self.in_flight += 1
+        route_class.in_flight += 1
+        route_class.admitted += 1
+
+    async def acquire(self, name: str):
+        """Wait for a slot in a route class; raises Overloaded when shed."""
+        route_class = self.classes[name]
+
+        if not route_class.waiters and self._has_room(route_class):
+            self._admit(route_class)
+            return
+
+        if len(route_class.waiters) >= route_class.max_queue:
+            route_class.shed_queue_full += 1
+            raise Overloaded(name, "queue_full", route_class.retry_after)
+
+        waiter = asyncio.get_running_loop().create_future()
+        route_class.waiters.append(waiter)
+        route_class.max_queue_depth = max(route_class.max_queue_depth, len(route_class.waiters))
+        start = time.monotonic()
+
+        try:
+            await asyncio.wait_for(waiter, timeout=route_class.queue_budget)
+        except asyncio.TimeoutError:
+            route_class.shed_timeout += 1
+            raise Overloaded(name, "queue_timeout", route_class.retry_after)
+        except asyncio.CancelledError:
+            # Admitted just as the client went away: give the slot back
+            if waiter.done() and not waiter.cancelled():
+                self.release(name)
+            raise
+        finally:
+            if waiter in route_class.waiters:
+                route_class.waiters.remove(waiter)
+
+        route_class.queue_wait_ms += (time.monotonic() - start) * 1000
+
+    def release(self, name: str):
+        """Free a slot and admit waiters that now fit."""
+        route_class = self.classes[name]
+        if route_class.shares_capacity:
+            self.in_flight -= 1
+        route_class.in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        for route_class in self._by_priority:
+            while route_class.waiters and self._has_room(route_class):
+                waiter = route_class.waiters.popleft()
+                if waiter.done():
+                    continue  # timed out or cancelled
+                self._admit(route_class)
+                waiter.set_result(None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return queue depths, in-flight counts and shed counts per class."""
+        return {
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "classes": {
+                c.name: {
+                    "priority": c.priority,
+                    "max_concurrent": c.max_concurrent,
+                    "shares_capacity": c.shares_capacity,
+                    "queue_budget_s": c.queue_budget,
+                    "in_flight": c.in_flight,
+                    "queue_depth": len(c.waiters),
+                    "max_queue_depth": c.max_queue_depth,
+                    "admitted": c.admitted,
+                    "shed": c.shed_timeout + c.shed_queue_full,
+                    "shed_timeout": c.shed_timeout,
+                    "shed_queue_full": c.shed_queue_full,
+                    "avg_queue_wait_ms": round(c.queue_wait_ms / c.admitted, 2) if c.admitted else 0.0,
+                }
+                for c in self._by_priority
+            },
+        }
+
+
+def classify(scope: Scope, long_history_hours: int) -> Optional[str]:
+    """Route class of a request, or None if it isn't admission controlled."""
+    path = scope["path"]
+    if not path.startswith("/api/") or path.startswith("/api/admin/"):
+        return None
+
+    if path.startswith("/api/report/"):
+        return REPORTS
+
+    if path.startswith("/api/history/"):
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        try:
+            hours = int(query.get("hours", ["24"])[0])
+        except ValueError:
+            hours = 24  # rejected by validation anyway
+        if hours > long_history_hours:
+            return LONG_HISTORY
+
+    return INTERACTIVE
+
+
+class AdmissionMiddleware:
+    """
+    Pure ASGI middleware applying the admission controller.
+
+    The slot is held until the response has been sent completely.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        controller: AdmissionController,
+        long_history_hours: int = 48,
+    ):
+        self.app = app
+        self.controller = controller
+        self.long_history_hours = long_history_hours
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        name = classify(scope, self.long_history_hours)
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.controller.acquire(name)
+        except Overloaded as e:
+            logger.warning("Request shed", route_class=e.route_class, reason=e.reason, path=scope["path"])
+            response = JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"detail": "Server busy. Try again later.", "code": "OVERLOADED"},
+                headers={"Retry-After": str(e.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(name)
+
+
+def create_admission_controller() -> AdmissionController:
+    """Build the controller from settings."""
+    return AdmissionController(
+        capacity=settings.admission_capacity,
+        classes=[
+            RouteClass(
+                INTERACTIVE,
+                priority=0,
+                max_concurrent=settings.admission_capacity,
+                queue_budget=settings.admission_interactive_budget,
+                max_queue=settings.admission_max_queue,
+            ),
+            RouteClass(
+                LONG_HISTORY,
+                priority=1,
+                max_concurrent=settings.admission_long_history_concurrency,
+                queue_budget=settings.admission_long_history_budget,
+                max_queue=settings.admission_max_queue,
+            ),
+            RouteClass(
+                REPORTS,
+                priority=2,
+                max_concurrent=settings.admission_report_concurrency,
+                queue_budget=settings.admission_report_budget,
+                max_queue=settings.admission_max_queue,
+                shares_capacity=False,
+            ),
+        ],
+    )
+
+
+# Global admission controller
+admission_controller = create_admission_controller()
@@ -0,0 +1,45 @@
+"""Add rate_limit_counters table for the shared rate limiter
+
+Revision ID: 003_rate_limit_counters
+Revises: 002_add_device_name
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '003_rate_limit_counters'
+down_revision: Union[str, None] = '002_add_device_name'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ===========================================
+    # Create rate_limit_counters table
+    # ===========================================
+    # UNLOGGED: counters are short-lived and rebuilt within a minute, so
+    # skip WAL writes (contents are truncated after a crash).
+    op.execute("""
+        CREATE UNLOGGED TABLE rate_limit_counters (
+            key TEXT NOT NULL,
+            window_start BIGINT NOT NULL,
+            count BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (key, window_start)
+        );
+    """)
+    
+    # Index for pruning expired windows
+    op.create_index(
+        'ix_rate_limit_counters_window_start',
+        'rate_limit_counters',
+        ['window_start'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rate_limit_counters_window_start', table_name='rate_limit_counters')
+    op.drop_table('rate_limit_counters')
@@ -0,0 +1,43 @@
+"""Notify API workers when a users row changes
+
+Revision ID: 004_user_change_notify
+Revises: 003_rate_limit_counters
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '004_user_change_notify'
+down_revision: Union[str, None] = '003_rate_limit_counters'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ===========================================
+    # NOTIFY user_changed on UPDATE/DELETE of users
+    # ===========================================
+    # Every API worker LISTENs (api/live.py) and drops the user from its
+    # principal cache, so allow-list changes take effect everywhere,
+    # including ones made directly in SQL. Delivered on commit.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_user_changed() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('user_changed', OLD.id::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER users_notify_changed
+        AFTER UPDATE OR DELETE ON users
+        FOR EACH ROW EXECUTE FUNCTION notify_user_changed();
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS users_notify_changed ON users")
+    op.execute("DROP FUNCTION IF EXISTS notify_user_changed()")
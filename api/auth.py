@@ -14,6 +14,7 @@ from config import settings
 from db import get_db
 from services import UserService
 from schemas import TokenData, GoogleUser
+from principals import principal_cache
 
 # Security scheme
 security = HTTPBearer(auto_error=False)
@@ -98,6 +99,10 @@ async def get_current_user(
     if not credentials:
         return None
     
+    user = principal_cache.get(credentials.credentials)
+    if user is not None:
+        return user
+    
     token_data = decode_access_token(credentials.credentials)
     if not token_data:
         return None
@@ -105,6 +110,9 @@ async def get_current_user(
     user_service = UserService(db)
     user = await user_service.get_by_id(token_data.user_id)
     
+    if user and user.is_allowed:
+        principal_cache.put(credentials.credentials, user, token_data.exp)
+    
     return user
 
 
@@ -115,6 +123,9 @@ async def require_user(
     """
     FastAPI dependency to require authentication.
     Raises 401 if not authenticated.
+    
+    Allowed users are cached per token (see principals.py), so repeat
+    requests skip JWT verification and the users lookup.
     """
     if not credentials:
         raise HTTPException(
@@ -123,6 +134,10 @@ async def require_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    user = principal_cache.get(credentials.credentials)
+    if user is not None:
+        return user
+    
     token_data = decode_access_token(credentials.credentials)
     if not token_data:
         raise HTTPException(
@@ -146,6 +161,8 @@ async def require_user(
             detail="User not authorized. Please contact administrator.",
         )
     
+    principal_cache.put(credentials.credentials, user, token_data.exp)
+    
     return user
 
 
@@ -0,0 +1,113 @@
+# ================================
+# SensorPulse API - History Serialization Benchmark
+# ================================
+#
+# Compares the default response path (SensorHistory validation + stdlib
+# JSON) with the fast path (orjson on trusted service output), and the
+# payload size with gzip / brotli, for a 7-day history at one reading
+# per minute.
+#
+# Usage (from api/):
+#   python benchmarks/bench_history_serialization.py [--readings N] [--rounds N]
+
+import argparse
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi.encoders import jsonable_encoder
+
+from responses import dumps
+from schemas import SensorHistory
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def build_history(count: int) -> dict:
+    """Build a service-shaped history payload with `count` readings."""
+    start = datetime.now(timezone.utc) - timedelta(minutes=count)
+    readings = []
+    for i in range(count):
+        temperature = round(21.0 + (i % 120) * 0.05, 2)
+        humidity = round(45.0 + (i % 60) * 0.1, 1)
+        readings.append({
+            "time": start + timedelta(minutes=i),
+            "topic": "zigbee2mqtt/living_room_sensor",
+            "device_name": "living_room_sensor",
+            "temperature": temperature,
+            "humidity": humidity,
+            "battery": 87,
+            "linkquality": 120 + i % 40,
+            "raw_data": {
+                "temperature": temperature,
+                "humidity": humidity,
+                "battery": 87,
+                "voltage": 2985,
+                "linkquality": 120 + i % 40,
+            },
+        })
+    return {
+        "device_name": "living_room_sensor",
+        "topic": "zigbee2mqtt/living_room_sensor",
+        "readings": readings,
+        "summary": {"reading_count": count},
+    }
+
+
+def default_path(history: dict) -> bytes:
+    """What FastAPI does with response_model=SensorHistory."""
+    model = SensorHistory.model_validate(history)
+    content = jsonable_encoder(model.model_dump(mode="json"))
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(history: dict) -> bytes:
+    """orjson on the trusted service dict."""
+    return dumps(history)
+
+
+def timed(fn, arg, rounds: int) -> float:
+    """Median wall time of `fn(arg)` in milliseconds."""
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(arg)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="History serialization benchmark")
+    parser.add_argument("--readings", type=int, default=7 * 24 * 60)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    history = build_history(args.readings)
+    body = fast_path(history)
+
+    print(f"7-day history: {args.readings} readings, median of {args.rounds} rounds\n")
+    print(f"{'path':<28}{'latency (ms)':>14}")
+    print(f"{'default (validate + json)':<28}{timed(default_path, history, args.rounds):>14.1f}")
+    print(f"{'fast (orjson)':<28}{timed(fast_path, history, args.rounds):>14.1f}")
+    print(f"{'fast + gzip':<28}{timed(lambda h: gzip.compress(fast_path(h), 6), history, args.rounds):>14.1f}")
+    if brotli is not None:
+        print(f"{'fast + brotli':<28}{timed(lambda h: brotli.compress(fast_path(h), quality=4), history, args.rounds):>14.1f}")
+
+    print(f"\n{'encoding':<28}{'bytes':>14}")
+    print(f"{'identity':<28}{len(body):>14,}")
+    print(f"{'gzip (level 6)':<28}{len(gzip.compress(body, 6)):>14,}")
+    if brotli is not None:
+        print(f"{'brotli (quality 4)':<28}{len(brotli.compress(body, quality=4)):>14,}")
+
+
+if __name__ == "__main__":
+    main()
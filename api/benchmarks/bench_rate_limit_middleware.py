@@ -0,0 +1,123 @@
+# ================================
+# SensorPulse API - Rate Limit Middleware Benchmark
+# ================================
+#
+# Measures per-request latency under concurrent load for the pure ASGI
+# RateLimitMiddleware, next to the previous BaseHTTPMiddleware version
+# for reference. Requests are driven in-process through httpx's ASGI
+# transport against a trivial JSON endpoint, so the numbers isolate
+# middleware overhead.
+#
+# Usage (from api/):
+#   python benchmarks/bench_rate_limit_middleware.py [--concurrency N] [--requests N]
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from middleware import RateLimiter, RateLimitMiddleware
+
+
+class BaseHTTPRateLimitMiddleware(BaseHTTPMiddleware):
+    """The previous middleware: BaseHTTPMiddleware with call_next."""
+
+    def __init__(self, app, requests_per_minute: int = 100):
+        super().__init__(app)
+        self.limiter = RateLimiter(requests_per_minute)
+        self.excluded_paths = {"/health"}
+
+    async def dispatch(self, request: Request, call_next):
+        if request.url.path in self.excluded_paths:
+            return await call_next(request)
+
+        allowed, headers = self.limiter.is_allowed(request)
+        if not allowed:
+            return JSONResponse(
+                status_code=429,
+                content={"detail": "Rate limit exceeded. Try again later."},
+                headers=headers,
+            )
+
+        response = await call_next(request)
+        for key, value in headers.items():
+            response.headers[key] = value
+        return response
+
+
+def build_app(middleware_class, limit: int) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(middleware_class, requests_per_minute=limit)
+
+    @app.get("/api/ping")
+    async def ping():
+        return {"status": "ok"}
+
+    return app
+
+
+async def run(app, concurrency: int, requests: int):
+    """Issue `requests` requests from `concurrency` workers; return latencies."""
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up routing and the limiter key
+        await client.get("/api/ping")
+
+        per_worker = requests // concurrency
+
+        async def worker():
+            for _ in range(per_worker):
+                start = time.perf_counter()
+                response = await client.get("/api/ping")
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return latencies, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rate limit middleware benchmark")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+
+    # High enough that no request is rejected during the run
+    limit = args.requests * 10
+
+    implementations = [
+        ("pure ASGI", RateLimitMiddleware),
+        ("BaseHTTPMiddleware", BaseHTTPRateLimitMiddleware),
+    ]
+
+    print(f"{'implementation':<22}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, middleware_class in implementations:
+        app = build_app(middleware_class, limit)
+        latencies, elapsed = asyncio.run(run(app, args.concurrency, args.requests))
+        latencies.sort()
+        p50 = statistics.median(latencies) * 1000
+        p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+        print(
+            f"{name:<22}{len(latencies) / elapsed:>10,.0f}"
+            f"{p50:>10.2f}{p99:>10.2f}{latencies[-1] * 1000:>10.2f}"
+        )
+
+    print(f"\n{args.concurrency} concurrent clients, {args.requests} requests each run")
+
+
+if __name__ == "__main__":
+    main()
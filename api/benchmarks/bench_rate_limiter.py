@@ -0,0 +1,89 @@
+# ================================
+# SensorPulse API - Rate Limiter Benchmark
+# ================================
+#
+# Measures checks per second and memory per 100k distinct clients for the
+# sliding-window-counter RateLimiter, next to the previous list-of-timestamps
+# implementation for reference.
+#
+# Usage (from api/):
+#   python benchmarks/bench_rate_limiter.py [--clients N] [--checks N]
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from middleware import RateLimiter
+
+
+class ListRateLimiter:
+    """The previous algorithm: a list of timestamps per key, rebuilt per check."""
+
+    def __init__(self, requests_per_minute: int = 100):
+        self.requests_per_minute = requests_per_minute
+        self.window_size = 60
+        self._requests = defaultdict(list)
+
+    def check(self, key: str, now: float = None):
+        now = time.time() if now is None else now
+        cutoff = now - self.window_size
+        self._requests[key] = [t for t in self._requests[key] if t > cutoff]
+        if len(self._requests[key]) >= self.requests_per_minute:
+            return False, {}
+        self._requests[key].append(now)
+        return True, {}
+
+
+def checks_per_second(limiter, keys, checks: int) -> float:
+    """Run `checks` checks round-robin over `keys`."""
+    n = len(keys)
+    start = time.perf_counter()
+    for i in range(checks):
+        limiter.check(keys[i % n])
+    return checks / (time.perf_counter() - start)
+
+
+def memory_per_clients(factory, clients: int, per_client: int) -> int:
+    """Bytes allocated to track `clients` keys with `per_client` requests each."""
+    keys = [f"ip:10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(clients)]
+    tracemalloc.start()
+    limiter = factory()
+    base = tracemalloc.get_traced_memory()[0]
+    for _ in range(per_client):
+        for key in keys:
+            limiter.check(key)
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return used
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rate limiter benchmark")
+    parser.add_argument("--clients", type=int, default=100_000)
+    parser.add_argument("--checks", type=int, default=500_000)
+    parser.add_argument("--per-client", type=int, default=20)
+    args = parser.parse_args()
+
+    implementations = [
+        ("sliding-window counter", lambda: RateLimiter(100, max_keys=args.clients)),
+        ("list of timestamps", lambda: ListRateLimiter(100)),
+    ]
+
+    print(f"{'implementation':<26}{'hot key /s':>14}{'100 keys /s':>14}{'MB / 100k clients':>20}")
+    for name, factory in implementations:
+        hot = checks_per_second(factory(), ["ip:1.1.1.1"], args.checks)
+        spread = checks_per_second(factory(), [f"ip:{i}" for i in range(100)], args.checks)
+        mem = memory_per_clients(factory, args.clients, args.per_client)
+        scaled = mem * (100_000 / args.clients) / (1024 * 1024)
+        print(f"{name:<26}{hot:>14,.0f}{spread:>14,.0f}{scaled:>20.1f}")
+
+    print(f"\nmemory measured with {args.per_client} requests per client")
+
+
+if __name__ == "__main__":
+    main()
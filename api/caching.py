@@ -0,0 +1,121 @@
+# ================================
+# SensorPulse API - HTTP Caching Helpers
+# ================================
+#
+# Conditional GET support (ETag / Last-Modified) for polled endpoints.
+# Validators are computed from cheap metadata so unchanged polls can be
+# answered with 304 before the full query runs.
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response
+
+# Clients must revalidate on every poll, but may keep the body around
+CACHE_CONTROL = "private, no-cache"
+
+# Content encodings that get their own ETag variant
+_ENCODING_SUFFIXES = ("-gzip", "-br")
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a strong ETag from the given validator parts."""
+    raw = "|".join("" if p is None else str(p) for p in parts)
+    digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def variant_etag(etag: str, encoding: str) -> str:
+    """
+    Derive the ETag of a content-encoded representation.
+
+    A strong ETag identifies exact bytes, so compressed bodies get a
+    suffixed tag. Conditional checks strip the suffix again.
+    """
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def _strip_variant(etag: str) -> str:
+    """Remove a content-encoding suffix from an ETag."""
+    for suffix in _ENCODING_SUFFIXES:
+        if etag.endswith(f'{suffix}"'):
+            return etag[: -len(suffix) - 1] + '"'
+    return etag
+
+
+def _format_http_date(value: datetime) -> str:
+    """Format a datetime as an RFC 7231 HTTP date."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return formatdate(value.timestamp(), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag."""
+    if header.strip() == "*":
+        return True
+
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        # If-None-Match uses weak comparison
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if _strip_variant(candidate) == etag:
+            return True
+
+    return False
+
+
+def is_not_modified(
+    request: Request,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+) -> bool:
+    """
+    Evaluate conditional request headers.
+
+    If-None-Match takes precedence; If-Modified-Since is only consulted
+    when the client sent no entity tag.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        # HTTP dates have one-second resolution
+        return last_modified.replace(microsecond=0) <= since
+
+    return False
+
+
+def validator_headers(
+    etag: str,
+    last_modified: Optional[datetime] = None,
+) -> Dict[str, str]:
+    """Build ETag, Last-Modified and Cache-Control headers."""
+    headers = {
+        "ETag": etag,
+        "Cache-Control": CACHE_CONTROL,
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = _format_http_date(last_modified)
+    return headers
+
+
+def not_modified_response(
+    etag: str,
+    last_modified: Optional[datetime] = None,
+) -> Response:
+    """Build an empty 304 response carrying the current validators."""
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
@@ -12,7 +12,7 @@ from datetime import datetime, timedelta, timezone
 
 import structlog
 from sqlalchemy import text, delete
-from db.database import AsyncSessionLocal
+from db.database import MaintenanceSessionLocal
 
 logger = structlog.get_logger(__name__)
 
@@ -38,7 +38,7 @@ async def cleanup_old_readings(retention_days: int = RETENTION_DAYS) -> int:
         cutoff=cutoff.isoformat(),
     )
 
-    async with AsyncSessionLocal() as session:
+    async with MaintenanceSessionLocal() as session:
         while True:
             result = await session.execute(
                 text(
@@ -0,0 +1,136 @@
+# ================================
+# SensorPulse API - Columnar History Format
+# ================================
+#
+# Chart-friendly history payload: parallel arrays of epoch-millisecond
+# timestamps and per-metric values instead of a list of reading objects
+# that repeat topic / device_name / keys on every point.
+#
+# Encodings:
+#   - JSON:        application/vnd.sensorpulse.columnar+json  (format=columnar)
+#   - MessagePack: application/msgpack                        (format=msgpack)
+
+from typing import Any, Dict, List, Optional, Sequence
+
+from fastapi import HTTPException, status
+
+# MessagePack is optional - only needed for the binary encoding
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - depends on environment
+    msgpack = None
+
+COLUMNAR_JSON_MEDIA_TYPE = "application/vnd.sensorpulse.columnar+json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# Metrics that can be requested as columns
+COLUMNAR_METRICS = ("temperature", "humidity", "battery", "linkquality")
+DEFAULT_METRICS = ("temperature", "humidity")
+
+# format= values and the Accept media types that select them
+HISTORY_FORMATS = ("json", "columnar", "msgpack")
+_ACCEPT_FORMATS = {
+    COLUMNAR_JSON_MEDIA_TYPE: "columnar",
+    MSGPACK_MEDIA_TYPE: "msgpack",
+    "application/x-msgpack": "msgpack",
+}
+
+
+def choose_format(format_param: Optional[str], accept: Optional[str]) -> str:
+    """
+    Select the history representation.
+
+    An explicit format= query parameter wins; otherwise the first
+    columnar media type listed in Accept is used. Defaults to "json".
+    Raises 406 when MessagePack is requested but not installed.
+    """
+    chosen = format_param
+    if not chosen and accept:
+        for item in accept.split(","):
+            media_type = item.split(";")[0].strip().lower()
+            if media_type in _ACCEPT_FORMATS:
+                chosen = _ACCEPT_FORMATS[media_type]
+                break
+
+    chosen = chosen or "json"
+
+    if chosen == "msgpack" and msgpack is None:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail="MessagePack encoding is not available",
+        )
+
+    return chosen
+
+
+def parse_metrics(metrics: Optional[str]) -> List[str]:
+    """Parse a comma-separated metrics parameter, rejecting unknown names."""
+    if not metrics:
+        return list(DEFAULT_METRICS)
+
+    names = [m.strip() for m in metrics.split(",") if m.strip()]
+    unknown = [m for m in names if m not in COLUMNAR_METRICS]
+    if unknown or not names:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown metrics: {', '.join(unknown) or metrics}. "
+                   f"Choose from: {', '.join(COLUMNAR_METRICS)}",
+        )
+
+    # Preserve order, drop duplicates
+    return list(dict.fromkeys(names))
+
+
+def delta_encode(values: Sequence[int]) -> List[int]:
+    """Delta-encode integers: first value absolute, then differences."""
+    encoded = []
+    previous = 0
+    for value in values:
+        encoded.append(value - previous)
+        previous = value
+    return encoded
+
+
+def delta_decode(values: Sequence[int]) -> List[int]:
+    """Reverse delta_encode."""
+    decoded = []
+    total = 0
+    for value in values:
+        total += value
+        decoded.append(total)
+    return decoded
+
+
+def to_columnar(
+    history: Dict[str, Any],
+    metrics: Sequence[str] = DEFAULT_METRICS,
+    delta: bool = False,
+) -> Dict[str, Any]:
+    """
+    Convert a service history dict into the columnar representation.
+
+    Timestamps are epoch milliseconds; with delta=True they are
+    delta-encoded (values are left as-is, missing values are null).
+    """
+    readings = history["readings"]
+
+    times = [int(r["time"].timestamp() * 1000) for r in readings]
+
+    return {
+        "device_name": history["device_name"],
+        "topic": history["topic"],
+        "time_unit": "ms",
+        "delta": delta,
+        "count": len(readings),
+        "t": delta_encode(times) if delta else times,
+        "values": {
+            metric: [r[metric] for r in readings]
+            for metric in metrics
+        },
+        "summary": history.get("summary"),
+    }
+
+
+def pack(payload: Dict[str, Any]) -> bytes:
+    """Encode a columnar payload as MessagePack."""
+    return msgpack.packb(payload, use_bin_type=True)
@@ -19,6 +19,57 @@ class Settings(BaseSettings):
         description="PostgreSQL async connection string"
     )
     
+    # Database Pools (one per workload, see db/database.py)
+    db_interactive_pool_size: int = Field(default=5)
+    db_interactive_max_overflow: int = Field(default=10)
+    db_interactive_pool_timeout: float = Field(
+        default=5.0,
+        description="Seconds a dashboard request waits for a connection"
+    )
+    db_interactive_statement_timeout_ms: int = Field(
+        default=15_000,
+        description="Server-side statement timeout for interactive queries (0 disables)"
+    )
+    db_reporting_pool_size: int = Field(default=2)
+    db_reporting_max_overflow: int = Field(default=2)
+    db_reporting_pool_timeout: float = Field(default=15.0)
+    db_reporting_statement_timeout_ms: int = Field(default=60_000)
+    db_maintenance_pool_size: int = Field(default=1)
+    db_maintenance_max_overflow: int = Field(default=0)
+    db_maintenance_pool_timeout: float = Field(default=60.0)
+    db_maintenance_statement_timeout_ms: int = Field(default=300_000)
+    db_prepared_statement_cache_size: int = Field(
+        default=256,
+        description="Prepared statements cached per connection by SQLAlchemy's asyncpg adapter"
+    )
+    db_statement_cache_size: int = Field(
+        default=256,
+        description="asyncpg's own statement cache per connection (0 disables, e.g. behind pgbouncer)"
+    )
+    db_warm_up_enabled: bool = Field(
+        default=True,
+        description="Open the interactive pool and prime statement caches at startup"
+    )
+    history_query_timeout_ms: int = Field(
+        default=10_000,
+        description="Deadline for /api/history database queries"
+    )
+    report_query_timeout_ms: int = Field(
+        default=30_000,
+        description="Deadline for report generation queries"
+    )
+    
+    # Read Replica (optional; empty URL sends every read to the primary)
+    replica_database_url: str = Field(
+        default="",
+        description="PostgreSQL connection string of a replica for read-only queries"
+    )
+    replica_max_lag_seconds: float = Field(
+        default=5.0,
+        description="Replication lag above which reads fall back to the primary"
+    )
+    replica_lag_check_interval: float = Field(default=5.0)
+    
     # API Server
     api_host: str = Field(default="0.0.0.0")
     api_port: int = Field(default=8000)
@@ -32,6 +83,17 @@ class Settings(BaseSettings):
     jwt_algorithm: str = Field(default="HS256")
     jwt_expire_minutes: int = Field(default=60 * 24 * 7)  # 7 days
     
+    # Authenticated principal cache (0 disables)
+    principal_cache_ttl_seconds: float = Field(
+        default=30.0,
+        description="Seconds an authenticated user is cached per token"
+    )
+    principal_cache_max_size: int = Field(default=1024)
+    principal_invalidation_channel: str = Field(
+        default="user_changed",
+        description="Channel the users table trigger NOTIFYs on (migration 004)"
+    )
+    
     # CORS
     cors_origins: List[str] = Field(
         default=["http://localhost:3000", "http://localhost:5173"],
@@ -47,8 +109,116 @@ class Settings(BaseSettings):
     resend_api_key: str = Field(default="")
     email_from: str = Field(default="noreply@sensorpulse.local")
     
+    # Response Compression
+    compression_min_size: int = Field(
+        default=1024,
+        description="Minimum JSON body size (bytes) before gzip/brotli is applied"
+    )
+    gzip_level: int = Field(default=6)
+    brotli_quality: int = Field(default=4)
+    
+    # Health Monitor
+    health_check_interval: float = Field(
+        default=10.0,
+        description="Seconds between background health probes"
+    )
+    health_db_timeout: float = Field(default=3.0)
+    health_max_loop_lag_ms: float = Field(default=500.0)
+    health_pool_saturation_threshold: float = Field(default=0.9)
+    
+    # WebSocket
+    ws_send_queue_size: int = Field(
+        default=256,
+        description="Maximum messages queued per WebSocket client"
+    )
+    ws_slow_consumer_policy: str = Field(
+        default="drop_oldest",
+        description="When a client's queue is full: drop_oldest, coalesce or disconnect"
+    )
+    ws_batch_interval_ms: int = Field(
+        default=100,
+        description="Tick for batching readings into one frame (protocol 2 clients; 0 sends immediately)"
+    )
+    ws_replay_size: int = Field(
+        default=1000,
+        description="Recent readings kept for clients resuming with resume_from"
+    )
+    ws_heartbeat_interval: float = Field(
+        default=30.0,
+        description="Seconds without a client message before the server pings (0 disables)"
+    )
+    ws_heartbeat_timeout: float = Field(
+        default=10.0,
+        description="Seconds to wait for a reply to a ping before closing the connection"
+    )
+    
+    # Live Readings (LISTEN for ingester NOTIFY events)
+    live_readings_enabled: bool = Field(default=True)
+    live_readings_channel: str = Field(
+        default="sensor_readings",
+        description="Channel the ingester NOTIFYs after writing readings"
+    )
+    ws_stats_channel: str = Field(
+        default="ws_worker_stats",
+        description="Channel workers use to share connection counts for /ws/stats"
+    )
+    ws_stats_interval: float = Field(default=5.0)
+    
+    # Hot Tier (recent readings in memory for /api/history)
+    hot_tier_enabled: bool = Field(default=True)
+    hot_tier_hours: int = Field(
+        default=24,
+        description="Hours of readings kept in memory; history requests within it skip the database"
+    )
+    hot_tier_capacity: int = Field(
+        default=10_000,
+        description="Readings kept per device (older ones fall back to the database)"
+    )
+    
+    # Admission Control (per-route-class concurrency limits, see admission.py)
+    admission_enabled: bool = Field(default=True)
+    admission_capacity: int = Field(
+        default=15,
+        description="Interactive and long history requests handled at once "
+                    "(interactive pool: size 5 + overflow 10)"
+    )
+    admission_max_queue: int = Field(
+        default=50,
+        description="Requests waiting per class before new ones are shed immediately"
+    )
+    admission_interactive_budget: float = Field(
+        default=2.0,
+        description="Seconds an interactive request may wait for a slot before a 503"
+    )
+    admission_long_history_hours: int = Field(
+        default=48,
+        description="History requests over this many hours count as long history"
+    )
+    admission_long_history_concurrency: int = Field(default=4)
+    admission_long_history_budget: float = Field(default=1.0)
+    admission_report_concurrency: int = Field(
+        default=2,
+        description="Reports generated at once, on the reporting pool (size 2 + overflow 2)"
+    )
+    admission_report_budget: float = Field(default=0.5)
+    
     # Rate Limiting
     rate_limit_per_minute: int = Field(default=100)
+    rate_limit_max_keys: int = Field(
+        default=100_000,
+        description="Maximum client keys tracked by the rate limiter (LRU evicted)"
+    )
+    rate_limit_backend: str = Field(
+        default="memory",
+        description="Counter store: memory (per process), shm (shared memory, "
+                    "one host) or postgres (unlogged table, across hosts)"
+    )
+    rate_limit_sync_interval: float = Field(
+        default=0.5,
+        description="Seconds between pushes of batched counts to the shared store"
+    )
+    rate_limit_shm_name: str = Field(default="sensorpulse_ratelimit")
+    rate_limit_shm_slots: int = Field(default=65536)
     
     # App Info
     app_version: str = Field(default="0.1.0")
@@ -1,14 +1,43 @@
 # Database module
-from .database import Base, engine, async_engine, get_db, get_sync_db, test_connection
+from .database import (
+    Base,
+    engine,
+    engines,
+    async_engine,
+    AsyncSessionLocal,
+    ReportingSessionLocal,
+    MaintenanceSessionLocal,
+    get_db,
+    get_reporting_db,
+    get_sync_db,
+    get_pool_stats,
+    pool_usage,
+    test_connection,
+)
 from .models import SensorReading, User
+from .statements import REGISTRY, get_statement_stats, warm_up
+from .replica import replica_router, get_read_db, get_reporting_read_db
 
 __all__ = [
     "Base",
     "engine",
+    "engines",
     "async_engine",
+    "AsyncSessionLocal",
+    "ReportingSessionLocal",
+    "MaintenanceSessionLocal",
     "get_db",
+    "get_reporting_db",
     "get_sync_db",
+    "get_pool_stats",
+    "pool_usage",
     "test_connection",
     "SensorReading",
     "User",
+    "REGISTRY",
+    "get_statement_stats",
+    "warm_up",
+    "replica_router",
+    "get_read_db",
+    "get_reporting_read_db",
 ]
@@ -0,0 +1,227 @@
+# ================================
+# SensorPulse - Read Replica Routing
+# ================================
+#
+# When REPLICA_DATABASE_URL is set, read-only request paths (sensor
+# routes via get_read_db, reports via get_reporting_read_db) get their
+# sessions from a replica, keeping them off the primary the ingester is
+# writing to.
+#
+# Like the primary, the replica has one pool per workload (interactive and
+# reporting) with that workload's POOLS settings, so reports can't take
+# the dashboard's replica connections or run under its timeouts.
+#
+# A background monitor measures the replica's replication lag. While the
+# lag is unknown (not measured yet, replica unreachable) or above
+# replica_max_lag_seconds, reads fall back to the primary's pools.
+#
+# Startup work that must be consistent with the live NOTIFY feed (hot tier
+# load, snapshot cache) keeps reading from the primary.
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+import structlog
+from sqlalchemy import text
+
+from config import settings
+from .database import (
+    INTERACTIVE,
+    POOLS,
+    REPORTING,
+    AsyncSessionLocal,
+    ReportingSessionLocal,
+    _create_pool_engine,
+    _session_factory,
+    pool_usage,
+)
+from .statements import prepare_on_connect
+
+logger = structlog.get_logger(__name__)
+
+# Replica workloads, each with its own pool
+WORKLOADS = (INTERACTIVE, REPORTING)
+
+# Seconds since the last replayed transaction, 0 when fully caught up. A
+# server that isn't in recovery (not a physical standby) has no lag.
+# Having replayed everything received only means caught up while the WAL
+# receiver is streaming; otherwise the age of the last replayed
+# transaction is all we know. (pg_stat_wal_receiver.status is only
+# visible to roles with pg_read_all_stats; without it the lag is always
+# the replay age.) NULL when nothing has been replayed yet.
+LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+            AND EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN 0
+        ELSE EXTRACT(EPOCH FROM (NOW() - pg_last_xact_replay_timestamp()))
+    END AS lag_seconds
+""")
+
+
+class ReplicaRouter:
+    """
+    Chooses replica or primary sessions based on measured replication lag.
+
+    `sessionmaker_for(primary, workload)` returns the replica's session
+    factory for the workload when the replica is usable, or the given
+    primary factory otherwise.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str],
+        max_lag: float = 5.0,
+        interval: float = 5.0,
+        timeout: float = 3.0,
+    ):
+        self.max_lag = max_lag
+        self.interval = interval
+        self.timeout = timeout
+
+        self.engines = {}
+        self.session_factories = {}
+        if url:
+            url = url.replace("postgresql://", "postgresql+asyncpg://")
+            for workload in WORKLOADS:
+                engine = _create_pool_engine(f"replica-{workload}", **POOLS[workload], url=url)
+                self.engines[workload] = engine
+                self.session_factories[workload] = _session_factory(engine)
+            prepare_on_connect(self.engines[INTERACTIVE])
+
+        self.lag_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at: Optional[datetime] = None
+        self.max_lag_seen = 0.0
+
+        self.replica_sessions = 0
+        self.primary_sessions = 0
+        self.fallbacks = 0
+
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.engines)
+
+    def is_usable(self) -> bool:
+        """Whether reads should go to the replica right now."""
+        return self.configured and self.lag_seconds is not None and self.lag_seconds <= self.max_lag
+
+    async def _measure_lag(self) -> float:
+        async with self.engines[INTERACTIVE].connect() as conn:
+            result = await conn.execute(LAG_QUERY)
+            lag = result.scalar()
+        if lag is None:
+            raise RuntimeError("replication lag unknown, no transaction replayed yet")
+        return float(lag)
+
+    async def check(self):
+        """Measure replication lag once."""
+        if not self.configured:
+            return
+
+        was_usable = self.is_usable()
+        try:
+            self.lag_seconds = await asyncio.wait_for(self._measure_lag(), timeout=self.timeout)
+            self.error = None
+            self.max_lag_seen = max(self.max_lag_seen, self.lag_seconds)
+        except Exception as e:
+            self.lag_seconds = None
+            self.error = str(e) or type(e).__name__
+        self.checked_at = datetime.now(timezone.utc)
+
+        if was_usable and not self.is_usable():
+            logger.warning(
+                "Replica unusable, reading from primary",
+                lag_seconds=self.lag_seconds,
+                max_lag=self.max_lag,
+                error=self.error,
+            )
+        elif self.is_usable() and not was_usable:
+            logger.info("Reading from replica", lag_seconds=self.lag_seconds)
+
+    def sessionmaker_for(self, primary, workload: str = INTERACTIVE):
+        """Session factory for a read: the replica's pool for `workload`, or `primary` as fallback."""
+        if self.is_usable():
+            self.replica_sessions += 1
+            return self.session_factories[workload]
+
+        if self.configured:
+            self.fallbacks += 1
+        self.primary_sessions += 1
+        return primary
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception:
+                logger.exception("Replica lag check failed")
+
+    async def start(self):
+        """Run an initial lag check and start the background monitor."""
+        if not self.configured or self._task is not None:
+            return
+
+        await self.check()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Replica lag monitor started", interval=self.interval, max_lag=self.max_lag)
+
+    async def stop(self):
+        """Stop the monitor and close the replica's connections."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        for engine in self.engines.values():
+            await engine.dispose()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return lag metrics and routing counts."""
+        return {
+            "configured": self.configured,
+            "usable": self.is_usable(),
+            "lag_seconds": round(self.lag_seconds, 3) if self.lag_seconds is not None else None,
+            "max_lag_seconds": self.max_lag,
+            "max_lag_seen_seconds": round(self.max_lag_seen, 3),
+            "error": self.error,
+            "checked_at": self.checked_at.isoformat() if self.checked_at else None,
+            "replica_sessions": self.replica_sessions,
+            "primary_sessions": self.primary_sessions,
+            "fallbacks": self.fallbacks,
+            "pools": {workload: pool_usage(engine) for workload, engine in self.engines.items()},
+        }
+
+
+# Global replica router
+replica_router = ReplicaRouter(
+    settings.replica_database_url,
+    max_lag=settings.replica_max_lag_seconds,
+    interval=settings.replica_lag_check_interval,
+)
+
+
+# Dependencies for FastAPI
+async def get_read_db():
+    """FastAPI dependency for read-only requests (replica when usable)."""
+    async with replica_router.sessionmaker_for(AsyncSessionLocal)() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+async def get_reporting_read_db():
+    """FastAPI dependency for report generation (replica when usable)."""
+    async with replica_router.sessionmaker_for(ReportingSessionLocal, REPORTING)() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
@@ -0,0 +1,156 @@
+# ================================
+# SensorPulse - Prepared Statement Registry
+# ================================
+#
+# The hottest queries are built once here instead of on every call, and
+# services execute them with bound parameters. The SQL text is therefore
+# identical every time, so SQLAlchemy's compiled cache and the per
+# connection asyncpg prepared statement cache always hit.
+#
+# On PostgreSQL every new pooled connection prepares the registered
+# statements before its first checkout, and `warm_up()` (run in the
+# lifespan handler) opens the pool's connections up front so the first
+# requests after a deploy find them ready.
+
+import asyncio
+import time
+from typing import Any, Dict
+
+import structlog
+from sqlalchemy import bindparam, event, func, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.util import await_only
+
+from .database import INTERACTIVE, engines
+from .models import SensorReading, User
+
+logger = structlog.get_logger(__name__)
+
+
+LATEST_READINGS = text("""
+    SELECT
+        time,
+        topic,
+        device_name,
+        temperature,
+        humidity,
+        battery,
+        linkquality,
+        raw_data,
+        EXTRACT(EPOCH FROM (NOW() - time)) / 60 AS last_seen_minutes
+    FROM latest_readings
+    ORDER BY device_name
+""")
+
+HISTORY_MARKER = select(
+    func.min(SensorReading.time).label("first_time"),
+    func.max(SensorReading.time).label("last_time"),
+    func.count().label("reading_count"),
+).where(
+    SensorReading.device_name == bindparam("device_name"),
+    SensorReading.time >= bindparam("since"),
+)
+
+DEVICE_HISTORY = select(SensorReading).where(
+    SensorReading.device_name == bindparam("device_name"),
+    SensorReading.time >= bindparam("since"),
+).order_by(SensorReading.time.asc())
+
+USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
+
+
+REGISTRY: Dict[str, Any] = {
+    "latest_readings": LATEST_READINGS,
+    "history_marker": HISTORY_MARKER,
+    "device_history": DEVICE_HISTORY,
+    "user_by_id": USER_BY_ID,
+}
+
+# Connections that prepared the registry, and statements that failed
+_stats = {"connections_prepared": 0, "prepare_errors": 0, "warm_up_ms": None, "warmed_connections": 0}
+
+
+def _compile(engine: AsyncEngine) -> Dict[str, str]:
+    """SQL of each statement exactly as the dialect sends it."""
+    return {name: str(statement.compile(dialect=engine.dialect)) for name, statement in REGISTRY.items()}
+
+
+def prepare_connection(dbapi_connection, compiled: Dict[str, str]):
+    """
+    Prepare statements on a new asyncpg connection without running them.
+
+    Goes through the SQLAlchemy adapter's prepare, the same call its
+    cursor makes before executing, so the statements land in the
+    connection's prepared statement cache and are reused as-is. That call
+    is private to SQLAlchemy: if it is missing, preparing is skipped with
+    a warning and the connection is used unprepared.
+    """
+    prepare = getattr(dbapi_connection, "_prepare", None)
+    if prepare is None or not hasattr(dbapi_connection, "_invalidate_schema_cache_asof"):
+        _stats["prepare_errors"] += 1
+        logger.warning(
+            "SQLAlchemy's asyncpg adapter has no _prepare, statements are not prepared on connect",
+            adapter=type(dbapi_connection).__name__,
+        )
+        return
+
+    for name, sql in compiled.items():
+        try:
+            await_only(prepare(sql, dbapi_connection._invalidate_schema_cache_asof))
+        except Exception as e:
+            _stats["prepare_errors"] += 1
+            logger.warning("Failed to prepare statement", statement=name, error=str(e))
+    _stats["connections_prepared"] += 1
+
+
+def prepare_on_connect(engine: AsyncEngine):
+    """Prepare the registered statements on every new connection of an engine."""
+    if engine.dialect.name != "postgresql":
+        return
+
+    compiled = None
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _prepare(dbapi_connection, connection_record):
+        nonlocal compiled
+        if compiled is None:
+            compiled = _compile(engine)
+        prepare_connection(dbapi_connection, compiled)
+
+
+async def warm_up(engine: AsyncEngine, connections: int) -> Dict[str, Any]:
+    """
+    Open `connections` pooled connections at once.
+
+    Each new connection prepares the registry (see prepare_on_connect), so
+    the first requests find the pool open and the statements ready.
+    Nothing is executed.
+    """
+    start = time.perf_counter()
+    opened = await asyncio.gather(
+        *(engine.connect().start() for _ in range(connections)),
+        return_exceptions=True,
+    )
+    conns = [c for c in opened if not isinstance(c, BaseException)]
+    for conn in conns:
+        await conn.close()
+
+    _stats["warmed_connections"] = len(conns)
+    _stats["warm_up_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    logger.info(
+        "Connection pool warmed up",
+        connections=len(conns),
+        failed=len(opened) - len(conns),
+        statements=len(REGISTRY),
+        warm_up_ms=_stats["warm_up_ms"],
+    )
+    return get_statement_stats()
+
+
+def get_statement_stats() -> Dict[str, Any]:
+    """Return registry and warm-up statistics."""
+    return {"statements": list(REGISTRY), **_stats}
+
+
+# The hot statements are interactive queries
+prepare_on_connect(engines[INTERACTIVE])
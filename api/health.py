@@ -0,0 +1,154 @@
+# ================================
+# SensorPulse API - Background Health Monitor
+# ================================
+#
+# Probes the database, connection pool and event loop on an interval and
+# keeps the result in memory, so /health, /health/live and /health/ready
+# answer instantly without touching the pool.
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+import structlog
+from sqlalchemy import text
+
+from config import settings
+from db import async_engine, pool_usage
+
+logger = structlog.get_logger(__name__)
+
+
+class HealthMonitor:
+    """
+    Periodic health prober.
+
+    Each cycle runs `SELECT 1` with a timeout, samples pool usage and
+    measures event-loop lag as the overshoot of the interval sleep.
+    """
+
+    def __init__(
+        self,
+        engine,
+        interval: float = 10.0,
+        db_timeout: float = 3.0,
+        max_loop_lag_ms: float = 500.0,
+        pool_saturation_threshold: float = 0.9,
+    ):
+        self.engine = engine
+        self.interval = interval
+        self.db_timeout = db_timeout
+        self.max_loop_lag_ms = max_loop_lag_ms
+        self.pool_saturation_threshold = pool_saturation_threshold
+
+        self.database = "unknown"
+        self.database_error: Optional[str] = None
+        self.database_latency_ms: Optional[float] = None
+        self.loop_lag_ms = 0.0
+        self.pool: Dict[str, Any] = {}
+        self.checked_at: Optional[datetime] = None
+        self.check_count = 0
+
+        self._task: Optional[asyncio.Task] = None
+
+    async def _check_database(self):
+        """Run SELECT 1 against the engine with a timeout."""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        async def probe():
+            async with self.engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        try:
+            await asyncio.wait_for(probe(), timeout=self.db_timeout)
+            self.database = "connected"
+            self.database_error = None
+            self.database_latency_ms = round((loop.time() - start) * 1000, 2)
+        except Exception as e:
+            self.database = "disconnected"
+            self.database_error = str(e) or type(e).__name__
+            self.database_latency_ms = None
+
+    def _sample_pool(self):
+        """Sample connection pool usage (QueuePool only)."""
+        self.pool = pool_usage(self.engine)
+
+    async def check(self):
+        """Run one probe cycle."""
+        await self._check_database()
+        self._sample_pool()
+        self.checked_at = datetime.now(timezone.utc)
+        self.check_count += 1
+
+    async def _run(self):
+        """Background loop: probe, then sleep and measure loop lag."""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            try:
+                await self.check()
+            except Exception:
+                logger.exception("Health check failed")
+
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = loop.time() - start - self.interval
+            self.loop_lag_ms = round(max(lag, 0.0) * 1000, 2)
+
+    async def start(self):
+        """Run an initial check and start the background loop."""
+        if self._task is not None:
+            return
+
+        await self.check()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Health monitor started", interval=self.interval)
+
+    async def stop(self):
+        """Stop the background loop."""
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def is_ready(self) -> bool:
+        """Whether the API should receive traffic."""
+        if self.database != "connected":
+            return False
+
+        saturation = self.pool.get("saturation")
+        if saturation is not None and saturation >= self.pool_saturation_threshold:
+            return False
+
+        return self.loop_lag_ms < self.max_loop_lag_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the last known health state."""
+        return {
+            "status": "healthy" if self.is_ready() else "degraded",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "version": settings.app_version,
+            "database": self.database,
+            "database_error": self.database_error,
+            "database_latency_ms": self.database_latency_ms,
+            "pool": self.pool,
+            "event_loop_lag_ms": self.loop_lag_ms,
+            "checked_at": self.checked_at.isoformat() if self.checked_at else None,
+            "checks": self.check_count,
+        }
+
+
+# Global health monitor instance
+health_monitor = HealthMonitor(
+    async_engine,
+    interval=settings.health_check_interval,
+    db_timeout=settings.health_db_timeout,
+    max_loop_lag_ms=settings.health_max_loop_lag_ms,
+    pool_saturation_threshold=settings.health_pool_saturation_threshold,
+)
@@ -0,0 +1,374 @@
+# ================================
+# SensorPulse API - Hot Tier of Recent Readings
+# ================================
+#
+# Recent readings kept in per-device NumPy ring buffers, so history
+# requests inside the window (the usual "last 24 h" dashboard chart) are
+# answered without PostgreSQL.
+#
+# The tier is (re)loaded from the database each time the live reading
+# listener connects and then kept current from the live events (see
+# live.py). While the listener is disconnected it can miss readings, so
+# it is dropped and every request goes to the database until the next
+# load.
+#
+# Coverage: a device's ring holds everything from the load horizon, or
+# from just after the newest reading it has overwritten once full.
+# Requests reaching further back than that fall through to the database.
+
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import structlog
+from sqlalchemy import select
+
+from config import settings
+from db.database import AsyncSessionLocal
+from db.models import SensorReading
+
+# NumPy is optional - without it the hot tier stays disabled
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on environment
+    np = None
+
+logger = structlog.get_logger(__name__)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+METRICS = ("temperature", "humidity", "battery", "linkquality")
+INT_METRICS = ("battery", "linkquality")
+
+# Live events carry millisecond timestamps while database rows have
+# microseconds, so a reading seen both ways (load overlap) differs by up
+# to a millisecond. Readings of one device closer than that are the same.
+DUPLICATE_WINDOW_US = 1000
+
+
+def _to_us(value: datetime) -> int:
+    """Exact epoch microseconds (naive datetimes are taken as UTC)."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def _from_us(value: int) -> datetime:
+    return EPOCH + timedelta(microseconds=value)
+
+
+def _now_us() -> int:
+    return time.time_ns() // 1000
+
+
+class DeviceRing:
+    """
+    Fixed-capacity ring of one device's readings in time order.
+
+    Timestamps and metrics live in NumPy arrays (NaN for missing values);
+    topic and raw_data are kept in object arrays alongside. Appends are
+    O(1); a reading older than the newest one is inserted in place, which
+    costs a copy but is rare (out-of-order delivery, load overlap).
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.times = np.zeros(capacity, dtype=np.int64)
+        self.values = np.full((len(METRICS), capacity), np.nan)
+        self.topics = np.empty(capacity, dtype=object)
+        self.raw = np.empty(capacity, dtype=object)
+        self.head = 0  # next write position
+        self.size = 0
+        self.evicted_until: Optional[int] = None  # newest overwritten time
+
+    def _order(self):
+        """Physical positions in chronological order."""
+        start = (self.head - self.size) % self.capacity
+        return (start + np.arange(self.size)) % self.capacity
+
+    def append(self, time_us: int, topic: str, values, raw: Any) -> bool:
+        """Add a reading; returns False for a duplicate (see DUPLICATE_WINDOW_US)."""
+        if self.size and time_us < self.times[(self.head - 1) % self.capacity] + DUPLICATE_WINDOW_US:
+            return self._insert(time_us, topic, values, raw)
+
+        if self.size == self.capacity:
+            self._evict(int(self.times[self.head]))
+        else:
+            self.size += 1
+
+        self.times[self.head] = time_us
+        self.values[:, self.head] = values
+        self.topics[self.head] = topic
+        self.raw[self.head] = raw
+        self.head = (self.head + 1) % self.capacity
+        return True
+
+    def _evict(self, time_us: int):
+        if self.evicted_until is None or time_us > self.evicted_until:
+            self.evicted_until = time_us
+
+    def _insert(self, time_us: int, topic: str, values, raw: Any) -> bool:
+        order = self._order()
+        times = self.times[order]
+        pos = int(np.searchsorted(times, time_us))
+        if pos < self.size and times[pos] - time_us < DUPLICATE_WINDOW_US:
+            return False
+        if pos > 0 and time_us - times[pos - 1] < DUPLICATE_WINDOW_US:
+            return False
+
+        if self.size == self.capacity:
+            if pos == 0:
+                # Older than everything retained: it is outside coverage now
+                self._evict(time_us)
+                return True
+            self._evict(int(times[0]))
+            order, times, pos = order[1:], times[1:], pos - 1
+
+        self.times[:len(order) + 1] = np.insert(times, pos, time_us)
+        self.values[:, :len(order) + 1] = np.insert(self.values[:, order], pos, values, axis=1)
+        self.topics[:len(order) + 1] = np.insert(self.topics[order], pos, topic)
+        self.raw[:len(order) + 1] = np.insert(self.raw[order], pos, None)
+        self.raw[pos] = raw
+        self.size = len(order) + 1
+        self.head = self.size % self.capacity
+        return True
+
+    def window(self, since_us: int):
+        """Physical positions of readings at or after since_us, oldest first."""
+        order = self._order()
+        start = int(np.searchsorted(self.times[order], since_us))
+        return order[start:]
+
+    def complete_since(self, loaded_since_us: int) -> int:
+        """Earliest time from which this ring holds every reading."""
+        if self.evicted_until is None:
+            return loaded_since_us
+        return max(loaded_since_us, self.evicted_until + 1)
+
+
+class HotWindow:
+    """One device's readings in a requested window, served from the tier."""
+
+    def __init__(self, device_name: str, ring: Optional[DeviceRing], positions):
+        self.device_name = device_name
+        self.ring = ring
+        self.positions = positions
+
+    def marker(self) -> Dict[str, Any]:
+        """Same shape as SensorService.get_history_marker()."""
+        if not len(self.positions):
+            return {"first_time": None, "last_time": None, "reading_count": 0}
+
+        times = self.ring.times
+        return {
+            "first_time": _from_us(int(times[self.positions[0]])),
+            "last_time": _from_us(int(times[self.positions[-1]])),
+            "reading_count": len(self.positions),
+        }
+
+    def history(self) -> Dict[str, Any]:
+        """Same shape as SensorService.get_device_history()."""
+        ring, positions = self.ring, self.positions
+        if ring is None:
+            return {
+                "device_name": self.device_name,
+                "topic": f"zigbee2mqtt/{self.device_name}",
+                "readings": [],
+                "summary": _summary(np.empty(0), np.empty(0), 0),
+            }
+
+        values = ring.values[:, positions]
+        columns = {}
+        for i, metric in enumerate(METRICS):
+            cast = int if metric in INT_METRICS else float
+            columns[metric] = [None if v != v else cast(v) for v in values[i].tolist()]
+
+        topics = ring.topics[positions].tolist()
+        raw = ring.raw[positions].tolist()
+        readings = [
+            {
+                "time": _from_us(time_us),
+                "topic": topics[j],
+                "device_name": self.device_name,
+                "temperature": columns["temperature"][j],
+                "humidity": columns["humidity"][j],
+                "battery": columns["battery"][j],
+                "linkquality": columns["linkquality"][j],
+                "raw_data": raw[j],
+            }
+            for j, time_us in enumerate(ring.times[positions].tolist())
+        ]
+
+        return {
+            "device_name": self.device_name,
+            "topic": topics[0] if topics else f"zigbee2mqtt/{self.device_name}",
+            "readings": readings,
+            "summary": _summary(values[0], values[1], len(readings)),
+        }
+
+
+def _summary(temps, humids, count: int) -> Dict[str, Any]:
+    """History summary over non-missing temperature and humidity values."""
+    temps = temps[~np.isnan(temps)]
+    humids = humids[~np.isnan(humids)]
+    return {
+        "min_temp": float(temps.min()) if temps.size else None,
+        "max_temp": float(temps.max()) if temps.size else None,
+        "avg_temp": float(temps.sum()) / temps.size if temps.size else None,
+        "min_humidity": float(humids.min()) if humids.size else None,
+        "max_humidity": float(humids.max()) if humids.size else None,
+        "avg_humidity": float(humids.sum()) / humids.size if humids.size else None,
+        "reading_count": count,
+    }
+
+
+class HotTier:
+    """
+    Per-device ring buffers covering the last `hours` of readings.
+
+    `lookup()` returns a HotWindow when the requested window is fully
+    covered, or None (a miss) so the caller goes to the database.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        hours: int = 24,
+        capacity: int = 10_000,
+        enabled: bool = True,
+    ):
+        self.session_factory = session_factory
+        self.hours = hours
+        self.capacity = capacity
+        self.enabled = enabled and np is not None and hours > 0
+
+        self._rings: Dict[str, DeviceRing] = {}
+        self.loaded_since_us: Optional[int] = None  # None until loaded
+        self._pending: Optional[List[Dict[str, Any]]] = None  # live readings during a load
+
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.load_ms: Optional[float] = None
+        self.loaded_at: Optional[datetime] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.enabled and self.loaded_since_us is not None
+
+    def _add(self, rings: Dict[str, DeviceRing], reading) -> bool:
+        device_name = reading["device_name"]
+        if not device_name or reading["time"] is None:
+            return False
+
+        ring = rings.get(device_name)
+        if ring is None:
+            ring = rings[device_name] = DeviceRing(self.capacity)
+
+        values = [np.nan if reading[m] is None else reading[m] for m in METRICS]
+        return ring.append(_to_us(reading["time"]), reading["topic"], values, reading["raw_data"])
+
+    def add(self, reading: Dict[str, Any]):
+        """Record a live reading."""
+        if not self.enabled:
+            return
+        if self._pending is not None:
+            self._pending.append(reading)
+        elif self.loaded_since_us is not None:
+            self._add(self._rings, reading)
+
+    async def load(self):
+        """Replace the tier with the last `hours` of readings from the database."""
+        if not self.enabled:
+            return
+
+        start = time.perf_counter()
+        since = datetime.now(timezone.utc) - timedelta(hours=self.hours)
+        query = select(
+            SensorReading.time,
+            SensorReading.topic,
+            SensorReading.device_name,
+            SensorReading.temperature,
+            SensorReading.humidity,
+            SensorReading.battery,
+            SensorReading.linkquality,
+            SensorReading.raw_data,
+        ).where(SensorReading.time >= since).order_by(SensorReading.time.asc())
+
+        # Live readings arriving meanwhile are applied after the swap
+        self._pending = []
+        rings: Dict[str, DeviceRing] = {}
+        try:
+            async with self.session_factory() as session:
+                result = await session.execute(query)
+                for row in result.mappings():
+                    self._add(rings, row)
+        except Exception:
+            self._pending = None
+            self.invalidate()
+            raise
+
+        pending, self._pending = self._pending, None
+        for reading in pending:
+            self._add(rings, reading)
+
+        self._rings = rings
+        self.loaded_since_us = _to_us(since)
+        self.loaded_at = datetime.now(timezone.utc)
+        self.loads += 1
+        self.load_ms = round((time.perf_counter() - start) * 1000, 2)
+        logger.info(
+            "Hot tier loaded",
+            devices=len(rings),
+            readings=sum(ring.size for ring in rings.values()),
+            load_ms=self.load_ms,
+        )
+
+    def invalidate(self):
+        """Stop serving until the next load (the live feed was interrupted)."""
+        self.loaded_since_us = None
+        self._rings = {}
+
+    def lookup(self, device_name: str, hours: int) -> Optional[HotWindow]:
+        """Readings of the last `hours` for a device, or None on a miss."""
+        if not self.ready:
+            if self.enabled:
+                self.misses += 1
+            return None
+
+        since_us = _now_us() - hours * 3_600_000_000
+        ring = self._rings.get(device_name)
+        start = self.loaded_since_us if ring is None else ring.complete_since(self.loaded_since_us)
+        if since_us < start:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        positions = ring.window(since_us) if ring is not None else np.empty(0, dtype=np.int64)
+        return HotWindow(device_name, ring, positions)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hot tier statistics and hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "hours": self.hours,
+            "capacity_per_device": self.capacity,
+            "devices": len(self._rings),
+            "readings": sum(ring.size for ring in self._rings.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "loads": self.loads,
+            "load_ms": self.load_ms,
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+        }
+
+
+# Global hot tier, fed by the live reading listener
+hot_tier = HotTier(
+    AsyncSessionLocal,
+    hours=settings.hot_tier_hours,
+    capacity=settings.hot_tier_capacity,
+    enabled=settings.hot_tier_enabled,
+)
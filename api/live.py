@@ -0,0 +1,340 @@
+# ================================
+# SensorPulse API - Live Reading Listener
+# ================================
+#
+# LISTENs on the channel the ingester NOTIFYs after each committed batch
+# (see ingester/events.py for the payload format), decodes the compact
+# events and feeds each reading to the WebSocket manager.
+#
+# Latency metrics:
+#   - pipeline: ingester commit -> API receive (from the batch "sent" time)
+#   - end_to_end: MQTT receive -> WebSocket enqueue (from the reading time)
+#
+# Fan-out across uvicorn workers: every worker runs its own listener, and
+# PostgreSQL delivers each NOTIFY once to every listening session, so each
+# worker broadcasts every event exactly once to its own sockets (event ids
+# are de-duplicated in case of overlap during reconnects). Workers also
+# NOTIFY a small stats summary on a second channel so any worker can
+# answer /ws/stats for the whole deployment.
+#
+# The listener also feeds the hot tier (hot_tier.py): it is reloaded on
+# every (re)connect and dropped while the connection is down. It also
+# hears users table changes (migration 004) and drops those users from
+# this worker's principal cache (principals.py).
+
+import asyncio
+import os
+import socket
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Optional
+
+import asyncpg
+import orjson
+import structlog
+
+from config import settings
+from db import async_engine
+from hot_tier import hot_tier
+from principals import principal_cache
+from websocket import ws_manager
+
+logger = structlog.get_logger(__name__)
+
+EVENT_VERSION = 1
+READING_FIELDS = (
+    "time", "topic", "device_name", "temperature",
+    "humidity", "battery", "linkquality", "raw_data",
+)
+
+
+def decode_event(payload: str) -> Dict[str, Any]:
+    """
+    Decode a NOTIFY payload into {"id", "sent": epoch_ms, "readings": [...]}.
+
+    Raises ValueError for malformed payloads or unknown versions.
+    """
+    try:
+        event = orjson.loads(payload)
+    except orjson.JSONDecodeError as e:
+        raise ValueError(f"Invalid event payload: {e}") from e
+
+    if not isinstance(event, dict):
+        raise ValueError("Event payload must be an object")
+    if event.get("v") != EVENT_VERSION:
+        raise ValueError(f"Unsupported event version: {event.get('v')}")
+
+    readings = []
+    for row in event.get("r", []):
+        reading = dict(zip(READING_FIELDS, row))
+        reading["time"] = datetime.fromtimestamp(row[0] / 1000, tz=timezone.utc)
+        readings.append(reading)
+
+    return {"id": event.get("id"), "sent": event.get("sent"), "readings": readings}
+
+
+def _percentiles(samples: Deque[float]) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"last": None, "p50": None, "p95": None, "max": None}
+
+    ordered = sorted(samples)
+    return {
+        "last": samples[-1],
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+
+
+class ReadingListener:
+    """
+    Background LISTEN connection that forwards live readings.
+
+    Uses a dedicated asyncpg connection (LISTEN needs a session that stays
+    open, so it can't come from the pool) and reconnects after failures.
+    """
+
+    # Recent event ids remembered for de-duplication
+    SEEN_EVENTS = 4096
+
+    def __init__(
+        self,
+        manager,
+        dsn: Optional[str],
+        channel: str = "sensor_readings",
+        stats_channel: str = "ws_worker_stats",
+        stats_interval: float = 5.0,
+        reconnect_delay: float = 5.0,
+        sample_size: int = 1024,
+        hot_tier=None,
+        principal_cache=None,
+        users_channel: str = "user_changed",
+    ):
+        self.manager = manager
+        self.hot_tier = hot_tier
+        self.principal_cache = principal_cache
+        self.users_channel = users_channel
+        self.dsn = dsn
+        self.channel = channel
+        self.stats_channel = stats_channel
+        self.stats_interval = stats_interval
+        self.reconnect_delay = reconnect_delay
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self.events = 0
+        self.readings = 0
+        self.errors = 0
+        self.duplicates = 0
+        self.user_invalidations = 0
+        self.connected = False
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        # Other workers' summaries: worker id -> (monotonic receive time, summary)
+        self._workers: Dict[str, tuple] = {}
+        self.pipeline_ms: Deque[float] = deque(maxlen=sample_size)
+        self.end_to_end_ms: Deque[float] = deque(maxlen=sample_size)
+
+        self._task: Optional[asyncio.Task] = None
+
+    async def handle_payload(self, payload: str):
+        """Decode one NOTIFY payload and broadcast its readings."""
+        try:
+            event = decode_event(payload)
+        except (ValueError, IndexError, TypeError) as e:
+            self.errors += 1
+            logger.warning("Dropped malformed reading event", error=str(e))
+            return
+
+        event_id = event["id"]
+        if event_id is not None:
+            if event_id in self._seen:
+                self.duplicates += 1
+                return
+            self._seen[event_id] = None
+            if len(self._seen) > self.SEEN_EVENTS:
+                self._seen.popitem(last=False)
+
+        received = time.time() * 1000
+        if event["sent"]:
+            self.pipeline_ms.append(round(received - event["sent"], 2))
+
+        for reading in event["readings"]:
+            if self.hot_tier is not None:
+                self.hot_tier.add(reading)
+            await self.manager.broadcast_reading(reading)
+            enqueued = time.time() * 1000
+            self.end_to_end_ms.append(round(enqueued - reading["time"].timestamp() * 1000, 2))
+
+        self.events += 1
+        self.readings += len(event["readings"])
+
+    def _on_notification(self, connection, pid, channel, payload):
+        asyncio.create_task(self.handle_payload(payload))
+
+    def handle_user_changed(self, user_id: str):
+        """Drop a changed user from this worker's principal cache."""
+        self.principal_cache.invalidate_user(user_id)
+        self.user_invalidations += 1
+
+    def _on_user_changed(self, connection, pid, channel, payload):
+        self.handle_user_changed(payload)
+
+    def summary(self) -> Dict[str, Any]:
+        """This worker's stats summary, as shared with the other workers."""
+        return {
+            "worker": self.worker_id,
+            "active_connections": self.manager.get_connection_count(),
+            "events": self.events,
+            "readings": self.readings,
+        }
+
+    def handle_stats_payload(self, payload: str):
+        """Record another worker's stats summary."""
+        try:
+            summary = orjson.loads(payload)
+            worker = summary["worker"]
+        except (orjson.JSONDecodeError, KeyError, TypeError):
+            return
+
+        if worker != self.worker_id:
+            self._workers[worker] = (time.monotonic(), summary)
+
+    def _on_stats(self, connection, pid, channel, payload):
+        self.handle_stats_payload(payload)
+
+    async def _publish_stats(self, conn):
+        """Share this worker's summary until the connection closes."""
+        while not conn.is_closed():
+            try:
+                await conn.execute(
+                    "SELECT pg_notify($1, $2)",
+                    self.stats_channel,
+                    orjson.dumps(self.summary()).decode(),
+                )
+            except Exception as e:
+                logger.warning("Failed to publish worker stats", error=str(e))
+            await asyncio.sleep(self.stats_interval)
+
+    def cluster_stats(self) -> Dict[str, Any]:
+        """Aggregate connection counts across all live workers."""
+        cutoff = time.monotonic() - self.stats_interval * 3
+        for worker, (seen, _) in list(self._workers.items()):
+            if seen < cutoff:
+                del self._workers[worker]
+
+        workers = [self.summary()] + [summary for _, summary in self._workers.values()]
+        return {
+            "workers": len(workers),
+            "active_connections": sum(w.get("active_connections", 0) for w in workers),
+            "per_worker": sorted(workers, key=lambda w: w["worker"]),
+        }
+
+    async def _run(self):
+        """Keep a LISTEN connection open, reconnecting on failure."""
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(self.dsn)
+                closed = asyncio.Event()
+                conn.add_termination_listener(lambda _: closed.set())
+                await conn.add_listener(self.channel, self._on_notification)
+                await conn.add_listener(self.stats_channel, self._on_stats)
+                if self.principal_cache is not None:
+                    await conn.add_listener(self.users_channel, self._on_user_changed)
+                    # Changes made while disconnected weren't heard
+                    self.principal_cache.clear()
+
+                self.connected = True
+                logger.info("Listening for live readings", channel=self.channel)
+                publisher = asyncio.create_task(self._publish_stats(conn))
+                try:
+                    await self._load_hot_tier()
+                    await closed.wait()
+                finally:
+                    publisher.cancel()
+                logger.warning("Live reading connection closed")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Live reading listener failed", error=str(e))
+            finally:
+                self.connected = False
+                if self.hot_tier is not None:
+                    self.hot_tier.invalidate()
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _load_hot_tier(self):
+        """Reload the hot tier now that no live reading can be missed."""
+        if self.hot_tier is None:
+            return
+        try:
+            await self.hot_tier.load()
+        except Exception as e:
+            logger.error("Failed to load hot tier", error=str(e))
+
+    async def start(self):
+        """Start listening in the background."""
+        if self._task is not None:
+            return
+        if not self.dsn:
+            logger.info("Live readings disabled (no PostgreSQL DSN)")
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop listening."""
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return listener statistics and latency percentiles (ms)."""
+        return {
+            "channel": self.channel,
+            "connected": self.connected,
+            "events": self.events,
+            "readings": self.readings,
+            "errors": self.errors,
+            "duplicates": self.duplicates,
+            "user_invalidations": self.user_invalidations,
+            "pipeline_latency_ms": _percentiles(self.pipeline_ms),
+            "end_to_end_latency_ms": _percentiles(self.end_to_end_ms),
+        }
+
+
+def _listen_dsn() -> Optional[str]:
+    """Plain PostgreSQL DSN for asyncpg, or None when not on PostgreSQL."""
+    if not settings.live_readings_enabled:
+        return None
+
+    url = async_engine.url
+    if url.get_backend_name() != "postgresql":
+        return None
+    return url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+def create_reading_listener():
+    """Build the listener feeding the global WebSocket manager."""
+    return ReadingListener(
+        ws_manager,
+        _listen_dsn(),
+        channel=settings.live_readings_channel,
+        stats_channel=settings.ws_stats_channel,
+        stats_interval=settings.ws_stats_interval,
+        hot_tier=hot_tier,
+        principal_cache=principal_cache,
+        users_channel=settings.principal_invalidation_channel,
+    )
+
+
+# Global live reading listener
+reading_listener = create_reading_listener()
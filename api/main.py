@@ -12,10 +12,25 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
+from admission import AdmissionMiddleware, admission_controller
 from config import settings
-from db import engine
-from middleware import RateLimitMiddleware
-from routes import sensors, auth, websocket, reports
+from db import (
+    AsyncSessionLocal,
+    async_engine,
+    engines,
+    get_pool_stats,
+    get_statement_stats,
+    replica_router,
+    warm_up,
+)
+from health import health_monitor
+from hot_tier import hot_tier
+from live import reading_listener
+from middleware import RateLimitMiddleware, SharedRateLimiter, rate_limiter
+from query_guard import query_guard
+from routes import sensors, auth, websocket, sse, reports
+from services import SensorService
+from singleflight import query_flights
 from websocket import ws_manager
 
 # Configure structured logging
@@ -57,16 +72,53 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
         logger.error("Database connection failed", error=str(e))
         raise
     
+    # Open the interactive pool and prepare hot statements before traffic
+    if settings.db_warm_up_enabled:
+        try:
+            await warm_up(async_engine, settings.db_interactive_pool_size)
+        except Exception as e:
+            logger.warning("Connection pool warm-up failed", error=str(e))
+    
+    # Probe DB / pool / event loop in the background for /health
+    await health_monitor.start()
+    
+    # Route reads to the replica while its replication lag is acceptable
+    await replica_router.start()
+    
+    # Sync rate limit counters with the other workers
+    if isinstance(rate_limiter, SharedRateLimiter):
+        await rate_limiter.start()
+    
+    # Prime the WebSocket snapshot cache once; live events keep it current
+    try:
+        async with AsyncSessionLocal() as session:
+            ws_manager.latest.seed(await SensorService(session).get_latest_readings())
+    except Exception as e:
+        logger.warning("Could not prime latest readings cache", error=str(e))
+    
+    # Forward ingester NOTIFY events to WebSocket clients
+    await reading_listener.start()
+    
     yield
     
     # Shutdown
     logger.info("SensorPulse API shutting down")
     
+    await health_monitor.stop()
+    
+    await replica_router.stop()
+    
+    await reading_listener.stop()
+    
+    if isinstance(rate_limiter, SharedRateLimiter):
+        await rate_limiter.stop()
+    
     # Close all WebSocket connections
     await ws_manager.disconnect_all()
     
-    # Dispose database engine
-    await engine.dispose()
+    # Dispose the connection pools
+    for pool_engine in engines.values():
+        await pool_engine.dispose()
     
     logger.info("SensorPulse API shutdown complete")
 
@@ -93,6 +145,7 @@ app = FastAPI(
     
     Connect to `/ws/sensors` for real-time sensor updates.
     Send `{"action": "subscribe", "device": "sensor_name"}` to subscribe.
+    Read-only clients can use the Server-Sent Events stream at `/sse/sensors`.
     """,
     version=settings.version,
     docs_url="/docs" if settings.debug else None,
@@ -116,8 +169,16 @@ app.add_middleware(
     expose_headers=["X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset"],
 )
 
+# Admission Control - sheds expensive requests before they exhaust the pool
+if settings.admission_enabled:
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=admission_controller,
+        long_history_hours=settings.admission_long_history_hours,
+    )
+
 # Rate Limiting Middleware
-app.add_middleware(RateLimitMiddleware, requests_per_minute=settings.rate_limit_per_minute)
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
 
 
 # ================================
@@ -152,6 +213,7 @@ app.include_router(sensors.router)
 app.include_router(auth.router)
 app.include_router(reports.router)
 app.include_router(websocket.router)
+app.include_router(sse.router)
 
 
 # ================================
@@ -163,23 +225,35 @@ async def health_check():
     """
     Health check endpoint for container orchestration.
     
-    Returns basic health status and version information.
+    Returns the last state recorded by the background health monitor
+    (database, pool saturation, event-loop lag) without touching the DB.
     """
-    db_status = "unknown"
+    return health_monitor.snapshot()
+
+
+@app.get("/health/live", tags=["health"])
+async def liveness():
+    """
+    Liveness probe.
     
-    try:
-        from db import test_connection
-        await test_connection()
-        db_status = "connected"
-    except Exception:
-        db_status = "disconnected"
+    Answers as long as the event loop is serving requests.
+    """
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", tags=["health"])
+async def readiness():
+    """
+    Readiness probe.
     
-    return {
-        "status": "healthy" if db_status == "connected" else "degraded",
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "version": settings.version,
-        "database": db_status,
-    }
+    Returns 503 while the database is unreachable, the pool is saturated
+    or the event loop is lagging.
+    """
+    snapshot = health_monitor.snapshot()
+    return JSONResponse(
+        status_code=200 if health_monitor.is_ready() else 503,
+        content=snapshot,
+    )
 
 
 @app.get("/", include_in_schema=False)
@@ -193,6 +267,72 @@ async def root():
     }
 
 
+@app.get("/api/admin/hot-tier", tags=["admin"])
+async def hot_tier_stats():
+    """
+    In-memory history hot tier statistics.
+    
+    Hit rate is per worker: requests the tier couldn't fully cover went
+    to the database.
+    """
+    return hot_tier.get_stats()
+
+
+@app.get("/api/admin/single-flight", tags=["admin"])
+async def single_flight_stats():
+    """
+    Query coalescing statistics.
+    
+    coalescing_ratio is the share of sensor queries (per worker) answered
+    by another caller's in-flight execution.
+    """
+    return query_flights.get_stats()
+
+
+@app.get("/api/admin/admission", tags=["admin"])
+async def admission_stats():
+    """
+    Admission control statistics.
+    
+    Queue depth, in-flight requests and shed counts per route class
+    (per worker).
+    """
+    return admission_controller.get_stats()
+
+
+@app.get("/api/admin/pools", tags=["admin"])
+async def pool_stats():
+    """
+    Database connection pool usage.
+    
+    One pool per workload: interactive (API requests), reporting
+    (report generation) and maintenance (cleanup).
+    """
+    return {**get_pool_stats(), "statements": get_statement_stats()}
+
+
+@app.get("/api/admin/queries", tags=["admin"])
+async def query_stats():
+    """
+    Guarded query outcomes per endpoint.
+    
+    cancelled counts queries stopped because the client disconnected,
+    timed_out those that hit their endpoint deadline.
+    """
+    return query_guard.get_stats()
+
+
+@app.get("/api/admin/replica", tags=["admin"])
+async def replica_stats():
+    """
+    Read replica lag and routing statistics.
+    
+    fallbacks counts read sessions sent to the primary because the
+    replica was lagging or unreachable.
+    """
+    return replica_router.get_stats()
+
+
 @app.post("/api/admin/cleanup", tags=["admin"])
 async def trigger_cleanup(days: int = 30):
     """
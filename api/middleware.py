@@ -2,26 +2,58 @@
 # SensorPulse API - Rate Limiting Middleware
 # ================================
 
+import asyncio
 import time
-from typing import Dict, Tuple
-from collections import defaultdict
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+import structlog
 from fastapi import Request, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from config import settings
+from ratelimit_store import PostgresCounterStore, SharedMemoryCounterStore
+
+logger = structlog.get_logger(__name__)
+
+
+class _Window:
+    """Sliding-window counter state for one client key."""
+    
+    __slots__ = ("start", "current", "previous")
+    
+    def __init__(self, start: float):
+        self.start = start
+        self.current = 0
+        self.previous = 0
 
 
 class RateLimiter:
     """
-    Simple in-memory rate limiter using sliding window.
+    In-memory rate limiter using a sliding-window counter.
+    
+    Each client key keeps the request count of the current and previous
+    fixed window; the previous count is weighted by how much of it still
+    overlaps the sliding window. Checks are O(1) with constant memory per
+    key. Keys are kept in LRU order so idle keys are evicted cheaply, and
+    at most `max_keys` keys are tracked.
     
     For production, consider using Redis-based rate limiting.
     """
     
-    def __init__(self, requests_per_minute: int = 100):
+    def __init__(
+        self,
+        requests_per_minute: int = 100,
+        max_keys: int = 100_000,
+        window_size: int = 60,
+    ):
         self.requests_per_minute = requests_per_minute
-        self.window_size = 60  # seconds
-        self._requests: Dict[str, list] = defaultdict(list)
+        self.window_size = window_size  # seconds
+        self.max_keys = max_keys
+        self._windows: "OrderedDict[str, _Window]" = OrderedDict()
+        self.evicted_keys = 0
     
     def _get_client_key(self, request: Request) -> str:
         """Get unique key for the client (IP or user ID)."""
@@ -38,29 +70,67 @@ class RateLimiter:
         client_host = request.client.host if request.client else "unknown"
         return f"ip:{client_host}"
     
-    def _cleanup_old_requests(self, key: str, now: float):
-        """Remove requests outside the sliding window."""
-        cutoff = now - self.window_size
-        self._requests[key] = [
-            t for t in self._requests[key] if t > cutoff
-        ]
+    def _evict_idle(self, window_start: float):
+        """Drop least recently used keys whose counts no longer matter."""
+        cutoff = window_start - self.window_size
+        while self._windows:
+            key, entry = next(iter(self._windows.items()))
+            if entry.start >= cutoff:
+                break
+            del self._windows[key]
+            self.evicted_keys += 1
     
-    def is_allowed(self, request: Request) -> Tuple[bool, Dict]:
+    def _get_window(self, key: str, window_start: float) -> _Window:
+        """Get (or create) the counter for a key, rolled to the current window."""
+        entry = self._windows.get(key)
+        
+        if entry is None:
+            self._evict_idle(window_start)
+            if len(self._windows) >= self.max_keys:
+                self._windows.popitem(last=False)
+                self.evicted_keys += 1
+            entry = _Window(window_start)
+            self._windows[key] = entry
+            return entry
+        
+        self._windows.move_to_end(key)
+        
+        if entry.start != window_start:
+            # Previous window only counts if it is the adjacent one
+            adjacent = window_start - entry.start == self.window_size
+            entry.previous = entry.current if adjacent else 0
+            entry.current = 0
+            entry.start = window_start
+        
+        return entry
+    
+    def _get_counts(self, key: str, window_start: float) -> Tuple[int, int]:
+        """Get the (previous, current) window counts for a key."""
+        entry = self._get_window(key, window_start)
+        return entry.previous, entry.current
+    
+    def _record(self, key: str, window_start: float):
+        """Count an allowed request in the current window."""
+        self._windows[key].current += 1
+    
+    def check(self, key: str, now: Optional[float] = None) -> Tuple[bool, Dict]:
         """
-        Check if request is allowed under rate limit.
+        Count a request for a client key.
         
         Returns (allowed, headers) where headers contains rate limit info.
         """
-        key = self._get_client_key(request)
-        now = time.time()
+        if now is None:
+            now = time.time()
         
-        # Cleanup old requests
-        self._cleanup_old_requests(key, now)
+        window_start = now - (now % self.window_size)
+        previous, current = self._get_counts(key, window_start)
         
-        # Check rate limit
-        request_count = len(self._requests[key])
-        remaining = max(0, self.requests_per_minute - request_count)
-        reset_time = int(now + self.window_size)
+        # Weight the previous window by its overlap with the sliding window
+        overlap = 1.0 - (now - window_start) / self.window_size
+        estimate = previous * overlap + current
+        
+        remaining = max(0, self.requests_per_minute - int(estimate))
+        reset_time = int(window_start + self.window_size)
         
         headers = {
             "X-RateLimit-Limit": str(self.requests_per_minute),
@@ -68,57 +138,278 @@ class RateLimiter:
             "X-RateLimit-Reset": str(reset_time),
         }
         
-        if request_count >= self.requests_per_minute:
-            headers["Retry-After"] = str(self.window_size)
+        if estimate >= self.requests_per_minute:
+            headers["Retry-After"] = str(max(1, reset_time - int(now)))
             return False, headers
         
         # Record this request
-        self._requests[key].append(now)
-        headers["X-RateLimit-Remaining"] = str(remaining - 1)
+        self._record(key, window_start)
+        headers["X-RateLimit-Remaining"] = str(max(0, remaining - 1))
         
         return True, headers
+    
+    def is_allowed(self, request: Request) -> Tuple[bool, Dict]:
+        """
+        Check if request is allowed under rate limit.
+        
+        Returns (allowed, headers) where headers contains rate limit info.
+        """
+        return self.check(self._get_client_key(request))
+    
+    def get_tracked_keys(self) -> int:
+        """Get number of client keys currently tracked."""
+        return len(self._windows)
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """FastAPI middleware for rate limiting."""
+class SharedRateLimiter(RateLimiter):
+    """
+    Sliding-window counter limiter whose counts are shared across workers.
+    
+    Allowed requests are counted locally as pending deltas; a background
+    task pushes them to the shared store every `sync_interval` seconds and
+    pulls back the global totals for the keys checked since the previous
+    sync. Checks never touch the store, so enforcement lags other workers
+    by one sync interval for keys this worker sees steadily: a key can
+    overshoot its limit by the requests other workers admitted for it
+    since the last sync. A key that comes back after a quiet spell is
+    checked against the totals from when it was last seen, for one
+    interval.
     
-    def __init__(self, app, requests_per_minute: int = 100):
-        super().__init__(app)
-        self.limiter = RateLimiter(requests_per_minute)
+    If the store is unavailable, deltas are kept and retried and each
+    worker keeps enforcing the limit on what it knows (fail open).
+    """
+    
+    def __init__(
+        self,
+        store,
+        requests_per_minute: int = 100,
+        max_keys: int = 100_000,
+        window_size: int = 60,
+        sync_interval: float = 0.5,
+    ):
+        super().__init__(requests_per_minute, max_keys=max_keys, window_size=window_size)
+        self.store = store
+        self.sync_interval = sync_interval
+        
+        # Counts keyed by (client key, window start)
+        self._shared: Dict[Tuple[str, int], int] = {}    # last synced totals
+        self._pending: Dict[Tuple[str, int], int] = {}   # not yet pushed
+        self._inflight: Dict[Tuple[str, int], int] = {}  # being pushed
+        # Active client keys -> last window they were seen in (LRU order)
+        self._active: "OrderedDict[str, int]" = OrderedDict()
+        # Keys checked since the last sync, whose totals it refreshes
+        self._touched: Set[str] = set()
+        self._shared_min_window = 0
+        
+        self.syncs = 0
+        self.sync_errors = 0
+        self._task: Optional[asyncio.Task] = None
+    
+    def _count(self, slot: Tuple[str, int]) -> int:
+        return (
+            self._shared.get(slot, 0)
+            + self._inflight.get(slot, 0)
+            + self._pending.get(slot, 0)
+        )
+    
+    def _get_counts(self, key: str, window_start: float) -> Tuple[int, int]:
+        window = int(window_start)
+        
+        self._active[key] = window
+        self._active.move_to_end(key)
+        self._touched.add(key)
+        if len(self._active) > self.max_keys:
+            self._active.popitem(last=False)
+            self.evicted_keys += 1
+        
+        return (
+            self._count((key, window - self.window_size)),
+            self._count((key, window)),
+        )
+    
+    def _record(self, key: str, window_start: float):
+        slot = (key, int(window_start))
+        self._pending[slot] = self._pending.get(slot, 0) + 1
+    
+    async def sync(self, now: Optional[float] = None):
+        """Push pending deltas and refresh shared totals for recently checked keys."""
+        if now is None:
+            now = time.time()
+        
+        window = int(now - (now % self.window_size))
+        min_window = window - self.window_size
+        
+        # Forget keys idle for more than a full window
+        while self._active:
+            key, last_window = next(iter(self._active.items()))
+            if last_window >= min_window:
+                break
+            del self._active[key]
+        
+        touched, self._touched = self._touched, set()
+        watch = [
+            (key, w)
+            for key in touched
+            for w in (min_window, window)
+        ]
+        
+        self._inflight, self._pending = self._pending, {}
+        try:
+            totals = await self.store.apply(self._inflight, watch, min_window)
+        except Exception:
+            # Keep the deltas and keys for the next attempt
+            for slot, delta in self._inflight.items():
+                self._pending[slot] = self._pending.get(slot, 0) + delta
+            self._inflight = {}
+            self._touched |= touched
+            self.sync_errors += 1
+            raise
+        
+        # Totals of untouched keys are kept until their window expires
+        if min_window > self._shared_min_window:
+            self._shared = {slot: count for slot, count in self._shared.items() if slot[1] >= min_window}
+            self._shared_min_window = min_window
+        self._shared.update(
+            (slot, count) for slot, count in totals.items() if slot[1] >= min_window
+        )
+        self._inflight = {}
+        self.syncs += 1
+    
+    async def _run(self):
+        """Background loop: sync every interval."""
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except Exception:
+                logger.exception("Rate limit sync failed")
+    
+    async def start(self):
+        """Start the background sync loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop syncing and push any remaining deltas."""
+        if self._task is None:
+            return
+        
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        
+        try:
+            await self.sync()
+        except Exception:
+            logger.exception("Final rate limit sync failed")
+        self.store.close()
+    
+    def get_tracked_keys(self) -> int:
+        return len(self._active)
+    
+    def get_stats(self) -> Dict:
+        """Return sync statistics."""
+        return {
+            "backend": type(self.store).__name__,
+            "tracked_keys": len(self._active),
+            "pending_slots": len(self._pending),
+            "syncs": self.syncs,
+            "sync_errors": self.sync_errors,
+        }
+
+
+def create_rate_limiter() -> RateLimiter:
+    """Build the rate limiter for the configured backend."""
+    backend = settings.rate_limit_backend
+    
+    if backend == "memory":
+        return RateLimiter(
+            settings.rate_limit_per_minute,
+            max_keys=settings.rate_limit_max_keys,
+        )
+    
+    if backend == "shm":
+        store = SharedMemoryCounterStore(
+            settings.rate_limit_shm_name,
+            slots=settings.rate_limit_shm_slots,
+        )
+    elif backend == "postgres":
+        from db import async_engine
+        store = PostgresCounterStore(async_engine)
+    else:
+        raise ValueError(f"Unknown rate limit backend: {backend}")
+    
+    return SharedRateLimiter(
+        store,
+        settings.rate_limit_per_minute,
+        max_keys=settings.rate_limit_max_keys,
+        sync_interval=settings.rate_limit_sync_interval,
+    )
+
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI middleware for rate limiting.
+    
+    Runs the limiter check before the app and injects the X-RateLimit-*
+    headers into the response start message, without wrapping the request
+    in extra tasks or buffering the response body.
+    """
+    
+    def __init__(
+        self,
+        app: ASGIApp,
+        requests_per_minute: int = 100,
+        limiter: Optional[RateLimiter] = None,
+    ):
+        self.app = app
+        self.limiter = limiter or RateLimiter(
+            requests_per_minute,
+            max_keys=settings.rate_limit_max_keys,
+        )
         
         # Paths to exclude from rate limiting
         self.excluded_paths = {
             "/health",
+            "/health/live",
+            "/health/ready",
             "/docs",
             "/redoc",
             "/openapi.json",
             "/ws/sensors",  # WebSockets handle their own limits
         }
     
-    async def dispatch(self, request: Request, call_next):
-        # Skip rate limiting for excluded paths
-        if request.url.path in self.excluded_paths:
-            return await call_next(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        # Only plain HTTP requests are rate limited
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
         
         # Check rate limit
-        allowed, headers = self.limiter.is_allowed(request)
+        allowed, headers = self.limiter.is_allowed(Request(scope))
         
         if not allowed:
-            from fastapi.responses import JSONResponse
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 content={"detail": "Rate limit exceeded. Try again later."},
                 headers=headers,
             )
+            await response(scope, receive, send)
+            return
         
-        # Process request and add rate limit headers to response
-        response = await call_next(request)
-        
-        for key, value in headers.items():
-            response.headers[key] = value
+        async def send_with_headers(message: Message):
+            # Add rate limit headers as the response starts
+            if message["type"] == "http.response.start":
+                response_headers = MutableHeaders(scope=message)
+                for key, value in headers.items():
+                    response_headers[key] = value
+            await send(message)
         
-        return response
+        await self.app(scope, receive, send_with_headers)
 
 
-# Global rate limiter instance
-rate_limiter = RateLimiter(settings.rate_limit_per_minute)
+# Global rate limiter instance (shared across workers unless backend is "memory")
+rate_limiter = create_rate_limiter()
@@ -0,0 +1,132 @@
+# ================================
+# SensorPulse API - Principal Cache
+# ================================
+#
+# Short-lived cache of authenticated users keyed by bearer token, so the
+# auth dependency can skip JWT verification and the users lookup on the
+# hot path. Entries are invalidated whenever a user row is modified: at
+# once in the worker making the change, and in every other worker when the
+# users table trigger's NOTIFY reaches its live listener (live.py), which
+# also covers allow-list changes made directly in SQL. Without that
+# listener (it is down, or not on PostgreSQL), another worker can keep
+# serving a changed or revoked user for up to principal_cache_ttl_seconds.
+
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Set, Tuple
+
+from config import settings
+
+
+class PrincipalCache:
+    """
+    Bounded LRU + TTL cache mapping access tokens to User objects.
+
+    An entry expires after `ttl_seconds` or when its token expires,
+    whichever comes first. When full, the least recently used token
+    is evicted.
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0, max_size: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._tokens_by_user: Dict[str, Set[str]] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, token: str) -> Optional[Any]:
+        """Return the cached user for a token, or None on miss/expiry."""
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, user = entry
+        if time.monotonic() >= expires_at:
+            self._remove(token)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return user
+
+    def put(self, token: str, user: Any, token_expires: Optional[datetime] = None):
+        """Cache a user for a token, bounded by the token's own expiry."""
+        if self.ttl_seconds <= 0 or self.max_size <= 0:
+            return
+
+        ttl = self.ttl_seconds
+        if token_expires is not None:
+            ttl = min(ttl, token_expires.timestamp() - time.time())
+            if ttl <= 0:
+                return
+
+        if token in self._entries:
+            self._remove(token)
+
+        while len(self._entries) >= self.max_size:
+            oldest, _ = next(iter(self._entries.items()))
+            self._remove(oldest)
+            self.evictions += 1
+
+        user_id = str(user.id)
+        self._entries[token] = (time.monotonic() + ttl, user)
+        self._tokens_by_user.setdefault(user_id, set()).add(token)
+
+    def invalidate_user(self, user_id: Any):
+        """Drop every cached token belonging to a user."""
+        tokens = self._tokens_by_user.pop(str(user_id), None)
+        if not tokens:
+            return
+
+        for token in tokens:
+            self._entries.pop(token, None)
+        self.invalidations += 1
+
+    def clear(self):
+        """Drop all cached principals."""
+        self._entries.clear()
+        self._tokens_by_user.clear()
+
+    def _remove(self, token: str):
+        """Remove a token and its reverse-index entry."""
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+
+        user_id = str(entry[1].id)
+        tokens = self._tokens_by_user.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user_id]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+# Global principal cache instance
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.principal_cache_ttl_seconds,
+    max_size=settings.principal_cache_max_size,
+)
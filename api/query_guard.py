@@ -0,0 +1,171 @@
+# ================================
+# SensorPulse API - Query Deadlines and Disconnect Cancellation
+# ================================
+#
+# Expensive endpoints (device history, report generation) run their
+# database work through `query_guard.run()`, which
+#
+# - bounds it by a per-endpoint deadline, also applied on the server as
+#   `SET LOCAL statement_timeout` (PostgreSQL) when the session first
+#   reaches the database, and
+# - cancels it as soon as the HTTP client disconnects.
+#
+# Cancelling the task running an asyncpg query makes asyncpg send a
+# cancel request to the server, so the query stops there too instead of
+# running to completion for nobody.
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+import structlog
+from fastapi import HTTPException, Request, status
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+logger = structlog.get_logger(__name__)
+
+T = TypeVar("T")
+
+# SQLSTATE for query_canceled (statement_timeout)
+QUERY_CANCELED = "57014"
+
+# nginx's "client closed request"; only ever seen in logs
+CLIENT_CLOSED_REQUEST = 499
+
+
+def _is_statement_timeout(exc: DBAPIError) -> bool:
+    orig = exc.orig
+    sqlstate = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+    return sqlstate == QUERY_CANCELED
+
+
+async def _wait_for_disconnect(request: Request):
+    """Return once the client has gone away."""
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def set_statement_timeout(session: AsyncSession, timeout_ms: int):
+    """
+    Bound statements in the session's current transaction (PostgreSQL only).
+
+    A session that hasn't begun a transaction yet gets the timeout when it
+    does (see _apply_pending_statement_timeout), so work that never reaches
+    the database, like a single-flight follower, doesn't check out a
+    connection for it.
+    """
+    if session.bind is None or session.bind.dialect.name != "postgresql":
+        return
+    if not session.in_transaction():
+        session.info["pending_statement_timeout"] = timeout_ms
+        return
+    transaction = session.sync_session.get_transaction()
+    if session.info.get("statement_timeout") == (id(transaction), timeout_ms):
+        return
+    await session.execute(text(f"SET LOCAL statement_timeout = {int(timeout_ms)}"))
+    session.info["statement_timeout"] = (id(transaction), timeout_ms)
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_pending_statement_timeout(session, transaction, connection):
+    timeout_ms = session.info.pop("pending_statement_timeout", None)
+    if timeout_ms is None:
+        return
+    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+    session.info["statement_timeout"] = (id(session.get_transaction()), timeout_ms)
+
+
+class QueryGuard:
+    """
+    Runs endpoint database work under a deadline, cancelling it when the
+    client disconnects. Counts outcomes per endpoint.
+    """
+
+    def __init__(self):
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, endpoint: str, outcome: str):
+        counts = self._stats.setdefault(endpoint, {"completed": 0, "cancelled": 0, "timed_out": 0})
+        counts[outcome] += 1
+
+    async def run(
+        self,
+        request: Request,
+        session: AsyncSession,
+        endpoint: str,
+        timeout_ms: int,
+        fn: Callable[[], Awaitable[T]],
+    ) -> T:
+        """
+        Await fn() under a deadline of timeout_ms.
+
+        Raises HTTPException 503 when the deadline (or the server-side
+        statement timeout) is hit, and 499 when the client disconnected.
+        """
+        await set_statement_timeout(session, timeout_ms)
+
+        query = asyncio.ensure_future(fn())
+        disconnect = asyncio.ensure_future(_wait_for_disconnect(request))
+        try:
+            done, _ = await asyncio.wait(
+                {query, disconnect},
+                timeout=timeout_ms / 1000,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        except asyncio.CancelledError:
+            query.cancel()
+            disconnect.cancel()
+            raise
+
+        disconnect.cancel()
+        if query in done:
+            try:
+                result = query.result()
+            except DBAPIError as e:
+                if not _is_statement_timeout(e):
+                    raise
+                return self._timed_out(endpoint, timeout_ms)
+            self._count(endpoint, "completed")
+            return result
+
+        # Wait for the cancellation to reach the driver before the session
+        # is closed
+        query.cancel()
+        try:
+            await query
+        except (asyncio.CancelledError, Exception):
+            pass
+
+        if disconnect in done:
+            self._count(endpoint, "cancelled")
+            logger.info("Query cancelled, client disconnected", endpoint=endpoint)
+            raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+
+        return self._timed_out(endpoint, timeout_ms)
+
+    def _timed_out(self, endpoint: str, timeout_ms: int):
+        self._count(endpoint, "timed_out")
+        logger.warning("Query timed out", endpoint=endpoint, timeout_ms=timeout_ms)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Query timed out. Try a shorter time range.",
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return completed, cancelled and timed-out query counts per endpoint."""
+        totals = {"completed": 0, "cancelled": 0, "timed_out": 0}
+        for counts in self._stats.values():
+            for outcome, count in counts.items():
+                totals[outcome] += count
+        return {
+            **totals,
+            "endpoints": {name: dict(counts) for name, counts in self._stats.items()},
+        }
+
+
+# Global query guard
+query_guard = QueryGuard()
@@ -0,0 +1,223 @@
+# ================================
+# SensorPulse API - Shared Rate Limit Stores
+# ================================
+#
+# Counter stores that let several API worker processes enforce one rate
+# limit together. Workers batch their increments and push them with
+# `apply()`, which atomically adds the deltas and returns the resulting
+# totals for every watched (key, window_start) slot.
+#
+# Backends:
+#   - SharedMemoryCounterStore: fixed-size hash table in a shared memory
+#     segment, guarded by an flock. Workers on one host. The locked update
+#     runs in the default executor so waiting for the lock never blocks
+#     the event loop.
+#   - PostgresCounterStore: UNLOGGED table upserted with ON CONFLICT.
+#     Workers across hosts (see migration 003_rate_limit_counters).
+
+import asyncio
+import fcntl
+import hashlib
+import os
+import struct
+import tempfile
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+# (client key, window start in epoch seconds)
+Slot = Tuple[str, int]
+
+# Shared memory slot: key hash, window start, count
+_SLOT = struct.Struct("<QqQ")
+
+
+def _key_hash(key: str) -> int:
+    """Stable, non-zero 64-bit hash of a client key (0 marks an empty slot)."""
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+class SharedMemoryCounterStore:
+    """
+    Open-addressing hash table of counters in a named shared memory segment.
+
+    Each slot holds (key hash, window start, count). Slots whose window is
+    older than the previous window are reused in place, so the table never
+    needs to be cleared. The segment outlives individual workers and is
+    reused by name on restart.
+    """
+
+    def __init__(self, name: str, slots: int = 65536, max_probe: int = 32):
+        self.name = name
+        self.slots = slots
+        self.max_probe = max_probe
+        self.dropped = 0  # increments lost because the table was full
+
+        size = slots * _SLOT.size
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            self._shm = shared_memory.SharedMemory(name=name)
+            if self._shm.size < size:
+                self._shm.close()
+                raise ValueError(
+                    f"Shared memory segment {name!r} is smaller than "
+                    f"{slots} slots; remove it or change the name"
+                )
+
+        # The segment is shared by all workers; don't let the resource
+        # tracker unlink it when this process exits.
+        resource_tracker.unregister(self._shm._name, "shared_memory")
+
+        lock_path = os.path.join(tempfile.gettempdir(), f"{name}.lock")
+        self._lock_fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+
+    def _find(self, key_hash: int, window_start: int, min_window: int, create: bool) -> Optional[int]:
+        """Return the byte offset of a slot, optionally claiming a free one."""
+        buf = self._shm.buf
+        start = (key_hash + window_start * 0x9E3779B1) % self.slots
+        free = None
+
+        for i in range(self.max_probe):
+            offset = ((start + i) % self.slots) * _SLOT.size
+            slot_hash, slot_window, _ = _SLOT.unpack_from(buf, offset)
+
+            if slot_hash == key_hash and slot_window == window_start:
+                return offset
+            if slot_hash == 0:
+                # End of the probe chain
+                if free is None:
+                    free = offset
+                break
+            if slot_window < min_window and free is None:
+                free = offset
+
+        if create and free is not None:
+            _SLOT.pack_into(buf, free, key_hash, window_start, 0)
+            return free
+        return None
+
+    async def apply(
+        self,
+        deltas: Dict[Slot, int],
+        watch: Iterable[Slot],
+        min_window: int,
+    ) -> Dict[Slot, int]:
+        """Add deltas and return current totals for the deltas and watched slots."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._apply, dict(deltas), list(watch), min_window)
+
+    def _apply(self, deltas: Dict[Slot, int], watch: List[Slot], min_window: int) -> Dict[Slot, int]:
+        buf = self._shm.buf
+        totals: Dict[Slot, int] = {}
+
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            for (key, window_start), delta in deltas.items():
+                offset = self._find(_key_hash(key), window_start, min_window, create=True)
+                if offset is None:
+                    self.dropped += delta
+                    continue
+                slot_hash, slot_window, count = _SLOT.unpack_from(buf, offset)
+                count += delta
+                _SLOT.pack_into(buf, offset, slot_hash, slot_window, count)
+                totals[(key, window_start)] = count
+
+            for slot in watch:
+                if slot in totals:
+                    continue
+                key, window_start = slot
+                offset = self._find(_key_hash(key), window_start, min_window, create=False)
+                if offset is not None:
+                    totals[slot] = _SLOT.unpack_from(buf, offset)[2]
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+        return totals
+
+    def close(self):
+        """Detach from the segment (it is left in place for other workers)."""
+        self._shm.close()
+        os.close(self._lock_fd)
+
+    def unlink(self):
+        """Remove the segment entirely."""
+        # unlink() unregisters from the resource tracker; undo the earlier unregister
+        resource_tracker.register(self._shm._name, "shared_memory")
+        self._shm.unlink()
+
+
+_UPSERT = text("""
+    INSERT INTO rate_limit_counters (key, window_start, count)
+    SELECT * FROM unnest(
+        CAST(:keys AS text[]),
+        CAST(:windows AS bigint[]),
+        CAST(:counts AS bigint[])
+    )
+    ON CONFLICT (key, window_start)
+    DO UPDATE SET count = rate_limit_counters.count + EXCLUDED.count
+    RETURNING key, window_start, count
+""")
+
+_SELECT = text("""
+    SELECT c.key, c.window_start, c.count
+    FROM rate_limit_counters c
+    JOIN unnest(CAST(:keys AS text[]), CAST(:windows AS bigint[])) AS w(key, window_start)
+      ON c.key = w.key AND c.window_start = w.window_start
+""")
+
+_PRUNE = text("DELETE FROM rate_limit_counters WHERE window_start < :min_window")
+
+
+class PostgresCounterStore:
+    """
+    Counters in the UNLOGGED rate_limit_counters table.
+
+    One transaction per sync: an upsert of all deltas (sorted by key so
+    concurrent workers lock rows in the same order) and a select of the
+    remaining watched slots. Expired windows are deleted once per window.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._pruned_before = 0
+
+    async def apply(
+        self,
+        deltas: Dict[Slot, int],
+        watch: Iterable[Slot],
+        min_window: int,
+    ) -> Dict[Slot, int]:
+        """Add deltas and return current totals for the deltas and watched slots."""
+        totals: Dict[Slot, int] = {}
+
+        async with self.engine.begin() as conn:
+            if deltas:
+                items = sorted(deltas.items())
+                result = await conn.execute(_UPSERT, {
+                    "keys": [key for (key, _), _ in items],
+                    "windows": [window for (_, window), _ in items],
+                    "counts": [delta for _, delta in items],
+                })
+                for row in result:
+                    totals[(row.key, row.window_start)] = row.count
+
+            missing = [slot for slot in watch if slot not in totals]
+            if missing:
+                result = await conn.execute(_SELECT, {
+                    "keys": [key for key, _ in missing],
+                    "windows": [window for _, window in missing],
+                })
+                for row in result:
+                    totals[(row.key, row.window_start)] = row.count
+
+            if min_window > self._pruned_before:
+                await conn.execute(_PRUNE, {"min_window": min_window})
+                self._pruned_before = min_window
+
+        return totals
+
+    def close(self):
+        """Nothing to release; the engine is owned by the db module."""
@@ -0,0 +1,132 @@
+# ================================
+# SensorPulse API - Fast Responses
+# ================================
+#
+# orjson-encoded JSON responses with negotiated gzip/brotli compression.
+# Used for large, trusted service output (history, latest, devices) where
+# re-validating through the response_model and the default JSON encoder
+# dominates request time.
+
+import gzip
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+import orjson
+from fastapi import Request, Response
+
+from caching import variant_etag
+from config import settings
+
+# Brotli is optional - fall back to gzip when it isn't installed
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on environment
+    brotli = None
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def _default(obj: Any) -> Any:
+    """Encode types orjson doesn't handle natively."""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content to JSON bytes with orjson."""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick a content encoding from an Accept-Encoding header.
+
+    Prefers brotli (when available) over gzip at equal quality.
+    Returns None if the client accepts neither.
+    """
+    if not accept_encoding:
+        return None
+
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    qualities: Dict[str, float] = {}
+
+    for item in accept_encoding.split(","):
+        parts = item.strip().split(";")
+        coding = parts[0].strip().lower()
+        q = 1.0
+        for param in parts[1:]:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[coding] = q
+
+    best = None
+    best_q = 0.0
+    for coding in supported:
+        q = qualities.get(coding, qualities.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a response body with the given content encoding."""
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.brotli_quality)
+    return gzip.compress(body, compresslevel=settings.gzip_level)
+
+
+def encoded_response(
+    request: Request,
+    body: bytes,
+    media_type: str,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """
+    Wrap an already-encoded body, compressing it if the client supports it.
+
+    Bodies smaller than settings.compression_min_size are sent as-is.
+    """
+    encoding = None
+    if len(body) >= settings.compression_min_size:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        if encoding:
+            body = compress(body, encoding)
+
+    response = Response(
+        content=body,
+        status_code=status_code,
+        headers=headers,
+        media_type=media_type,
+    )
+
+    vary = response.headers.get("vary")
+    response.headers["Vary"] = f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+        if "etag" in response.headers:
+            response.headers["ETag"] = variant_etag(response.headers["etag"], encoding)
+
+    return response
+
+
+def fast_json_response(
+    request: Request,
+    content: Any,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None,
+    media_type: str = JSON_MEDIA_TYPE,
+) -> Response:
+    """
+    Build an orjson response, compressed if the client supports it.
+
+    Content is encoded as-is without response_model validation, so it
+    must already match the documented schema.
+    """
+    return encoded_response(request, dumps(content), media_type, status_code, headers)
@@ -1,4 +1,4 @@
 # Routes module
-from . import sensors, auth, websocket, reports
+from . import sensors, auth, websocket, sse, reports
 
-__all__ = ["sensors", "auth", "websocket", "reports"]
+__all__ = ["sensors", "auth", "websocket", "sse", "reports"]
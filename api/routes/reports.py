@@ -4,16 +4,17 @@
 
 from datetime import datetime, timedelta, timezone, time
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 
 from config import settings
-from db import get_db
+from db import get_reporting_read_db
 from db.models import SensorReading, User
 from services import SensorService, UserService
 from schemas import DailyReport, ReportSummary
 from auth import require_user
+from query_guard import query_guard
 
 router = APIRouter(prefix="/api/report", tags=["reports"])
 
@@ -186,7 +187,8 @@ async def send_report_email(user_email: str, report: DailyReport):
 
 @router.get("/preview", response_model=DailyReport)
 async def preview_report(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_reporting_read_db),
     user = Depends(require_user),
 ):
     """
@@ -194,13 +196,17 @@ async def preview_report(
     
     Returns the report data that would be sent in the daily email.
     """
-    report = await generate_report(db)
+    report = await query_guard.run(
+        request, db, "report", settings.report_query_timeout_ms,
+        lambda: generate_report(db),
+    )
     return report
 
 
 @router.get("/preview/html")
 async def preview_report_html(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_reporting_read_db),
     user = Depends(require_user),
 ):
     """
@@ -208,15 +214,19 @@ async def preview_report_html(
     """
     from fastapi.responses import HTMLResponse
     
-    report = await generate_report(db)
+    report = await query_guard.run(
+        request, db, "report", settings.report_query_timeout_ms,
+        lambda: generate_report(db),
+    )
     html = generate_report_html(report)
     return HTMLResponse(content=html)
 
 
 @router.post("/send-now")
 async def send_report_now(
+    request: Request,
     background_tasks: BackgroundTasks,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_reporting_read_db),
     user = Depends(require_user),
 ):
     """
@@ -228,7 +238,10 @@ async def send_report_now(
             detail="Email sending not configured (RESEND_API_KEY not set)",
         )
     
-    report = await generate_report(db)
+    report = await query_guard.run(
+        request, db, "report", settings.report_query_timeout_ms,
+        lambda: generate_report(db),
+    )
     
     # Send in background
     background_tasks.add_task(send_report_email, user.email, report)
@@ -4,35 +4,58 @@
 
 from datetime import datetime, timezone
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from db import get_db
+from config import settings
+from db import get_read_db
 from services import SensorService
 from schemas import DeviceInfo, SensorLatest, SensorHistory, SensorReading
 from auth import get_current_user, require_user
+from caching import make_etag, is_not_modified, not_modified_response, validator_headers
+from responses import fast_json_response, encoded_response
+from hot_tier import hot_tier
+from query_guard import query_guard
+from columnar import (
+    COLUMNAR_JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    choose_format,
+    parse_metrics,
+    to_columnar,
+    pack,
+)
 
 router = APIRouter(prefix="/api", tags=["sensors"])
 
 
 @router.get("/devices", response_model=List[DeviceInfo])
 async def get_devices(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     user = Depends(require_user),
 ):
     """
     Get list of all discovered sensors/devices.
     
     Returns distinct list of topics with their device names and last seen time.
+    Supports conditional GET via ETag / If-None-Match.
     """
     service = SensorService(db)
+    
+    # Validate against the newest reading before running the full query
+    last_time = await service.get_last_reading_time()
+    etag = make_etag("devices", last_time)
+    if is_not_modified(request, etag, last_time):
+        return not_modified_response(etag, last_time)
+    
     devices = await service.get_devices()
-    return devices
+    return fast_json_response(request, devices, headers=validator_headers(etag, last_time))
 
 
 @router.get("/latest", response_model=List[SensorLatest])
 async def get_latest_readings(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     user = Depends(require_user),
 ):
     """
@@ -40,18 +63,32 @@ async def get_latest_readings(
     
     Ideal for populating dashboard cards showing current sensor values.
     Includes minutes since last reading for freshness indication.
+    Supports conditional GET via ETag / If-None-Match.
     """
     service = SensorService(db)
+    
+    # last_seen_minutes ages with the clock, so the validator also
+    # changes once per minute even when no new reading arrived
+    last_time = await service.get_last_reading_time()
+    minute = int(datetime.now(timezone.utc).timestamp() // 60)
+    etag = make_etag("latest", last_time, minute)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag, last_time)
+    
     readings = await service.get_latest_readings()
-    return readings
+    return fast_json_response(request, readings, headers=validator_headers(etag, last_time))
 
 
 @router.get("/history/{device_name}", response_model=SensorHistory)
 async def get_device_history(
+    request: Request,
     device_name: str,
     hours: int = Query(default=24, ge=1, le=168, description="Hours of history (max 168/7 days)"),
     resolution: Optional[str] = Query(default=None, pattern="^(1m|5m|15m|1h)$"),
-    db: AsyncSession = Depends(get_db),
+    format: Optional[str] = Query(default=None, pattern="^(json|columnar|msgpack)$"),
+    metrics: Optional[str] = Query(default=None, description="Columnar metrics, e.g. 'temperature,humidity'"),
+    delta: bool = Query(default=False, description="Delta-encode columnar timestamps"),
+    db: AsyncSession = Depends(get_read_db),
     user = Depends(require_user),
 ):
     """
@@ -63,9 +100,62 @@ async def get_device_history(
     - **device_name**: The device name (e.g., 'living_room_sensor')
     - **hours**: How many hours of history to fetch (default: 24, max: 168)
     - **resolution**: Optional downsampling (1m, 5m, 15m, 1h)
+    - **format**: `json` (default), `columnar` or `msgpack`; can also be
+      selected via `Accept: application/vnd.sensorpulse.columnar+json`
+      or `Accept: application/msgpack`
+    - **metrics**: Columns for the columnar formats (default: temperature,humidity)
+    - **delta**: Delta-encode the columnar timestamp array
+    
+    Windows within the in-memory hot tier (see hot_tier.py) are served
+    without querying the database. Database queries are bounded by
+    `history_query_timeout_ms` and cancelled if the client disconnects.
+    
+    Supports conditional GET via ETag / If-None-Match and If-Modified-Since.
     """
+    fmt = choose_format(format, request.headers.get("accept"))
+    columns = parse_metrics(metrics) if fmt != "json" else []
+    
     service = SensorService(db)
-    history = await service.get_device_history(device_name, hours, resolution)
+    hot = hot_tier.lookup(device_name, hours)
+    
+    # Cheap aggregate over the window; readings sliding out of the window
+    # change first_time/reading_count, new ones change last_time
+    if hot is not None:
+        marker = hot.marker()
+    else:
+        marker = await query_guard.run(
+            request, db, "history", settings.history_query_timeout_ms,
+            lambda: service.get_history_marker(device_name, hours),
+        )
+    if not marker["reading_count"]:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No data found for device: {device_name}",
+        )
+    
+    last_time = marker["last_time"]
+    etag = make_etag(
+        "history",
+        device_name,
+        hours,
+        resolution,
+        marker["first_time"],
+        last_time,
+        marker["reading_count"],
+        fmt,
+        ",".join(columns),
+        delta,
+    )
+    if is_not_modified(request, etag, last_time):
+        return not_modified_response(etag, last_time)
+    
+    if hot is not None:
+        history = hot.history()
+    else:
+        history = await query_guard.run(
+            request, db, "history", settings.history_query_timeout_ms,
+            lambda: service.get_device_history(device_name, hours, resolution),
+        )
     
     if not history["readings"]:
         raise HTTPException(
@@ -73,13 +163,25 @@ async def get_device_history(
             detail=f"No data found for device: {device_name}",
         )
     
-    return history
+    headers = validator_headers(etag, last_time)
+    headers["Vary"] = "Accept"
+    
+    if fmt == "columnar":
+        payload = to_columnar(history, columns, delta)
+        return fast_json_response(request, payload, headers=headers, media_type=COLUMNAR_JSON_MEDIA_TYPE)
+    
+    if fmt == "msgpack":
+        payload = to_columnar(history, columns, delta)
+        return encoded_response(request, pack(payload), MSGPACK_MEDIA_TYPE, headers=headers)
+    
+    # Service output already matches SensorHistory - skip re-validation
+    return fast_json_response(request, history, headers=headers)
 
 
 @router.get("/devices/{device_name}/latest", response_model=SensorReading)
 async def get_device_latest(
     device_name: str,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     user = Depends(require_user),
 ):
     """
@@ -0,0 +1,90 @@
+# ================================
+# SensorPulse API - Server-Sent Events Routes
+# ================================
+
+import asyncio
+import uuid
+from typing import Optional
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import StreamingResponse
+
+from auth import decode_access_token
+from sse import SSETransport, parse_last_event_id
+from websocket import PROTOCOL_BATCH, PROTOCOL_LEGACY, ws_manager
+
+router = APIRouter(tags=["websocket"])
+
+
+@router.get("/sse/sensors")
+async def sse_sensors(
+    request: Request,
+    devices: Optional[str] = Query(default=None),
+    token: Optional[str] = Query(default=None),
+    protocol: int = Query(default=PROTOCOL_LEGACY, ge=PROTOCOL_LEGACY),
+    last_event_id: Optional[str] = Query(default=None),
+):
+    """
+    Server-Sent Events stream of real-time sensor updates.
+
+    Read-only alternative to /ws/sensors for clients and proxies that
+    handle plain HTTP streaming better than WebSockets. Events carry the
+    same JSON messages as the WebSocket, as `data:` lines.
+
+    Query Parameters:
+    - devices: Comma-separated device names, topics or globs (default: all)
+    - token: Optional JWT token for authentication
+    - protocol: 1 (default) for one event per reading, 2 for batched
+      {"type": "readings"} events per tick
+    - last_event_id: Same as the Last-Event-ID header, for clients that
+      can't set headers
+
+    Reading events have `id: <epoch>:<seq>`. Reconnecting with that id in
+    Last-Event-ID replays missed readings (or sends {"type": "gap"});
+    otherwise the stream starts with a {"type": "snapshot"} of the latest
+    readings. Idle streams get `: ping` comments.
+    """
+    client_id = str(uuid.uuid4())
+
+    user_id = None
+    if token:
+        token_data = decode_access_token(token)
+        if token_data:
+            user_id = token_data.user_id
+
+    transport = SSETransport(ws_manager.epoch)
+    await ws_manager.connect(
+        transport,
+        client_id,
+        user_id,
+        protocol=min(protocol, PROTOCOL_BATCH),
+        replies_to_pings=False,
+    )
+
+    names = {name.strip() for name in (devices or "").split(",") if name.strip()}
+    if names:
+        await ws_manager.subscribe(client_id, names)
+
+    resumed = False
+    resume = parse_last_event_id(request.headers.get("last-event-id") or last_event_id)
+    if resume is not None:
+        epoch, seq = resume
+        resumed = ws_manager.resume(client_id, seq, epoch)
+    if not resumed:
+        ws_manager.send_snapshot(client_id, names)
+
+    async def events():
+        try:
+            async for chunk in transport.stream():
+                yield chunk
+        finally:
+            # May run while the response is being cancelled, so don't await
+            asyncio.get_running_loop().create_task(ws_manager.disconnect(client_id))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
@@ -9,7 +9,8 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db import get_db
-from websocket import ws_manager
+from live import reading_listener
+from websocket import PROTOCOL_BATCH, PROTOCOL_LEGACY, ws_manager
 from auth import decode_access_token
 
 router = APIRouter(tags=["websocket"])
@@ -19,6 +20,9 @@ router = APIRouter(tags=["websocket"])
 async def websocket_sensors(
     websocket: WebSocket,
     token: Optional[str] = Query(default=None),
+    protocol: int = Query(default=PROTOCOL_LEGACY, ge=PROTOCOL_LEGACY),
+    resume_from: Optional[int] = Query(default=None, ge=0),
+    epoch: Optional[str] = Query(default=None),
 ):
     """
     WebSocket endpoint for real-time sensor updates.
@@ -27,14 +31,35 @@ async def websocket_sensors(
     
     Query Parameters:
     - token: Optional JWT token for authentication
+    - protocol: 1 (default) for one frame per reading, 2 to receive
+      readings batched per tick as {"type": "readings", "data": [...]}
+    - resume_from, epoch: last "seq" and "epoch" seen before a reconnect;
+      readings missed since then are replayed (for all devices)
     
     Messages from server:
-    - {"type": "connected", "client_id": "...", "timestamp": "..."}
-    - {"type": "reading", "data": {...}, "timestamp": "..."}
+    - {"type": "connected", "client_id": "...", "protocol": 1, "epoch": "...", "seq": 42, "timestamp": "..."}
+    - {"type": "reading", "seq": 43, "data": {...}, "timestamp": "..."}             (protocol 1)
+    - {"type": "readings", "seq": 45, "data": [{...}, ...], "timestamp": "..."}     (protocol 2)
+    - {"type": "snapshot", "seq": 45, "data": [{...}, ...], "timestamp": "..."}
+      (latest reading per subscribed device, sent after "subscribed")
+    - {"type": "resumed", "from": 40, "seq": 45, "count": 5}
+    - {"type": "gap", "reason": "gap_too_large", "epoch": "...", "seq": 45}
+      (missed readings are no longer available; reload history instead)
     - {"type": "ping"}
+      (sent after WS_HEARTBEAT_INTERVAL seconds without a client message;
+      the connection is closed if nothing arrives within WS_HEARTBEAT_TIMEOUT)
+    - {"type": "error", "message": "..."}
     
     Messages to server:
     - {"type": "subscribe", "devices": ["device1", "device2"]}
+      (names may be device names, topics or globs such as "living_*")
+    - {"type": "subscribe", "devices": [...], "max_rate": 0.2, "fields": ["temperature"]}
+      (at most max_rate updates/second per device, latest value wins; only
+      the listed fields plus time/topic/device_name. With no devices the
+      options apply to everything the client receives)
+    - {"type": "subscribe", "devices": [...], "resume_from": 40, "epoch": "..."}
+      (subscribe, then replay missed readings for these subscriptions
+      instead of sending a snapshot; "snapshot": false skips the snapshot)
     - {"type": "unsubscribe", "devices": ["device1"]}
     - {"type": "pong"}
     """
@@ -49,38 +74,69 @@ async def websocket_sensors(
             user_id = token_data.user_id
     
     # Accept connection
-    await ws_manager.connect(websocket, client_id, user_id)
+    await ws_manager.connect(
+        websocket,
+        client_id,
+        user_id,
+        protocol=min(protocol, PROTOCOL_BATCH),
+    )
+    
+    if resume_from is not None:
+        ws_manager.resume(client_id, resume_from, epoch)
     
     try:
         while True:
             # Wait for messages from client
             data = await websocket.receive_json()
+            ws_manager.mark_alive(client_id)
             
             msg_type = data.get("type", "")
             
             if msg_type == "subscribe":
                 devices = set(data.get("devices", []))
-                await ws_manager.subscribe(client_id, devices)
-                await websocket.send_json({
+                try:
+                    options = await ws_manager.subscribe(
+                        client_id,
+                        devices,
+                        max_rate=data.get("max_rate"),
+                        fields=data.get("fields"),
+                    )
+                except ValueError as e:
+                    ws_manager.send_to_client(client_id, {
+                        "type": "error",
+                        "message": str(e),
+                    })
+                    continue
+                
+                message = {
                     "type": "subscribed",
                     "devices": list(devices),
-                })
+                }
+                if options is not None:
+                    message.update(options.to_dict())
+                ws_manager.send_to_client(client_id, message)
+                
+                resumed = False
+                if isinstance(data.get("resume_from"), int):
+                    resumed = ws_manager.resume(client_id, data["resume_from"], data.get("epoch"))
+                if not resumed and data.get("snapshot", True):
+                    ws_manager.send_snapshot(client_id, devices)
             
             elif msg_type == "unsubscribe":
                 devices = set(data.get("devices", []))
                 await ws_manager.unsubscribe(client_id, devices)
-                await websocket.send_json({
+                ws_manager.send_to_client(client_id, {
                     "type": "unsubscribed",
                     "devices": list(devices),
                 })
             
             elif msg_type == "pong":
-                # Client responded to ping
+                # Client responded to ping (recorded by mark_alive)
                 pass
             
             elif msg_type == "ping":
                 # Client requesting ping
-                await websocket.send_json({"type": "pong"})
+                ws_manager.send_to_client(client_id, {"type": "pong"})
     
     except WebSocketDisconnect:
         await ws_manager.disconnect(client_id)
@@ -91,5 +147,13 @@ async def websocket_sensors(
 
 @router.get("/ws/stats")
 async def websocket_stats():
-    """Get WebSocket connection statistics."""
-    return ws_manager.get_stats()
+    """
+    Get WebSocket connection and live pipeline statistics.
+    
+    Client details are for the worker that served the request; "cluster"
+    aggregates connection counts across all API workers.
+    """
+    stats = ws_manager.get_stats()
+    stats["pipeline"] = reading_listener.get_stats()
+    stats["cluster"] = reading_listener.cluster_stats()
+    return stats
@@ -4,18 +4,28 @@
 
 from datetime import datetime, timedelta, timezone
 from typing import List, Optional, Dict, Any
-from sqlalchemy import select, func, text, distinct
+from sqlalchemy import select, func, distinct
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db.models import SensorReading, User
+from db.statements import DEVICE_HISTORY, HISTORY_MARKER, LATEST_READINGS, USER_BY_ID
+from principals import principal_cache
+from singleflight import single_flight
 
 
 class SensorService:
-    """Service for sensor data operations."""
+    """
+    Service for sensor data operations.
+    
+    Read queries are single-flighted: identical concurrent calls share one
+    execution (see singleflight.py), so results must not be mutated. The
+    hot ones use pre-built statements from db/statements.py.
+    """
     
     def __init__(self, db: AsyncSession):
         self.db = db
     
+    @single_flight
     async def get_devices(self) -> List[Dict[str, Any]]:
         """Get list of all discovered devices with their last reading time."""
         query = select(
@@ -43,29 +53,57 @@ class SensorService:
             for row in rows
         ]
     
+    @single_flight
     async def get_latest_readings(self) -> List[Dict[str, Any]]:
         """Get the most recent reading for each device."""
         # Use the latest_readings view
-        query = text("""
-            SELECT 
-                time,
-                topic,
-                device_name,
-                temperature,
-                humidity,
-                battery,
-                linkquality,
-                raw_data,
-                EXTRACT(EPOCH FROM (NOW() - time)) / 60 AS last_seen_minutes
-            FROM latest_readings
-            ORDER BY device_name
-        """)
+        result = await self.db.execute(LATEST_READINGS)
+        rows = result.mappings().all()
+        
+        readings = []
+        for row in rows:
+            reading = dict(row)
+            # EXTRACT returns numeric; the API contract is whole minutes
+            minutes = reading["last_seen_minutes"]
+            reading["last_seen_minutes"] = int(minutes) if minutes is not None else None
+            readings.append(reading)
         
+        return readings
+    
+    @single_flight
+    async def get_last_reading_time(self) -> Optional[datetime]:
+        """Get the time of the newest reading across all devices."""
+        query = select(func.max(SensorReading.time))
         result = await self.db.execute(query)
-        rows = result.mappings().all()
+        return result.scalar()
+    
+    @single_flight
+    async def get_history_marker(
+        self,
+        device_name: str,
+        hours: int = 24,
+    ) -> Dict[str, Any]:
+        """
+        Get cheap change-detection metadata for a device's history window.
+        
+        Returns the first/last reading time and row count without
+        fetching the readings themselves.
+        """
+        since = datetime.now(timezone.utc) - timedelta(hours=hours)
+        
+        result = await self.db.execute(
+            HISTORY_MARKER,
+            {"device_name": device_name, "since": since},
+        )
+        row = result.one()
         
-        return [dict(row) for row in rows]
+        return {
+            "first_time": row.first_time,
+            "last_time": row.last_time,
+            "reading_count": row.reading_count,
+        }
     
+    @single_flight
     async def get_device_history(
         self,
         device_name: str,
@@ -75,13 +113,10 @@ class SensorService:
         """Get historical readings for a device."""
         since = datetime.now(timezone.utc) - timedelta(hours=hours)
         
-        # Base query
-        query = select(SensorReading).where(
-            SensorReading.device_name == device_name,
-            SensorReading.time >= since,
-        ).order_by(SensorReading.time.asc())
-        
-        result = await self.db.execute(query)
+        result = await self.db.execute(
+            DEVICE_HISTORY,
+            {"device_name": device_name, "since": since},
+        )
         readings = result.scalars().all()
         
         # Calculate summary
@@ -149,8 +184,7 @@ class UserService:
     
     async def get_by_id(self, user_id: str) -> Optional[User]:
         """Get user by ID."""
-        query = select(User).where(User.id == user_id)
-        result = await self.db.execute(query)
+        result = await self.db.execute(USER_BY_ID, {"user_id": user_id})
         return result.scalar_one_or_none()
     
     async def create_or_update(
@@ -170,6 +204,7 @@ class UserService:
                 user.picture = picture
             await self.db.commit()
             await self.db.refresh(user)
+            principal_cache.invalidate_user(user.id)
         else:
             # Create new user
             user = User(
@@ -203,6 +238,7 @@ class UserService:
         
         await self.db.commit()
         await self.db.refresh(user)
+        principal_cache.invalidate_user(user.id)
         return user
     
     async def get_users_for_report(self, target_time: Any) -> List[User]:
@@ -0,0 +1,104 @@
+# ================================
+# SensorPulse API - Single-Flight Query Coalescing
+# ================================
+#
+# Concurrent callers asking for the same thing (the morning dashboard rush
+# of identical /api/latest and /api/history requests) share one execution:
+# the first caller runs the query, the rest await its result.
+#
+# Results are shared objects, so callers must treat them as read-only.
+
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Abandoned(Exception):
+    """The leading caller was cancelled before producing a result."""
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution.
+
+    The first caller runs fn() itself, in its own task and with its own
+    database session; if it is cancelled, waiting followers retry and one
+    of them takes over. Errors are shared like results. Nothing is cached
+    once the flight lands.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn() for key, or wait for the identical call already running."""
+        while key in self._flights:
+            try:
+                result = await asyncio.shield(self._flights[key])
+            except _Abandoned:
+                continue
+            except Exception:
+                self.coalesced += 1
+                raise
+            self.coalesced += 1
+            return result
+
+        future = asyncio.get_running_loop().create_future()
+        self._flights[key] = future
+        self.executions += 1
+
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.set_exception(_Abandoned())
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._flights.get(key) is future:
+                del self._flights[key]
+            # Mark the exception retrieved when nobody was waiting
+            if future.done() and not future.cancelled():
+                future.exception()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return execution counts and the coalescing ratio."""
+        calls = self.executions + self.coalesced
+        return {
+            "in_flight": len(self._flights),
+            "calls": calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "coalescing_ratio": round(self.coalesced / calls, 4) if calls else None,
+        }
+
+
+# Global single-flight group for SensorService queries
+query_flights = SingleFlight()
+
+
+def single_flight(method: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """
+    Coalesce concurrent calls of a service method with equal arguments.
+
+    The key is the method name, the engine the instance's session (`db`)
+    is bound to, and the (hashable) arguments. Callers with different
+    sessions on the same engine share a flight; a read on the replica and
+    one that fell back to the primary don't.
+    """
+    name = method.__qualname__
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        key = (name, id(self.db.get_bind()), args, tuple(sorted(kwargs.items())))
+        return await query_flights.do(key, lambda: method(self, *args, **kwargs))
+
+    return wrapper
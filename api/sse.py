@@ -0,0 +1,93 @@
+# ================================
+# SensorPulse API - Server-Sent Events Transport
+# ================================
+#
+# Lets SSE clients ride the WebSocket fan-out. An SSETransport stands in
+# for the WebSocket in WebSocketManager, so SSE connections share the
+# subscription index, serialize-once frames, per-connection outboxes
+# (backpressure and slow-consumer policy), throttling, snapshots and the
+# replay ring. Nothing here queries the database.
+#
+# Every frame becomes one `data:` line. Frames carrying a sequence number
+# also get `id: <epoch>:<seq>`, which EventSource sends back as
+# Last-Event-ID when it reconnects.
+
+import asyncio
+import re
+from typing import AsyncIterator, Optional, Tuple
+
+from responses import dumps
+from websocket import PING_FRAME
+
+SSE_RETRY_MS = 3000
+
+# Sequenced frames are encoded as {"type": ..., "seq": N, ...}
+_FRAME_SEQ = re.compile(r'\{"type":"[a-z]+","seq":(\d+)')
+
+
+def parse_last_event_id(value: Optional[str]) -> Optional[Tuple[str, int]]:
+    """Split a Last-Event-ID of the form "<epoch>:<seq>"; None if invalid."""
+    if not value:
+        return None
+
+    epoch, _, seq = value.strip().rpartition(":")
+    if not epoch or not seq.isdigit():
+        return None
+    return epoch, int(seq)
+
+
+class SSETransport:
+    """
+    WebSocket stand-in that turns manager frames into an SSE stream.
+
+    Sends hand chunks to `stream()` through a one-slot queue, so the
+    manager's writer task only moves on once the previous event has been
+    taken by the response. A slow client therefore backs up its outbox,
+    where the slow-consumer policy applies, exactly like a WebSocket.
+    """
+
+    def __init__(self, epoch: str):
+        self.epoch = epoch
+        self.closed = False
+        self._queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue(maxsize=1)
+
+    async def accept(self):
+        """Nothing to negotiate; headers go out with the first chunk."""
+
+    async def send_text(self, text: str):
+        if text == PING_FRAME:
+            # Comment line: keeps proxies from timing out the stream
+            await self._put(": ping\n\n")
+            return
+
+        match = _FRAME_SEQ.match(text)
+        if match:
+            await self._put(f"id: {self.epoch}:{match.group(1)}\ndata: {text}\n\n")
+        else:
+            await self._put(f"data: {text}\n\n")
+
+    async def send_json(self, message):
+        await self._put(f"data: {dumps(message).decode()}\n\n")
+
+    async def _put(self, chunk: str):
+        if self.closed:
+            raise RuntimeError("SSE stream closed")
+        await self._queue.put(chunk)
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        """End the stream (the manager closes slow or shut-down clients)."""
+        if self.closed:
+            return
+        self.closed = True
+        if self._queue.full():
+            self._queue.get_nowait()
+        self._queue.put_nowait(None)
+
+    async def stream(self) -> AsyncIterator[str]:
+        """Yield SSE chunks until the transport is closed."""
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        while True:
+            chunk = await self._queue.get()
+            if chunk is None:
+                return
+            yield chunk
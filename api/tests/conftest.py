@@ -111,7 +111,8 @@ async def db_session() -> AsyncGenerator[AsyncSession, None]:
 # ---------------------------------------------------------------------------
 
 from main import app
-from db.database import get_db
+from db.database import get_db, get_reporting_db
+from db.replica import get_read_db, get_reporting_read_db
 
 
 async def _override_get_db():
@@ -120,6 +121,9 @@ async def _override_get_db():
 
 
 app.dependency_overrides[get_db] = _override_get_db
+app.dependency_overrides[get_reporting_db] = _override_get_db
+app.dependency_overrides[get_read_db] = _override_get_db
+app.dependency_overrides[get_reporting_read_db] = _override_get_db
 
 
 @pytest_asyncio.fixture
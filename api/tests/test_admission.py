@@ -0,0 +1,204 @@
+# ================================
+# SensorPulse API - Admission Control Tests
+# ================================
+
+import asyncio
+import json
+
+import pytest
+
+from admission import (
+    INTERACTIVE,
+    LONG_HISTORY,
+    REPORTS,
+    AdmissionController,
+    AdmissionMiddleware,
+    Overloaded,
+    RouteClass,
+    classify,
+)
+
+
+def _controller(capacity=4, **overrides):
+    limits = {
+        INTERACTIVE: dict(priority=0, max_concurrent=capacity, queue_budget=1.0),
+        LONG_HISTORY: dict(priority=1, max_concurrent=2, queue_budget=1.0),
+        REPORTS: dict(priority=2, max_concurrent=1, queue_budget=1.0),
+    }
+    for name, values in overrides.items():
+        limits[name].update(values)
+    return AdmissionController(capacity, [RouteClass(name, **kw) for name, kw in limits.items()])
+
+
+def _scope(path, query=b""):
+    return {"type": "http", "path": path, "query_string": query, "method": "GET", "headers": []}
+
+
+def _collect(messages):
+    async def send(message):
+        messages.append(message)
+    return send
+
+
+class TestClassify:
+
+    @pytest.mark.parametrize("path, query, expected", [
+        ("/api/latest", b"", INTERACTIVE),
+        ("/api/history/office", b"hours=24", INTERACTIVE),
+        ("/api/history/office", b"hours=168", LONG_HISTORY),
+        ("/api/history/office", b"hours=abc", INTERACTIVE),
+        ("/api/report/preview", b"", REPORTS),
+        ("/api/report/preview/html", b"", REPORTS),
+        ("/api/report/send-now", b"", REPORTS),
+        ("/api/admin/admission", b"", None),
+        ("/health", b"", None),
+    ])
+    def test_route_classes(self, path, query, expected):
+        assert classify(_scope(path, query), long_history_hours=48) == expected
+
+
+@pytest.mark.asyncio
+class TestAdmissionController:
+
+    async def test_admits_within_limits(self):
+        controller = _controller()
+        await controller.acquire(INTERACTIVE)
+        await controller.acquire(REPORTS)
+
+        stats = controller.get_stats()
+        assert stats["in_flight"] == 2
+        assert stats["classes"][REPORTS]["admitted"] == 1
+
+        controller.release(INTERACTIVE)
+        controller.release(REPORTS)
+        assert controller.in_flight == 0
+
+    async def test_queued_request_admitted_on_release(self):
+        controller = _controller()
+        await controller.acquire(REPORTS)
+
+        waiting = asyncio.create_task(controller.acquire(REPORTS))
+        await asyncio.sleep(0)
+        assert controller.get_stats()["classes"][REPORTS]["queue_depth"] == 1
+
+        controller.release(REPORTS)
+        await asyncio.wait_for(waiting, timeout=1)
+        stats = controller.get_stats()["classes"][REPORTS]
+        assert (stats["in_flight"], stats["queue_depth"], stats["admitted"]) == (1, 0, 2)
+
+    async def test_queue_budget_sheds(self):
+        controller = _controller(reports={"queue_budget": 0.02})
+        await controller.acquire(REPORTS)
+
+        with pytest.raises(Overloaded) as exc:
+            await controller.acquire(REPORTS)
+
+        assert exc.value.reason == "queue_timeout"
+        assert exc.value.retry_after == 1
+        stats = controller.get_stats()["classes"][REPORTS]
+        assert (stats["shed_timeout"], stats["queue_depth"]) == (1, 0)
+
+    async def test_full_queue_sheds_immediately(self):
+        controller = _controller(reports={"max_queue": 1})
+        await controller.acquire(REPORTS)
+        waiting = asyncio.create_task(controller.acquire(REPORTS))
+        await asyncio.sleep(0)
+
+        with pytest.raises(Overloaded) as exc:
+            await controller.acquire(REPORTS)
+
+        assert exc.value.reason == "queue_full"
+        assert controller.get_stats()["classes"][REPORTS]["shed_queue_full"] == 1
+        waiting.cancel()
+
+    async def test_class_on_its_own_pool_ignores_capacity(self):
+        controller = _controller(capacity=1, **{REPORTS: dict(shares_capacity=False)})
+        await controller.acquire(INTERACTIVE)
+
+        await asyncio.wait_for(controller.acquire(REPORTS), timeout=0.1)
+        assert controller.in_flight == 1
+
+        controller.release(REPORTS)
+        controller.release(INTERACTIVE)
+        assert controller.in_flight == 0
+
+    async def test_freed_slot_goes_to_higher_priority(self):
+        controller = _controller(capacity=1)
+        await controller.acquire(INTERACTIVE)
+
+        order = []
+
+        async def request(name):
+            await controller.acquire(name)
+            order.append(name)
+
+        # The report queued first, but interactive requests win the slot
+        tasks = [asyncio.create_task(request(REPORTS))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request(INTERACTIVE)))
+        await asyncio.sleep(0)
+
+        controller.release(INTERACTIVE)
+        await asyncio.sleep(0.01)
+        assert order == [INTERACTIVE]
+
+        controller.release(INTERACTIVE)
+        await asyncio.gather(*tasks)
+        assert order == [INTERACTIVE, REPORTS]
+
+    async def test_cancelled_waiter_does_not_leak_slot(self):
+        controller = _controller()
+        await controller.acquire(REPORTS)
+        waiting = asyncio.create_task(controller.acquire(REPORTS))
+        await asyncio.sleep(0)
+
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        controller.release(REPORTS)
+
+        stats = controller.get_stats()
+        assert stats["in_flight"] == 0
+        assert stats["classes"][REPORTS]["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+class TestAdmissionMiddleware:
+
+    async def test_sheds_with_503_and_retry_after(self):
+        controller = _controller(reports={"queue_budget": 0.01})
+        release = asyncio.Event()
+
+        async def app(scope, receive, send):
+            await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        middleware = AdmissionMiddleware(app, controller)
+        slow = asyncio.create_task(middleware(_scope("/api/report/preview"), None, _collect([])))
+        await asyncio.sleep(0)
+
+        messages = []
+        await middleware(_scope("/api/report/preview"), None, _collect(messages))
+
+        start, body = messages
+        assert start["status"] == 503
+        assert (b"retry-after", b"1") in start["headers"]
+        assert json.loads(body["body"])["code"] == "OVERLOADED"
+
+        release.set()
+        await slow
+        assert controller.in_flight == 0
+
+    async def test_uncontrolled_paths_pass_through(self):
+        controller = _controller(capacity=0)
+        calls = []
+
+        async def app(scope, receive, send):
+            calls.append(scope["path"])
+
+        middleware = AdmissionMiddleware(app, controller)
+        await middleware(_scope("/health"), None, None)
+        await middleware({"type": "websocket", "path": "/ws/sensors"}, None, None)
+
+        assert calls == ["/health", "/ws/sensors"]
@@ -4,9 +4,16 @@
 
 import uuid
 from datetime import datetime, timezone, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock
 
 import pytest
-from auth import create_access_token, decode_access_token
+from fastapi.security import HTTPAuthorizationCredentials
+
+import auth
+import principals
+from auth import create_access_token, decode_access_token, require_user
+from principals import PrincipalCache
 
 
 class TestCreateAccessToken:
@@ -49,3 +56,75 @@ class TestDecodeAccessToken:
         parts[1] = parts[1][:-1] + ("A" if parts[1][-1] != "A" else "B")
         tampered = ".".join(parts)
         assert decode_access_token(tampered) is None
+
+
+class TestPrincipalCache:
+    """Tests for the per-token authenticated user cache."""
+
+    def _user(self, user_id=None):
+        return SimpleNamespace(id=user_id or uuid.uuid4(), is_allowed=True)
+
+    def test_hit_after_put(self):
+        cache = PrincipalCache(ttl_seconds=30, max_size=10)
+        user = self._user()
+        cache.put("tok", user)
+        assert cache.get("tok") is user
+        assert cache.get_stats()["hits"] == 1
+
+    def test_miss_for_unknown_token(self):
+        cache = PrincipalCache()
+        assert cache.get("nope") is None
+        assert cache.get_stats()["misses"] == 1
+
+    def test_entry_expires_after_ttl(self, monkeypatch):
+        cache = PrincipalCache(ttl_seconds=5, max_size=10)
+        now = [1000.0]
+        monkeypatch.setattr(principals.time, "monotonic", lambda: now[0])
+        cache.put("tok", self._user())
+        now[0] += 6
+        assert cache.get("tok") is None
+        assert len(cache) == 0
+
+    def test_not_cached_past_token_expiry(self):
+        cache = PrincipalCache(ttl_seconds=30, max_size=10)
+        expired = datetime.now(timezone.utc) - timedelta(seconds=1)
+        cache.put("tok", self._user(), expired)
+        assert cache.get("tok") is None
+
+    def test_lru_eviction(self):
+        cache = PrincipalCache(ttl_seconds=30, max_size=2)
+        cache.put("a", self._user())
+        cache.put("b", self._user())
+        cache.get("a")  # a is now most recently used
+        cache.put("c", self._user())
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_invalidate_user_drops_all_tokens(self):
+        cache = PrincipalCache(ttl_seconds=30, max_size=10)
+        user = self._user()
+        cache.put("t1", user)
+        cache.put("t2", user)
+        cache.put("other", self._user())
+        cache.invalidate_user(user.id)
+        assert cache.get("t1") is None
+        assert cache.get("t2") is None
+        assert cache.get("other") is not None
+
+
+@pytest.mark.asyncio
+class TestRequireUserCache:
+    """require_user should serve cached principals without touching the DB."""
+
+    async def test_cache_hit_skips_db(self, monkeypatch):
+        user = SimpleNamespace(id=uuid.uuid4(), is_allowed=True)
+        token, _ = create_access_token(str(user.id), "cached@example.com")
+        cache = PrincipalCache(ttl_seconds=30, max_size=10)
+        cache.put(token, user)
+        monkeypatch.setattr(auth, "principal_cache", cache)
+
+        db = MagicMock()
+        creds = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+        assert await require_user(credentials=creds, db=db) is user
+        db.execute.assert_not_called()
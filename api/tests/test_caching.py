@@ -0,0 +1,69 @@
+# ================================
+# SensorPulse API - HTTP Caching Unit Tests
+# ================================
+
+from datetime import datetime, timezone, timedelta
+from email.utils import formatdate
+from unittest.mock import MagicMock
+
+from caching import make_etag, is_not_modified, not_modified_response
+
+
+def _make_request(headers=None):
+    """Create a mock Request with the given headers."""
+    request = MagicMock()
+    request.headers = {k.lower(): v for k, v in (headers or {}).items()}
+    return request
+
+
+class TestMakeEtag:
+
+    def test_is_quoted_and_stable(self):
+        t = datetime(2026, 1, 25, 10, 30, tzinfo=timezone.utc)
+        assert make_etag("history", "office", t) == make_etag("history", "office", t)
+        assert make_etag("history", "office", t).startswith('"')
+
+    def test_changes_with_parts(self):
+        assert make_etag("history", "office", 24) != make_etag("history", "office", 48)
+
+
+class TestIsNotModified:
+
+    def test_matching_if_none_match(self):
+        etag = make_etag("devices", 1)
+        assert is_not_modified(_make_request({"If-None-Match": etag}), etag) is True
+
+    def test_weak_and_list_if_none_match(self):
+        etag = make_etag("devices", 1)
+        header = f'"other", W/{etag}'
+        assert is_not_modified(_make_request({"If-None-Match": header}), etag) is True
+
+    def test_stale_if_none_match(self):
+        etag = make_etag("devices", 1)
+        assert is_not_modified(_make_request({"If-None-Match": '"stale"'}), etag) is False
+
+    def test_if_modified_since(self):
+        last = datetime(2026, 1, 25, 10, 30, 15, 500, tzinfo=timezone.utc)
+        header = formatdate(last.replace(microsecond=0).timestamp(), usegmt=True)
+        req = _make_request({"If-Modified-Since": header})
+        assert is_not_modified(req, '"x"', last) is True
+        assert is_not_modified(req, '"x"', last + timedelta(seconds=2)) is False
+
+    def test_if_none_match_takes_precedence(self):
+        last = datetime(2026, 1, 25, 10, 30, tzinfo=timezone.utc)
+        req = _make_request({
+            "If-None-Match": '"stale"',
+            "If-Modified-Since": formatdate(last.timestamp(), usegmt=True),
+        })
+        assert is_not_modified(req, '"fresh"', last) is False
+
+    def test_no_conditional_headers(self):
+        assert is_not_modified(_make_request(), '"x"') is False
+
+
+def test_not_modified_response_has_validators():
+    last = datetime(2026, 1, 25, 10, 30, tzinfo=timezone.utc)
+    resp = not_modified_response('"abc"', last)
+    assert resp.status_code == 304
+    assert resp.headers["ETag"] == '"abc"'
+    assert resp.headers["Last-Modified"] == "Sun, 25 Jan 2026 10:30:00 GMT"
@@ -0,0 +1,103 @@
+# ================================
+# SensorPulse API - Columnar History Format Tests
+# ================================
+
+from datetime import datetime, timezone, timedelta
+
+import msgpack
+import pytest
+from fastapi import HTTPException
+
+import columnar
+from columnar import (
+    choose_format,
+    parse_metrics,
+    to_columnar,
+    delta_encode,
+    delta_decode,
+    pack,
+)
+
+
+def _history(count=3):
+    start = datetime(2026, 1, 25, 10, 0, tzinfo=timezone.utc)
+    return {
+        "device_name": "office",
+        "topic": "zigbee2mqtt/office",
+        "readings": [
+            {
+                "time": start + timedelta(seconds=30 * i),
+                "topic": "zigbee2mqtt/office",
+                "device_name": "office",
+                "temperature": 21.0 + i,
+                "humidity": None if i == 1 else 50.0,
+                "battery": 90,
+                "linkquality": 100,
+                "raw_data": {},
+            }
+            for i in range(count)
+        ],
+        "summary": {"reading_count": count},
+    }
+
+
+class TestChooseFormat:
+
+    def test_defaults_to_json(self):
+        assert choose_format(None, "application/json") == "json"
+
+    def test_query_param_wins(self):
+        assert choose_format("columnar", "application/msgpack") == "columnar"
+
+    def test_accept_header(self):
+        assert choose_format(None, "application/vnd.sensorpulse.columnar+json") == "columnar"
+        assert choose_format(None, "application/msgpack;q=0.9, */*") == "msgpack"
+
+    def test_msgpack_unavailable(self, monkeypatch):
+        monkeypatch.setattr(columnar, "msgpack", None)
+        with pytest.raises(HTTPException) as exc:
+            choose_format("msgpack", None)
+        assert exc.value.status_code == 406
+
+
+class TestParseMetrics:
+
+    def test_defaults(self):
+        assert parse_metrics(None) == ["temperature", "humidity"]
+
+    def test_dedupes_and_keeps_order(self):
+        assert parse_metrics("battery, temperature,battery") == ["battery", "temperature"]
+
+    def test_rejects_unknown(self):
+        with pytest.raises(HTTPException) as exc:
+            parse_metrics("temperature,raw_data")
+        assert exc.value.status_code == 422
+
+
+class TestToColumnar:
+
+    def test_parallel_arrays(self):
+        payload = to_columnar(_history(), ["temperature", "humidity"])
+        assert payload["count"] == 3
+        assert payload["t"][0] == int(datetime(2026, 1, 25, 10, 0, tzinfo=timezone.utc).timestamp() * 1000)
+        assert payload["values"]["temperature"] == [21.0, 22.0, 23.0]
+        assert payload["values"]["humidity"] == [50.0, None, 50.0]
+        assert "battery" not in payload["values"]
+
+    def test_delta_encoded_timestamps(self):
+        plain = to_columnar(_history(), ["temperature"])
+        delta = to_columnar(_history(), ["temperature"], delta=True)
+        assert delta["delta"] is True
+        assert delta["t"][1:] == [30_000, 30_000]
+        assert delta_decode(delta["t"]) == plain["t"]
+
+    def test_msgpack_roundtrip(self):
+        payload = to_columnar(_history(), ["temperature"], delta=True)
+        decoded = msgpack.unpackb(pack(payload), raw=False)
+        assert decoded["t"] == payload["t"]
+        assert decoded["values"]["temperature"] == [21.0, 22.0, 23.0]
+
+
+def test_delta_roundtrip():
+    values = [1000, 1500, 1500, 4000]
+    assert delta_decode(delta_encode(values)) == values
@@ -0,0 +1,94 @@
+# ================================
+# SensorPulse API - Health Monitor Unit Tests
+# ================================
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from db import get_pool_stats, pool_usage
+from health import HealthMonitor
+
+
+def _mock_engine(fail=False, size=5, checked_out=0, max_overflow=10):
+    """Mock AsyncEngine whose connect() succeeds or raises."""
+    conn = AsyncMock()
+    ctx = MagicMock()
+    if fail:
+        ctx.__aenter__ = AsyncMock(side_effect=ConnectionError("refused"))
+    else:
+        ctx.__aenter__ = AsyncMock(return_value=conn)
+    ctx.__aexit__ = AsyncMock(return_value=False)
+
+    engine = MagicMock()
+    engine.connect = MagicMock(return_value=ctx)
+    engine.pool.size.return_value = size
+    engine.pool.checkedout.return_value = checked_out
+    engine.pool.overflow.return_value = 0
+    engine.pool._max_overflow = max_overflow
+    return engine
+
+
+@pytest.mark.asyncio
+class TestHealthMonitor:
+
+    async def test_unknown_before_first_check(self):
+        monitor = HealthMonitor(_mock_engine())
+        snap = monitor.snapshot()
+        assert snap["database"] == "unknown"
+        assert snap["status"] == "degraded"
+        assert monitor.is_ready() is False
+
+    async def test_healthy_after_check(self):
+        monitor = HealthMonitor(_mock_engine())
+        await monitor.check()
+        snap = monitor.snapshot()
+        assert snap["database"] == "connected"
+        assert snap["status"] == "healthy"
+        assert snap["pool"]["saturation"] == 0.0
+        assert monitor.is_ready() is True
+
+    async def test_db_failure_is_degraded(self):
+        monitor = HealthMonitor(_mock_engine(fail=True))
+        await monitor.check()
+        snap = monitor.snapshot()
+        assert snap["database"] == "disconnected"
+        assert "refused" in snap["database_error"]
+        assert monitor.is_ready() is False
+
+    async def test_saturated_pool_not_ready(self):
+        monitor = HealthMonitor(
+            _mock_engine(size=5, checked_out=15, max_overflow=10),
+            pool_saturation_threshold=0.9,
+        )
+        await monitor.check()
+        assert monitor.snapshot()["pool"]["saturation"] == 1.0
+        assert monitor.is_ready() is False
+
+    async def test_loop_lag_not_ready(self):
+        monitor = HealthMonitor(_mock_engine(), max_loop_lag_ms=100)
+        await monitor.check()
+        monitor.loop_lag_ms = 250.0
+        assert monitor.is_ready() is False
+
+    async def test_start_and_stop(self):
+        monitor = HealthMonitor(_mock_engine(), interval=0.01)
+        await monitor.start()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+        assert monitor.check_count >= 2
+
+
+class TestPools:
+
+    def test_pool_per_workload(self):
+        stats = get_pool_stats()
+        assert set(stats) == {"interactive", "reporting", "maintenance"}
+        assert stats["maintenance"]["size"] == 1
+        assert stats["reporting"]["checked_out"] == 0
+        assert stats["interactive"]["statement_timeout_ms"] == 15_000
+
+    def test_pool_usage_saturation(self):
+        usage = pool_usage(_mock_engine(size=2, checked_out=3, max_overflow=2))
+        assert usage["saturation"] == 0.75
@@ -0,0 +1,196 @@
+# ================================
+# SensorPulse API - Hot Tier Tests
+# ================================
+
+import json
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from httpx import AsyncClient
+
+from auth import require_user
+from hot_tier import DeviceRing, HotTier, hot_tier
+from live import decode_event
+from main import app
+from tests.conftest import TestAsyncSession
+
+T0 = 1_700_000_000_000_000  # epoch microseconds
+MS = 1000
+
+
+def _values(temperature):
+    return [temperature, np.nan, np.nan, np.nan]
+
+
+def _reading(device_name, minutes_ago, temperature=21.0):
+    return {
+        "time": datetime.now(timezone.utc) - timedelta(minutes=minutes_ago),
+        "topic": f"zigbee2mqtt/{device_name}",
+        "device_name": device_name,
+        "temperature": temperature,
+        "humidity": None,
+        "battery": 90,
+        "linkquality": None,
+        "raw_data": {"temperature": temperature},
+    }
+
+
+class TestDeviceRing:
+
+    def test_append_and_window(self):
+        ring = DeviceRing(8)
+        for i in range(5):
+            ring.append(T0 + i * MS, "t", _values(float(i)), None)
+
+        positions = ring.window(T0 + 2 * MS)
+        assert ring.times[positions].tolist() == [T0 + 2 * MS, T0 + 3 * MS, T0 + 4 * MS]
+        assert ring.complete_since(T0 - 100) == T0 - 100
+
+    def test_wrap_tracks_coverage(self):
+        ring = DeviceRing(4)
+        for i in range(6):
+            ring.append(T0 + i * MS, "t", _values(float(i)), None)
+
+        assert ring.size == 4
+        assert ring.times[ring.window(0)].tolist() == [T0 + 2 * MS, T0 + 3 * MS, T0 + 4 * MS, T0 + 5 * MS]
+        assert ring.complete_since(T0 - 100) == T0 + MS + 1
+
+    def test_out_of_order_and_duplicates(self):
+        ring = DeviceRing(8)
+        ring.append(T0 + 10 * MS, "t", _values(1.0), {"a": 1})
+        ring.append(T0 + 30 * MS, "t", _values(3.0), {"c": 3})
+        assert ring.append(T0 + 20 * MS, "t", _values(2.0), {"b": 2})
+        assert not ring.append(T0 + 30 * MS, "t", _values(9.0), None)
+
+        positions = ring.window(0)
+        assert ring.times[positions].tolist() == [T0 + 10 * MS, T0 + 20 * MS, T0 + 30 * MS]
+        assert ring.values[0, positions].tolist() == [1.0, 2.0, 3.0]
+        assert ring.raw[positions].tolist() == [{"a": 1}, {"b": 2}, {"c": 3}]
+
+        # Appending continues after an insert
+        ring.append(T0 + 40 * MS, "t", _values(4.0), None)
+        assert ring.times[ring.window(T0 + 35 * MS)].tolist() == [T0 + 40 * MS]
+
+    def test_insert_into_full_ring_evicts_oldest(self):
+        ring = DeviceRing(3)
+        for t in (10, 20, 30):
+            ring.append(T0 + t * MS, "t", _values(0.0), None)
+
+        ring.append(T0 + 25 * MS, "t", _values(0.0), None)
+        assert ring.times[ring.window(0)].tolist() == [T0 + 20 * MS, T0 + 25 * MS, T0 + 30 * MS]
+        assert ring.complete_since(0) == T0 + 10 * MS + 1
+
+        # Older than anything retained: dropped, coverage moves past it
+        ring.append(T0 + 5 * MS, "t", _values(0.0), None)
+        assert ring.size == 3
+        assert ring.complete_since(0) == T0 + 10 * MS + 1
+
+
+@pytest.mark.asyncio
+class TestHotTier:
+
+    async def test_not_ready_until_loaded(self):
+        tier = HotTier(TestAsyncSession)
+        tier.add(_reading("office", 5))
+        assert tier.lookup("office", 1) is None
+        assert tier.get_stats()["misses"] == 1
+
+    async def test_load_and_serve(self, seed_readings):
+        tier = HotTier(TestAsyncSession, hours=24)
+        await tier.load()
+
+        window = tier.lookup("office", 24)
+        assert window is not None
+        marker = window.marker()
+        history = window.history()
+        # seed_readings commits, so earlier tests may have added more
+        assert marker["reading_count"] >= 5
+        assert history["summary"]["reading_count"] == marker["reading_count"]
+        assert history["summary"]["max_temp"] == 22.0
+        assert history["readings"][-1]["battery"] == 100
+        assert isinstance(history["readings"][-1]["battery"], int)
+        assert history["readings"][0]["raw_data"] == {"temperature": 22.0}
+
+        # Fridge has no humidity
+        assert tier.lookup("fridge", 24).history()["summary"]["avg_humidity"] is None
+
+    async def test_window_outside_tier_is_a_miss(self, seed_readings):
+        tier = HotTier(TestAsyncSession, hours=24)
+        await tier.load()
+
+        assert tier.lookup("office", 48) is None
+        stats = tier.get_stats()
+        assert (stats["hits"], stats["misses"]) == (0, 1)
+
+    async def test_live_readings_after_load(self):
+        tier = HotTier(TestAsyncSession, hours=1)
+        await tier.load()
+        tier.add(_reading("garage", 10, temperature=5.0))
+        tier.add(_reading("garage", 5, temperature=6.0))
+
+        window = tier.lookup("garage", 1)
+        assert [r["temperature"] for r in window.history()["readings"]] == [5.0, 6.0]
+
+    async def test_reading_in_load_and_pending_kept_once(self, seed_readings):
+        newest = seed_readings[0]
+        # The same reading as the ingester's event delivers it (ms timestamp)
+        payload = json.dumps({"v": 1, "id": "b-0", "sent": 0, "r": [[
+            int(newest.time.timestamp() * 1000), newest.topic, newest.device_name,
+            newest.temperature, newest.humidity, newest.battery, newest.linkquality, newest.raw_data,
+        ]]})
+        live = decode_event(payload)["readings"][0]
+
+        tier = HotTier(None, hours=24)
+
+        def session_factory():
+            tier.add(live)  # arrives while the load query runs
+            return TestAsyncSession()
+
+        tier.session_factory = session_factory
+        await tier.load()
+
+        readings = tier.lookup("office", 24).history()["readings"]
+        near = [r for r in readings if abs(r["time"] - newest.time) < timedelta(milliseconds=1)]
+        assert len(near) == 1
+
+    async def test_unknown_device_is_an_empty_hit(self):
+        tier = HotTier(TestAsyncSession, hours=1)
+        await tier.load()
+
+        window = tier.lookup("nonexistent", 1)
+        assert window.marker()["reading_count"] == 0
+        assert tier.hits == 1
+
+    async def test_invalidate_stops_serving(self):
+        tier = HotTier(TestAsyncSession, hours=1)
+        await tier.load()
+        tier.invalidate()
+
+        assert not tier.ready
+        assert tier.lookup("office", 1) is None
+
+
+@pytest.mark.asyncio
+class TestHistoryFromHotTier:
+
+    async def test_history_served_from_hot_tier(self, client: AsyncClient, seed_readings, monkeypatch):
+        app.dependency_overrides[require_user] = lambda: object()
+        monkeypatch.setattr(hot_tier, "session_factory", TestAsyncSession)
+        try:
+            cold = (await client.get("/api/history/office", params={"hours": 24})).json()
+
+            await hot_tier.load()
+            hits = hot_tier.hits
+            resp = await client.get("/api/history/office", params={"hours": 24})
+            assert resp.status_code == 200
+            assert hot_tier.hits == hits + 1
+            assert resp.json()["summary"] == cold["summary"]
+
+            # Longer than the tier: from the database
+            resp = await client.get("/api/history/office", params={"hours": 48})
+            assert resp.status_code == 200
+            assert hot_tier.hits == hits + 1
+        finally:
+            hot_tier.invalidate()
+            app.dependency_overrides.pop(require_user, None)
@@ -0,0 +1,146 @@
+# ================================
+# SensorPulse API - Live Reading Listener Tests
+# ================================
+
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from live import ReadingListener, decode_event
+from principals import PrincipalCache
+
+
+def _payload(rows, sent=None, version=1):
+    """Build a NOTIFY payload in the ingester's event format."""
+    return json.dumps({
+        "v": version,
+        "sent": int(time.time() * 1000) if sent is None else sent,
+        "r": rows,
+    })
+
+
+def _row(device="office", time_ms=None, temperature=21.5):
+    time_ms = int(time.time() * 1000) if time_ms is None else time_ms
+    return [time_ms, f"zigbee2mqtt/{device}", device, temperature, 45.0, 90, 120, {"temperature": temperature}]
+
+
+class TestDecodeEvent:
+
+    def test_decodes_rows_into_readings(self):
+        event = decode_event(_payload([_row(time_ms=1_700_000_000_000)], sent=1_700_000_000_250))
+        assert event["sent"] == 1_700_000_000_250
+        reading = event["readings"][0]
+        assert reading["time"] == datetime.fromtimestamp(1_700_000_000, tz=timezone.utc)
+        assert reading["device_name"] == "office"
+        assert reading["topic"] == "zigbee2mqtt/office"
+        assert reading["temperature"] == 21.5
+        assert reading["raw_data"] == {"temperature": 21.5}
+
+    def test_rejects_unknown_version(self):
+        with pytest.raises(ValueError):
+            decode_event(_payload([], version=99))
+
+    def test_rejects_invalid_json(self):
+        with pytest.raises(ValueError):
+            decode_event("{not json")
+
+
+@pytest.mark.asyncio
+class TestReadingListener:
+
+    async def test_broadcasts_each_reading(self):
+        manager = AsyncMock()
+        listener = ReadingListener(manager, dsn=None)
+
+        await listener.handle_payload(_payload([_row("office"), _row("bedroom")]))
+
+        devices = [c.args[0]["device_name"] for c in manager.broadcast_reading.call_args_list]
+        assert devices == ["office", "bedroom"]
+        assert listener.events == 1
+        assert listener.readings == 2
+
+    async def test_records_latency(self):
+        listener = ReadingListener(AsyncMock(), dsn=None)
+        now = int(time.time() * 1000)
+
+        await listener.handle_payload(_payload([_row(time_ms=now - 500)], sent=now - 100))
+
+        stats = listener.get_stats()
+        assert stats["pipeline_latency_ms"]["last"] >= 100
+        assert stats["end_to_end_latency_ms"]["last"] >= 500
+        assert stats["end_to_end_latency_ms"]["p95"] is not None
+
+    async def test_malformed_payload_is_counted(self):
+        manager = AsyncMock()
+        listener = ReadingListener(manager, dsn=None)
+
+        await listener.handle_payload("garbage")
+        await listener.handle_payload(_payload([[1]]))  # row too short is tolerated
+
+        assert listener.errors == 1
+        manager.broadcast_reading.assert_called_once()
+
+    async def test_start_without_dsn_is_noop(self):
+        listener = ReadingListener(AsyncMock(), dsn=None)
+        await listener.start()
+        assert listener.get_stats()["connected"] is False
+        await listener.stop()
+
+
+@pytest.mark.asyncio
+class TestWorkerFanOut:
+
+    async def test_duplicate_events_are_dropped(self):
+        manager = AsyncMock()
+        listener = ReadingListener(manager, dsn=None)
+        payload = json.dumps({"v": 1, "id": "batch-0", "sent": None, "r": [_row()]})
+
+        await listener.handle_payload(payload)
+        await listener.handle_payload(payload)
+
+        manager.broadcast_reading.assert_called_once()
+        assert listener.duplicates == 1
+
+    async def test_cluster_stats_aggregate_workers(self):
+        manager = MagicMock()
+        manager.get_connection_count.return_value = 3
+        listener = ReadingListener(manager, dsn=None)
+
+        listener.handle_stats_payload(json.dumps({"worker": "host:2", "active_connections": 4}))
+        listener.handle_stats_payload(json.dumps({"worker": "host:3", "active_connections": 5}))
+        # Own summaries echoed back by PostgreSQL are ignored
+        listener.handle_stats_payload(json.dumps({"worker": listener.worker_id, "active_connections": 99}))
+        listener.handle_stats_payload("garbage")
+
+        cluster = listener.cluster_stats()
+        assert cluster["workers"] == 3
+        assert cluster["active_connections"] == 12
+
+    async def test_user_change_invalidates_cached_principals(self):
+        cache = PrincipalCache(ttl_seconds=30, max_size=10)
+        user, other = MagicMock(id=uuid.uuid4()), MagicMock(id=uuid.uuid4())
+        cache.put("t1", user)
+        cache.put("t2", other)
+        listener = ReadingListener(MagicMock(), dsn=None, principal_cache=cache)
+
+        # Payload of the users table trigger from another worker's update
+        listener._on_user_changed(None, 0, "user_changed", str(user.id))
+
+        assert cache.get("t1") is None
+        assert cache.get("t2") is other
+        assert listener.get_stats()["user_invalidations"] == 1
+
+    async def test_stale_workers_expire(self):
+        manager = MagicMock()
+        manager.get_connection_count.return_value = 1
+        listener = ReadingListener(manager, dsn=None, stats_interval=0.01)
+
+        listener.handle_stats_payload(json.dumps({"worker": "host:2", "active_connections": 4}))
+        await asyncio.sleep(0.05)
+
+        assert listener.cluster_stats()["workers"] == 1
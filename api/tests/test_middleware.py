@@ -2,11 +2,19 @@
 # SensorPulse API - Middleware Unit Tests
 # ================================
 
+import asyncio
+import fcntl
+import os
+import tempfile
+import threading
 import time as _time
+import uuid
 from unittest.mock import MagicMock
 
 import pytest
-from middleware import RateLimiter
+
+from middleware import RateLimiter, RateLimitMiddleware, SharedRateLimiter
+from ratelimit_store import SharedMemoryCounterStore
 
 
 def _make_request(ip: str = "127.0.0.1", user_id=None):
@@ -70,3 +78,233 @@ class TestRateLimiter:
         _, h1 = limiter.is_allowed(req)
         _, h2 = limiter.is_allowed(req)
         assert int(h2["X-RateLimit-Remaining"]) < int(h1["X-RateLimit-Remaining"])
+
+    def test_previous_window_is_weighted(self):
+        limiter = RateLimiter(requests_per_minute=10)
+        # Fill the window that started at t=60
+        for _ in range(10):
+            limiter.check("k", now=60.0)
+        # Halfway into the next window half of those still count
+        allowed = sum(limiter.check("k", now=150.0)[0] for _ in range(10))
+        assert allowed == 5
+
+    def test_counts_reset_after_two_windows(self):
+        limiter = RateLimiter(requests_per_minute=2)
+        limiter.check("k", now=0.0)
+        limiter.check("k", now=0.0)
+        assert limiter.check("k", now=1.0)[0] is False
+        assert limiter.check("k", now=125.0)[0] is True
+
+    def test_idle_keys_are_evicted(self):
+        limiter = RateLimiter(requests_per_minute=5)
+        for i in range(50):
+            limiter.check(f"ip:{i}", now=0.0)
+        assert limiter.get_tracked_keys() == 50
+        limiter.check("ip:new", now=200.0)
+        assert limiter.get_tracked_keys() == 1
+
+    def test_key_space_is_capped(self):
+        limiter = RateLimiter(requests_per_minute=5, max_keys=10)
+        for i in range(25):
+            limiter.check(f"ip:{i}", now=0.0)
+        assert limiter.get_tracked_keys() == 10
+        assert limiter.evicted_keys == 15
+
+
+def _asgi_app():
+    """Minimal ASGI app returning a fixed 200 response."""
+    async def app(scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/plain")],
+        })
+        await send({"type": "http.response.body", "body": b"ok"})
+    return app
+
+
+async def _call(middleware, path="/api/latest", scope_type="http"):
+    """Drive the middleware with a single request and collect sent messages."""
+    scope = {
+        "type": scope_type,
+        "path": path,
+        "method": "GET",
+        "headers": [],
+        "query_string": b"",
+        "client": ("127.0.0.1", 1234),
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await middleware(scope, receive, send)
+    return sent
+
+
+def _headers(message):
+    return {k.decode(): v.decode() for k, v in message["headers"]}
+
+
+@pytest.mark.asyncio
+class TestRateLimitMiddleware:
+
+    async def test_adds_rate_limit_headers(self):
+        mw = RateLimitMiddleware(_asgi_app(), requests_per_minute=5)
+        sent = await _call(mw)
+        assert sent[0]["status"] == 200
+        headers = _headers(sent[0])
+        assert headers["x-ratelimit-limit"] == "5"
+        assert headers["x-ratelimit-remaining"] == "4"
+        assert sent[1]["body"] == b"ok"
+
+    async def test_returns_429_when_exceeded(self):
+        mw = RateLimitMiddleware(_asgi_app(), requests_per_minute=1)
+        await _call(mw)
+        sent = await _call(mw)
+        assert sent[0]["status"] == 429
+        assert "retry-after" in _headers(sent[0])
+
+    async def test_excluded_paths_skip_limiter(self):
+        mw = RateLimitMiddleware(_asgi_app(), requests_per_minute=1)
+        for _ in range(3):
+            sent = await _call(mw, path="/health")
+            assert sent[0]["status"] == 200
+            assert "x-ratelimit-limit" not in _headers(sent[0])
+
+
+@pytest.fixture
+def shm_name():
+    """Unique shared memory segment name, removed after the test."""
+    name = f"sp_test_{uuid.uuid4().hex[:12]}"
+    yield name
+    store = SharedMemoryCounterStore(name, slots=64)
+    store.close()
+    store.unlink()
+
+
+@pytest.mark.asyncio
+class TestSharedRateLimiter:
+
+    NOW = 1_700_000_050.0  # 10s into a window
+
+    def _worker(self, shm_name, limit=5):
+        """A limiter with its own handle on the segment, like a worker process."""
+        store = SharedMemoryCounterStore(shm_name, slots=64)
+        return SharedRateLimiter(store, requests_per_minute=limit)
+
+    async def test_counts_are_shared_after_sync(self, shm_name):
+        a = self._worker(shm_name, limit=4)
+        b = self._worker(shm_name, limit=4)
+
+        for _ in range(4):
+            assert a.check("ip:1", now=self.NOW)[0] is True
+        await a.sync(now=self.NOW)
+
+        # b hasn't synced yet, so it only knows its own counts
+        allowed, headers = b.check("ip:1", now=self.NOW)
+        assert allowed is True
+        await b.sync(now=self.NOW)
+
+        allowed, headers = b.check("ip:1", now=self.NOW)
+        assert allowed is False
+        assert "Retry-After" in headers
+
+    async def test_sync_does_not_double_count(self, shm_name):
+        a = self._worker(shm_name, limit=10)
+        for _ in range(3):
+            a.check("ip:1", now=self.NOW)
+        await a.sync(now=self.NOW)
+        await a.sync(now=self.NOW)
+
+        _, headers = a.check("ip:1", now=self.NOW)
+        assert headers["X-RateLimit-Remaining"] == "6"
+
+    async def test_failed_sync_keeps_pending_deltas(self, shm_name):
+        a = self._worker(shm_name, limit=10)
+        a.check("ip:1", now=self.NOW)
+
+        original = a.store.apply
+
+        async def failing_apply(*args):
+            raise ConnectionError("store down")
+
+        a.store.apply = failing_apply
+        with pytest.raises(ConnectionError):
+            await a.sync(now=self.NOW)
+        assert a.sync_errors == 1
+
+        a.store.apply = original
+        await a.sync(now=self.NOW)
+
+        b = self._worker(shm_name, limit=10)
+        b.check("ip:other", now=self.NOW)
+        await b.sync(now=self.NOW)
+        _, headers = b.check("ip:1", now=self.NOW)
+        await b.sync(now=self.NOW)
+        _, headers = b.check("ip:1", now=self.NOW)
+        # a's request plus b's two checks
+        assert headers["X-RateLimit-Remaining"] == "7"
+
+    async def test_previous_window_is_weighted(self, shm_name):
+        a = self._worker(shm_name, limit=10)
+        for _ in range(10):
+            a.check("ip:1", now=self.NOW)
+        await a.sync(now=self.NOW)
+
+        # Halfway through the next window half of the previous count remains
+        later = self.NOW - 10 + 60 + 30
+        await a.sync(now=later)
+        _, headers = a.check("ip:1", now=later)
+        assert headers["X-RateLimit-Remaining"] == "4"
+
+    async def test_sync_reads_only_recently_checked_keys(self, shm_name):
+        a = self._worker(shm_name, limit=10)
+        a.check("ip:1", now=self.NOW)
+        a.check("ip:2", now=self.NOW)
+        await a.sync(now=self.NOW)
+
+        watched = []
+        original = a.store.apply
+
+        async def recording_apply(deltas, watch, min_window):
+            watch = list(watch)
+            watched.append({key for key, _ in watch})
+            return await original(deltas, watch, min_window)
+
+        a.store.apply = recording_apply
+        a.check("ip:2", now=self.NOW)
+        await a.sync(now=self.NOW)
+        await a.sync(now=self.NOW)
+        assert watched == [{"ip:2"}, set()]
+
+        # ip:1 keeps its last synced total
+        _, headers = a.check("ip:1", now=self.NOW)
+        assert headers["X-RateLimit-Remaining"] == "8"
+
+    async def test_waiting_for_the_lock_does_not_block_the_loop(self, shm_name):
+        a = self._worker(shm_name, limit=10)
+        a.check("ip:1", now=self.NOW)
+
+        # Another worker holds the lock for a moment
+        fd = os.open(os.path.join(tempfile.gettempdir(), f"{shm_name}.lock"), os.O_RDWR)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        threading.Timer(0.1, lambda: (fcntl.flock(fd, fcntl.LOCK_UN), os.close(fd))).start()
+
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.ensure_future(tick())
+        await a.sync(now=self.NOW)
+        ticker.cancel()
+
+        assert a.syncs == 1
+        assert ticks >= 5
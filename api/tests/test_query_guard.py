@@ -0,0 +1,129 @@
+# ================================
+# SensorPulse API - Query Guard Tests
+# ================================
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from query_guard import CLIENT_CLOSED_REQUEST, QueryGuard
+from tests.conftest import TestAsyncSession
+
+
+class _Request:
+    """Just enough of a Request: receive() reports a disconnect on demand."""
+
+    def __init__(self):
+        self.gone = asyncio.Event()
+        self.body_sent = False
+
+    async def receive(self):
+        if not self.body_sent:
+            self.body_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self.gone.wait()
+        return {"type": "http.disconnect"}
+
+
+class _QueryCanceled(Exception):
+    sqlstate = "57014"
+
+
+@pytest.mark.asyncio
+class TestQueryGuard:
+
+    async def test_completed(self):
+        guard = QueryGuard()
+
+        async def query():
+            return 42
+
+        async with TestAsyncSession() as session:
+            assert await guard.run(_Request(), session, "history", 1000, query) == 42
+        assert guard.get_stats()["endpoints"]["history"]["completed"] == 1
+
+    async def test_deadline_cancels_query(self):
+        guard = QueryGuard()
+        cancelled = asyncio.Event()
+
+        async def query():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        async with TestAsyncSession() as session:
+            with pytest.raises(HTTPException) as exc:
+                await guard.run(_Request(), session, "report", 20, query)
+
+        assert exc.value.status_code == 503
+        assert cancelled.is_set()
+        assert guard.get_stats()["timed_out"] == 1
+
+    async def test_client_disconnect_cancels_query(self):
+        guard = QueryGuard()
+        request = _Request()
+        cancelled = asyncio.Event()
+
+        async def query():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        async def navigate_away():
+            await asyncio.sleep(0.01)
+            request.gone.set()
+
+        asyncio.create_task(navigate_away())
+        async with TestAsyncSession() as session:
+            with pytest.raises(HTTPException) as exc:
+                await guard.run(request, session, "history", 5000, query)
+
+        assert exc.value.status_code == CLIENT_CLOSED_REQUEST
+        assert cancelled.is_set()
+        stats = guard.get_stats()
+        assert (stats["cancelled"], stats["timed_out"]) == (1, 0)
+
+    async def test_server_statement_timeout_counts_as_timed_out(self):
+        guard = QueryGuard()
+
+        async def query():
+            raise DBAPIError("SELECT ...", {}, _QueryCanceled())
+
+        async with TestAsyncSession() as session:
+            with pytest.raises(HTTPException) as exc:
+                await guard.run(_Request(), session, "history", 1000, query)
+
+        assert exc.value.status_code == 503
+        assert guard.get_stats()["endpoints"]["history"]["timed_out"] == 1
+
+    async def test_other_database_errors_propagate(self):
+        guard = QueryGuard()
+
+        async def query():
+            raise DBAPIError("SELECT ...", {}, Exception("connection lost"))
+
+        async with TestAsyncSession() as session:
+            with pytest.raises(DBAPIError):
+                await guard.run(_Request(), session, "history", 1000, query)
+        assert guard.get_stats()["timed_out"] == 0
+
+    async def test_statement_timeout_waits_for_first_query(self):
+        # Nothing listens on this port: touching the database would fail
+        engine = create_async_engine("postgresql+asyncpg://sp:sp@127.0.0.1:9/none")
+        guard = QueryGuard()
+
+        async def follower():
+            return 42  # a single-flight follower gets the leader's result
+
+        async with AsyncSession(engine) as session:
+            assert await guard.run(_Request(), session, "history", 1000, follower) == 42
+            assert not session.in_transaction()
+            assert session.info["pending_statement_timeout"] == 1000
+        await engine.dispose()
@@ -0,0 +1,127 @@
+# ================================
+# SensorPulse API - Read Replica Routing Tests
+# ================================
+#
+# The integration tests need two PostgreSQL instances: the primary from
+# TEST_DATABASE_URL and a second one in TEST_REPLICA_DATABASE_URL (a
+# streaming standby, or any other server standing in for one).
+
+import os
+
+import pytest
+from sqlalchemy import text
+
+from db.database import INTERACTIVE, POOLS, REPORTING
+from db.replica import ReplicaRouter
+from tests.conftest import TestAsyncSession
+
+REPLICA_URL = os.environ.get("TEST_REPLICA_DATABASE_URL")
+
+PRIMARY = object()
+
+
+def _router(lag=None, error=None, max_lag=5.0):
+    """Router on a throwaway SQLite "replica" with a scripted lag."""
+    router = ReplicaRouter("sqlite+aiosqlite:///./test_replica.db", max_lag=max_lag)
+
+    async def measure():
+        if error:
+            raise error
+        return lag
+
+    router._measure_lag = measure
+    return router
+
+
+@pytest.mark.asyncio
+class TestReplicaRouter:
+
+    async def test_not_configured_uses_primary(self):
+        router = ReplicaRouter(None)
+        await router.check()
+
+        assert router.sessionmaker_for(PRIMARY) is PRIMARY
+        stats = router.get_stats()
+        assert (stats["configured"], stats["fallbacks"], stats["primary_sessions"]) == (False, 0, 1)
+
+    async def test_primary_until_lag_is_measured(self):
+        router = _router(lag=0.5)
+        assert router.sessionmaker_for(PRIMARY) is PRIMARY
+
+        await router.check()
+        assert router.sessionmaker_for(PRIMARY) is router.session_factories[INTERACTIVE]
+        assert router.get_stats()["replica_sessions"] == 1
+
+    async def test_pool_per_workload(self):
+        router = _router(lag=0.0)
+        await router.check()
+
+        assert router.sessionmaker_for(PRIMARY, REPORTING) is router.session_factories[REPORTING]
+        assert router.session_factories[REPORTING] is not router.session_factories[INTERACTIVE]
+        pools = router.get_stats()["pools"]
+        for workload in (INTERACTIVE, REPORTING):
+            assert pools[workload]["size"] == POOLS[workload]["pool_size"]
+            assert pools[workload]["timeout"] == POOLS[workload]["pool_timeout"]
+
+    async def test_falls_back_when_lagging(self):
+        router = _router(lag=12.0, max_lag=5.0)
+        await router.check()
+
+        assert router.sessionmaker_for(PRIMARY) is PRIMARY
+        stats = router.get_stats()
+        assert (stats["lag_seconds"], stats["max_lag_seen_seconds"], stats["fallbacks"]) == (12.0, 12.0, 1)
+
+    async def test_falls_back_when_unreachable(self):
+        router = _router(error=ConnectionError("replica down"))
+        await router.check()
+
+        assert not router.is_usable()
+        assert router.sessionmaker_for(PRIMARY) is PRIMARY
+        assert router.get_stats()["error"] == "replica down"
+
+    async def test_recovers_when_lag_drops(self):
+        router = _router(lag=30.0)
+        await router.check()
+        assert not router.is_usable()
+
+        async def caught_up():
+            return 0.0
+
+        router._measure_lag = caught_up
+        await router.check()
+        assert router.is_usable()
+
+
+async def _server(session):
+    """Address and port of the server a session talks to."""
+    result = await session.execute(
+        text("SELECT coalesce(host(inet_server_addr()), 'local') || ':' || current_setting('port')")
+    )
+    return result.scalar()
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not REPLICA_URL, reason="TEST_REPLICA_DATABASE_URL not set")
+class TestReplicaIntegration:
+
+    async def test_reads_go_to_replica(self):
+        router = ReplicaRouter(REPLICA_URL, max_lag=60.0)
+        await router.start()
+        try:
+            assert router.is_usable()
+            assert router.get_stats()["lag_seconds"] is not None
+
+            async with router.sessionmaker_for(TestAsyncSession)() as replica, TestAsyncSession() as primary:
+                assert await _server(replica) != await _server(primary)
+        finally:
+            await router.stop()
+
+    async def test_lagging_replica_falls_back_to_primary(self):
+        # Any measured lag exceeds a negative threshold
+        router = ReplicaRouter(REPLICA_URL, max_lag=-1.0)
+        await router.start()
+        try:
+            assert router.sessionmaker_for(TestAsyncSession) is TestAsyncSession
+            assert router.get_stats()["fallbacks"] == 1
+        finally:
+            await router.stop()
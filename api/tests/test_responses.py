@@ -0,0 +1,76 @@
+# ================================
+# SensorPulse API - Fast Response Unit Tests
+# ================================
+
+import gzip
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+import responses
+from responses import negotiate_encoding, fast_json_response
+
+
+def _make_request(accept_encoding=None):
+    """Create a mock Request with an Accept-Encoding header."""
+    request = MagicMock()
+    request.headers = {"accept-encoding": accept_encoding} if accept_encoding else {}
+    return request
+
+
+def _large_payload():
+    return {"readings": [{"temperature": 21.5, "device_name": "office"}] * 200}
+
+
+class TestNegotiateEncoding:
+
+    def test_none_without_header(self):
+        assert negotiate_encoding(None) is None
+        assert negotiate_encoding("identity") is None
+
+    def test_gzip(self):
+        assert negotiate_encoding("gzip, deflate") == "gzip"
+
+    def test_prefers_brotli_when_available(self, monkeypatch):
+        monkeypatch.setattr(responses, "brotli", object())
+        assert negotiate_encoding("gzip, deflate, br") == "br"
+
+    def test_falls_back_to_gzip_without_brotli(self, monkeypatch):
+        monkeypatch.setattr(responses, "brotli", None)
+        assert negotiate_encoding("gzip, br") == "gzip"
+
+    def test_respects_q_zero(self):
+        assert negotiate_encoding("gzip;q=0") is None
+
+
+class TestFastJsonResponse:
+
+    def test_encodes_datetimes_and_decimals(self):
+        resp = fast_json_response(_make_request(), {
+            "time": datetime(2026, 1, 25, 10, 30, tzinfo=timezone.utc),
+            "minutes": Decimal("2.5"),
+        })
+        data = json.loads(resp.body)
+        assert data["time"] == "2026-01-25T10:30:00+00:00"
+        assert data["minutes"] == 2.5
+
+    def test_small_body_not_compressed(self):
+        resp = fast_json_response(_make_request("gzip"), {"ok": True})
+        assert "content-encoding" not in resp.headers
+        assert resp.headers["vary"] == "Accept-Encoding"
+
+    def test_large_body_gzipped(self, monkeypatch):
+        monkeypatch.setattr(responses, "brotli", None)
+        resp = fast_json_response(_make_request("gzip"), _large_payload())
+        assert resp.headers["content-encoding"] == "gzip"
+        assert json.loads(gzip.decompress(resp.body)) == _large_payload()
+
+    def test_compressed_body_gets_etag_variant(self, monkeypatch):
+        monkeypatch.setattr(responses, "brotli", None)
+        resp = fast_json_response(
+            _make_request("gzip"),
+            _large_payload(),
+            headers={"ETag": '"abc"'},
+        )
+        assert resp.headers["etag"] == '"abc-gzip"'
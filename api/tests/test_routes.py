@@ -23,6 +23,16 @@ class TestHealthEndpoint:
         assert body["status"] in ("healthy", "degraded")
         assert "version" in body
 
+    async def test_liveness_returns_200(self, client: AsyncClient):
+        resp = await client.get("/health/live")
+        assert resp.status_code == 200
+        assert resp.json()["status"] == "alive"
+
+    async def test_readiness_reflects_monitor(self, client: AsyncClient):
+        resp = await client.get("/health/ready")
+        assert resp.status_code in (200, 503)
+        assert "database" in resp.json()
+
     async def test_root_returns_api_info(self, client: AsyncClient):
         resp = await client.get("/")
         assert resp.status_code == 200
@@ -84,6 +94,38 @@ class TestSensorRoutes:
             assert resp.status_code in (200, 500)
 
 
+# ========== Conditional GET ==========
+
+@pytest.mark.asyncio
+class TestConditionalGet:
+
+    async def test_history_sets_etag(self, auth_client: AsyncClient, seed_readings):
+        resp = await auth_client.get("/api/history/office", params={"hours": 48})
+        assert resp.status_code == 200
+        assert resp.headers["ETag"].startswith('"')
+        assert "Last-Modified" in resp.headers
+
+    async def test_history_returns_304_when_unchanged(self, auth_client: AsyncClient, seed_readings):
+        first = await auth_client.get("/api/history/office", params={"hours": 48})
+        etag = first.headers["ETag"]
+        resp = await auth_client.get(
+            "/api/history/office",
+            params={"hours": 48},
+            headers={"If-None-Match": etag},
+        )
+        assert resp.status_code == 304
+        assert resp.content == b""
+        assert resp.headers["ETag"] == etag
+
+    async def test_devices_returns_304_when_unchanged(self, auth_client: AsyncClient, seed_readings):
+        first = await auth_client.get("/api/devices")
+        resp = await auth_client.get(
+            "/api/devices",
+            headers={"If-None-Match": first.headers["ETag"]},
+        )
+        assert resp.status_code == 304
+
+
 # ========== Auth Routes ==========
 
 @pytest.mark.asyncio
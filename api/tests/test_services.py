@@ -2,15 +2,19 @@
 # SensorPulse API - Service Layer Tests
 # ================================
 
+import asyncio
 import uuid
 from datetime import datetime, timezone, timedelta
 
 import pytest
 import pytest_asyncio
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 
 from services import SensorService, UserService
+from singleflight import SingleFlight, query_flights
 from db.models import SensorReading, User
+from db.statements import REGISTRY, _compile, get_statement_stats, prepare_connection, warm_up
+from tests.conftest import TestAsyncSession, test_engine
 
 
 @pytest.mark.asyncio
@@ -55,6 +59,182 @@ class TestSensorService:
         assert s["min_humidity"] is None
 
 
+@pytest.mark.asyncio
+class TestSingleFlight:
+
+    async def test_concurrent_calls_share_one_execution(self):
+        flights = SingleFlight()
+        calls = 0
+
+        async def query():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"rows": calls}
+
+        results = await asyncio.gather(*(flights.do("latest", query) for _ in range(10)))
+
+        assert calls == 1
+        assert all(r is results[0] for r in results)
+        stats = flights.get_stats()
+        assert (stats["executions"], stats["coalesced"]) == (1, 9)
+        assert stats["coalescing_ratio"] == 0.9
+        assert stats["in_flight"] == 0
+
+    async def test_different_keys_run_separately(self):
+        flights = SingleFlight()
+
+        async def query(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        results = await asyncio.gather(
+            flights.do(("history", "office", 24), lambda: query(1)),
+            flights.do(("history", "office", 48), lambda: query(2)),
+        )
+        assert results == [1, 2]
+        assert flights.executions == 2
+
+    async def test_errors_are_shared(self):
+        flights = SingleFlight()
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("database unavailable")
+
+        results = await asyncio.gather(
+            *(flights.do("latest", failing) for _ in range(3)),
+            return_exceptions=True,
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert flights.executions == 1
+
+    async def test_cancelled_leader_hands_over(self):
+        flights = SingleFlight()
+        calls = 0
+
+        async def query():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.02)
+            return calls
+
+        leader = asyncio.create_task(flights.do("latest", query))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.do("latest", query))
+        await asyncio.sleep(0.005)
+        leader.cancel()
+
+        assert await follower == 2
+        assert flights.executions == 2
+
+    async def test_service_methods_coalesce(self, db_session: AsyncSession, seed_readings):
+        before = query_flights.get_stats()
+        svc = SensorService(db_session)
+        first, second = await asyncio.gather(
+            svc.get_history_marker("office", 24),
+            svc.get_history_marker("office", 24),
+        )
+
+        assert first is second
+        after = query_flights.get_stats()
+        assert after["executions"] - before["executions"] == 1
+        assert after["coalesced"] - before["coalesced"] == 1
+
+    async def test_calls_on_different_engines_do_not_coalesce(self, seed_readings):
+        # Same database, but a different engine, as the replica's would be
+        replica_engine = create_async_engine(test_engine.url)
+        before = query_flights.get_stats()
+        try:
+            async with TestAsyncSession() as primary, AsyncSession(replica_engine) as replica:
+                first, second = await asyncio.gather(
+                    SensorService(primary).get_history_marker("office", 24),
+                    SensorService(replica).get_history_marker("office", 24),
+                )
+        finally:
+            await replica_engine.dispose()
+
+        assert first is not second
+        after = query_flights.get_stats()
+        assert after["executions"] - before["executions"] == 2
+        assert after["coalesced"] == before["coalesced"]
+
+
+@pytest.mark.asyncio
+class TestStatementRegistry:
+
+    async def test_compiles_positional_sql_for_asyncpg(self):
+        from sqlalchemy.dialects.postgresql import asyncpg
+
+        class _Engine:
+            dialect = asyncpg.dialect()
+
+        compiled = _compile(_Engine())
+        assert set(compiled) == set(REGISTRY)
+        assert "sensor_readings.device_name = $1" in compiled["device_history"]
+
+    async def test_prepare_does_not_execute(self):
+        from sqlalchemy.util import greenlet_spawn
+
+        class _Connection:
+            """Adapted asyncpg connection that refuses to run anything."""
+            _invalidate_schema_cache_asof = 0
+
+            def __init__(self):
+                self.prepared = []
+
+            async def _prepare(self, sql, invalidate_timestamp):
+                self.prepared.append(sql)
+
+            def cursor(self):
+                raise AssertionError("prepare step executed a statement")
+
+        conn = _Connection()
+        compiled = {"latest_readings": "SELECT 1", "user_by_id": "SELECT $1"}
+        await greenlet_spawn(prepare_connection, conn, compiled)
+
+        assert conn.prepared == ["SELECT 1", "SELECT $1"]
+        assert get_statement_stats()["prepare_errors"] == 0
+
+    async def test_prepare_skipped_without_adapter_internals(self):
+        from sqlalchemy.util import greenlet_spawn
+
+        class _Connection:
+            """Adapter without the private prepare call."""
+
+            def cursor(self):
+                raise AssertionError("prepare step executed a statement")
+
+        before = get_statement_stats()
+        await greenlet_spawn(prepare_connection, _Connection(), {"latest_readings": "SELECT 1"})
+
+        after = get_statement_stats()
+        assert after["prepare_errors"] == before["prepare_errors"] + 1
+        assert after["connections_prepared"] == before["connections_prepared"]
+
+    async def test_asyncpg_adapter_still_has_prepare(self):
+        # prepare_connection relies on these SQLAlchemy internals; if an
+        # upgrade removes or changes them, connections go unprepared
+        import inspect
+        from sqlalchemy.dialects.postgresql.asyncpg import AsyncAdapt_asyncpg_connection as adapter
+
+        assert inspect.iscoroutinefunction(adapter._prepare)
+        assert list(inspect.signature(adapter._prepare).parameters) == ["self", "operation", "invalidate_timestamp"]
+        assert "_invalidate_schema_cache_asof" in inspect.getsource(adapter.__init__)
+
+    async def test_warm_up_fills_pool(self):
+        stats = await warm_up(test_engine, 2)
+        assert stats["warmed_connections"] == 2
+        assert stats["warm_up_ms"] is not None
+        assert get_statement_stats()["statements"] == list(REGISTRY)
+
+    async def test_services_use_registered_statements(self, db_session: AsyncSession, seed_readings):
+        svc = SensorService(db_session)
+        marker = await svc.get_history_marker("office", 24)
+        history = await svc.get_device_history("office", 24)
+        assert marker["reading_count"] == history["summary"]["reading_count"] > 0
+
+
 @pytest.mark.asyncio
 class TestUserService:
 
@@ -0,0 +1,125 @@
+# ================================
+# SensorPulse API - Server-Sent Events Transport Tests
+# ================================
+
+import asyncio
+import json
+
+import pytest
+
+from sse import SSETransport, parse_last_event_id
+from websocket import DISCONNECT, WebSocketManager
+
+
+async def _next_events(stream, count):
+    """Read `count` chunks from an SSE stream, skipping the retry line."""
+    chunks = []
+    while len(chunks) < count:
+        chunk = await asyncio.wait_for(stream.__anext__(), timeout=1)
+        if not chunk.startswith("retry:"):
+            chunks.append(chunk)
+    return chunks
+
+
+def _data(chunk):
+    line = next(l for l in chunk.splitlines() if l.startswith("data: "))
+    return json.loads(line[len("data: "):])
+
+
+class TestParseLastEventId:
+
+    def test_valid(self):
+        assert parse_last_event_id("abc123:42") == ("abc123", 42)
+
+    @pytest.mark.parametrize("value", [None, "", "42", "abc:", "abc:x", ":5"])
+    def test_invalid(self, value):
+        assert parse_last_event_id(value) is None
+
+
+@pytest.mark.asyncio
+class TestSSETransport:
+
+    async def test_readings_carry_event_ids(self):
+        manager = WebSocketManager()
+        transport = SSETransport(manager.epoch)
+        await manager.connect(transport, "kiosk", replies_to_pings=False)
+        stream = transport.stream()
+
+        await manager.broadcast_reading({"device_name": "office", "temperature": 21.0})
+        welcome, reading = await _next_events(stream, 2)
+
+        assert _data(welcome)["type"] == "connected"
+        assert "id:" not in welcome
+        assert reading.startswith(f"id: {manager.epoch}:1\n")
+        assert _data(reading)["data"]["temperature"] == 21.0
+        await manager.disconnect_all()
+
+    async def test_shares_encoded_frame_with_websockets(self):
+        manager = WebSocketManager()
+        transport = SSETransport(manager.epoch)
+        await manager.connect(transport, "kiosk")
+        stream = transport.stream()
+        await _next_events(stream, 1)
+
+        for i in range(3):
+            await manager.broadcast_reading({"device_name": "office", "temperature": float(i)})
+        await _next_events(stream, 3)
+
+        assert manager.frames_encoded == 3
+        await manager.disconnect_all()
+
+    async def test_resume_from_last_event_id(self):
+        manager = WebSocketManager()
+        for i in range(3):
+            await manager.broadcast_reading({"device_name": f"sensor{i}"})
+
+        transport = SSETransport(manager.epoch)
+        await manager.connect(transport, "kiosk")
+        stream = transport.stream()
+        epoch, seq = parse_last_event_id(f"{manager.epoch}:1")
+        assert manager.resume("kiosk", seq, epoch)
+
+        _, first, second, resumed = await _next_events(stream, 4)
+        assert first.startswith(f"id: {manager.epoch}:2\n")
+        assert second.startswith(f"id: {manager.epoch}:3\n")
+        assert _data(resumed) == {"type": "resumed", "from": 1, "seq": 3, "count": 2}
+        await manager.disconnect_all()
+
+    async def test_slow_reader_hits_outbox_policy(self):
+        manager = WebSocketManager(queue_size=2, policy=DISCONNECT)
+        transport = SSETransport(manager.epoch)
+        await manager.connect(transport, "kiosk")
+
+        # Nobody reads the stream: the writer blocks and the outbox fills up
+        for i in range(10):
+            await manager.broadcast_reading({"device_name": "office", "temperature": float(i)})
+        await asyncio.sleep(0.01)
+
+        assert manager.get_connection_count() == 0
+        assert manager.slow_consumer_disconnects == 1
+        assert transport.closed
+
+    async def test_ping_is_a_comment_and_not_reaped(self):
+        manager = WebSocketManager(heartbeat_interval=0.03, heartbeat_timeout=0.03, heartbeat_tick=0.01)
+        transport = SSETransport(manager.epoch)
+        await manager.connect(transport, "kiosk", replies_to_pings=False)
+        stream = transport.stream()
+
+        _, ping = await _next_events(stream, 2)
+        await asyncio.sleep(0.1)
+
+        assert ping == ": ping\n\n"
+        assert manager.get_connection_count() == 1
+        assert manager.reaped == 0
+        await manager.disconnect_all()
+
+    async def test_close_ends_stream(self):
+        transport = SSETransport("epoch")
+        stream = transport.stream()
+        assert (await stream.__anext__()).startswith("retry:")
+
+        await transport.close()
+        with pytest.raises(StopAsyncIteration):
+            await stream.__anext__()
+        with pytest.raises(RuntimeError):
+            await transport.send_text("{}")
@@ -3,12 +3,16 @@
 # ================================
 
 import asyncio
+import json
 from unittest.mock import AsyncMock, MagicMock
 from datetime import datetime, timezone
 
 import pytest
 import pytest_asyncio
-from websocket import WebSocketManager, ConnectionInfo
+from websocket import (
+    WebSocketManager, ConnectionInfo, LatestReadings, Outbox, TimerWheel,
+    COALESCE, DISCONNECT, PROTOCOL_BATCH,
+)
 
 
 @pytest_asyncio.fixture
@@ -20,10 +24,18 @@ def _mock_ws(accept=True):
     ws = AsyncMock()
     ws.accept = AsyncMock()
     ws.send_json = AsyncMock()
+    ws.send_text = AsyncMock()
     ws.close = AsyncMock()
     return ws
 
 
+def _sent(ws, msg_type):
+    """Messages of a given type sent to a mock WebSocket (JSON or text frames)."""
+    messages = [c.args[0] for c in ws.send_json.call_args_list]
+    messages += [json.loads(c.args[0]) for c in ws.send_text.call_args_list]
+    return [m for m in messages if m.get("type") == msg_type]
+
+
 @pytest.mark.asyncio
 class TestWebSocketManager:
 
@@ -65,8 +77,9 @@ class TestWebSocketManager:
         await manager.connect(ws1, "c1")
         await manager.connect(ws2, "c2")
         await manager.broadcast_reading({"device_name": "office", "temperature": 22.0})
-        ws1.send_json.assert_called_once()
-        ws2.send_json.assert_called_once()
+        await manager.flush()
+        assert len(_sent(ws1, "reading")) == 1
+        assert len(_sent(ws2, "reading")) == 1
 
     async def test_broadcast_reading_respects_subscription(self, manager):
         ws1, ws2 = _mock_ws(), _mock_ws()
@@ -74,15 +87,17 @@ class TestWebSocketManager:
         await manager.connect(ws2, "c2")
         await manager.subscribe("c2", {"bedroom"})
         await manager.broadcast_reading({"device_name": "office", "temperature": 22.0})
+        await manager.flush()
         # c1 has no subs → gets everything; c2 subscribed to bedroom → skips office
-        ws1.send_json.assert_called_once()
-        ws2.send_json.assert_not_called()
+        assert len(_sent(ws1, "reading")) == 1
+        assert _sent(ws2, "reading") == []
 
     async def test_broadcast_cleans_up_failed_connections(self, manager):
         ws = _mock_ws()
         ws.send_json.side_effect = Exception("broken pipe")
         await manager.connect(ws, "c1")
         await manager.broadcast_all({"type": "test"})
+        await manager.flush()
         assert manager.get_connection_count() == 0
 
     async def test_disconnect_all(self, manager):
@@ -99,3 +114,570 @@ class TestWebSocketManager:
         assert stats["active_connections"] == 1
         assert stats["clients"][0]["client_id"] == "c1"
         assert stats["clients"][0]["user_id"] == "u1"
+
+
+@pytest.mark.asyncio
+class TestOutbox:
+
+    async def test_drop_oldest_when_full(self):
+        outbox = Outbox(maxsize=2)
+        for i in range(3):
+            assert outbox.put({"n": i}) is True
+        assert len(outbox) == 2
+        assert outbox.dropped == 1
+        message, _ = await outbox.get()
+        assert message == {"n": 1}
+
+    async def test_coalesce_replaces_queued_message(self):
+        outbox = Outbox(maxsize=10, policy=COALESCE)
+        outbox.put({"t": 1}, key="reading:office")
+        outbox.put({"t": 2}, key="reading:bedroom")
+        outbox.put({"t": 3}, key="reading:office")
+        assert len(outbox) == 2
+        assert outbox.coalesced == 1
+        first, _ = await outbox.get()
+        assert first == {"t": 3}
+
+    async def test_disconnect_policy_reports_overflow(self):
+        outbox = Outbox(maxsize=1, policy=DISCONNECT)
+        assert outbox.put({"n": 1}) is True
+        assert outbox.put({"n": 2}) is False
+
+
+@pytest.mark.asyncio
+class TestSlowConsumers:
+
+    async def test_slow_client_does_not_block_others(self):
+        manager = WebSocketManager()
+        release = asyncio.Event()
+
+        slow = _mock_ws()
+
+        async def stalled_send(message):
+            await release.wait()
+
+        slow.send_json.side_effect = stalled_send
+        slow.send_text.side_effect = stalled_send
+        fast = _mock_ws()
+
+        await manager.connect(slow, "slow")
+        await manager.connect(fast, "fast")
+        await manager.broadcast_reading({"device_name": "office", "temperature": 22.0})
+
+        # broadcast returned without waiting on the stalled socket
+        await asyncio.wait_for(manager._connections["fast"].outbox.join(), timeout=1)
+        assert len(_sent(fast, "reading")) == 1
+
+        release.set()
+        await manager.flush()
+        assert len(_sent(slow, "reading")) == 1
+        await manager.disconnect_all()
+
+    async def test_disconnect_policy_closes_slow_client(self):
+        manager = WebSocketManager(queue_size=2, policy=DISCONNECT)
+        release = asyncio.Event()
+
+        slow = _mock_ws()
+
+        async def stalled_send(message):
+            await release.wait()
+
+        slow.send_json.side_effect = stalled_send
+        slow.send_text.side_effect = stalled_send
+        await manager.connect(slow, "slow")
+
+        for i in range(5):
+            await manager.broadcast_reading({"device_name": "office", "temperature": float(i)})
+        await asyncio.sleep(0)
+
+        assert manager.get_connection_count() == 0
+        assert manager.slow_consumer_disconnects == 1
+        slow.close.assert_called_once()
+        assert slow.close.call_args.kwargs["code"] == 1013
+
+    async def test_stats_report_lag(self):
+        manager = WebSocketManager()
+        ws = _mock_ws()
+        await manager.connect(ws, "c1")
+        await manager.broadcast_reading({"device_name": "office", "temperature": 22.0})
+        await manager.flush()
+
+        client = manager.get_stats()["clients"][0]
+        assert client["sent"] == 2  # welcome + reading
+        assert client["queued"] == 0
+        assert client["dropped"] == 0
+        assert client["lag_ms"] >= 0
+        assert client["max_lag_ms"] >= client["lag_ms"]
+        await manager.disconnect_all()
+
+
+@pytest.mark.asyncio
+class TestSubscriptionRouting:
+
+    async def _connect(self, manager, client_id, subscriptions=None):
+        ws = _mock_ws()
+        await manager.connect(ws, client_id)
+        if subscriptions:
+            await manager.subscribe(client_id, set(subscriptions))
+        return ws
+
+    async def test_routes_by_device_and_topic(self, manager):
+        by_device = await self._connect(manager, "c1", ["office"])
+        by_topic = await self._connect(manager, "c2", ["zigbee2mqtt/office"])
+        other = await self._connect(manager, "c3", ["bedroom"])
+
+        await manager.broadcast_reading({"device_name": "office", "topic": "zigbee2mqtt/office"})
+        await manager.flush()
+
+        assert len(_sent(by_device, "reading")) == 1
+        assert len(_sent(by_topic, "reading")) == 1
+        assert _sent(other, "reading") == []
+
+    async def test_glob_subscriptions(self, manager):
+        living = await self._connect(manager, "c1", ["living_*"])
+        everything = await self._connect(manager, "c2", ["zigbee2mqtt/*"])
+
+        await manager.broadcast_reading({"device_name": "living_room", "topic": "zigbee2mqtt/living_room"})
+        await manager.broadcast_reading({"device_name": "kitchen", "topic": "zigbee2mqtt/kitchen"})
+        await manager.flush()
+
+        assert [m["data"]["device_name"] for m in _sent(living, "reading")] == ["living_room"]
+        assert len(_sent(everything, "reading")) == 2
+
+    async def test_pattern_cache_sees_new_patterns(self, manager):
+        ws = await self._connect(manager, "c1", ["kitchen"])
+        await manager.broadcast_reading({"device_name": "living_room"})
+        await manager.subscribe("c1", {"living_*"})
+        await manager.broadcast_reading({"device_name": "living_room"})
+        await manager.flush()
+        assert len(_sent(ws, "reading")) == 1
+
+    async def test_unsubscribing_everything_restores_wildcard(self, manager):
+        ws = await self._connect(manager, "c1", ["office"])
+        await manager.unsubscribe("c1", {"office"})
+        await manager.broadcast_reading({"device_name": "bedroom"})
+        await manager.flush()
+        assert len(_sent(ws, "reading")) == 1
+
+    async def test_disconnect_removes_from_index(self, manager):
+        await self._connect(manager, "c1", ["office", "living_*"])
+        await manager.disconnect("c1")
+        assert manager._index.route("office", "living_room") == set()
+
+
+@pytest.mark.asyncio
+class TestEncodingAndBatching:
+
+    async def test_broadcast_encodes_once(self):
+        manager = WebSocketManager()
+        sockets = [_mock_ws() for _ in range(3)]
+        for i, ws in enumerate(sockets):
+            await manager.connect(ws, f"c{i}")
+
+        await manager.broadcast_reading({"device_name": "office", "temperature": 22.0})
+        await manager.flush()
+
+        assert manager.frames_encoded == 1
+        frames = [ws.send_text.call_args.args[0] for ws in sockets]
+        assert frames[0] is frames[1] is frames[2]
+        await manager.disconnect_all()
+
+    async def test_batch_clients_get_one_frame_per_tick(self):
+        manager = WebSocketManager(batch_interval=0.05)
+        legacy, batched = _mock_ws(), _mock_ws()
+        await manager.connect(legacy, "legacy")
+        await manager.connect(batched, "batched", protocol=PROTOCOL_BATCH)
+
+        for i in range(3):
+            await manager.broadcast_reading({"device_name": f"sensor{i}", "temperature": 20.0 + i})
+
+        await asyncio.sleep(0.1)
+        await manager.flush()
+
+        assert len(_sent(legacy, "reading")) == 3
+        assert _sent(batched, "reading") == []
+        frames = _sent(batched, "readings")
+        assert len(frames) == 1
+        assert [r["device_name"] for r in frames[0]["data"]] == ["sensor0", "sensor1", "sensor2"]
+        await manager.disconnect_all()
+
+    async def test_batch_respects_subscriptions(self):
+        manager = WebSocketManager(batch_interval=0)
+        office, everything = _mock_ws(), _mock_ws()
+        await manager.connect(office, "office", protocol=PROTOCOL_BATCH)
+        await manager.connect(everything, "everything", protocol=PROTOCOL_BATCH)
+        await manager.subscribe("office", {"office"})
+
+        await manager.broadcast_reading({"device_name": "office"})
+        await manager.broadcast_reading({"device_name": "bedroom"})
+        await manager.flush()
+
+        assert [f["data"][0]["device_name"] for f in _sent(office, "readings")] == ["office"]
+        assert len(_sent(everything, "readings")) == 2
+        await manager.disconnect_all()
+
+
+@pytest.mark.asyncio
+class TestThrottlingAndProjection:
+
+    READING = {
+        "time": "2026-01-01T00:00:00+00:00",
+        "topic": "zigbee2mqtt/office",
+        "device_name": "office",
+        "temperature": 21.5,
+        "humidity": 40.0,
+        "raw_data": {"temperature": 21.5, "humidity": 40.0, "voltage": 3000},
+    }
+
+    async def test_fields_projection(self, manager):
+        ws = _mock_ws()
+        await manager.connect(ws, "c1")
+        await manager.subscribe("c1", {"office"}, fields=["temperature"])
+
+        await manager.broadcast_reading(dict(self.READING))
+        await manager.flush()
+
+        data = _sent(ws, "reading")[0]["data"]
+        assert data == {
+            "time": "2026-01-01T00:00:00+00:00",
+            "topic": "zigbee2mqtt/office",
+            "device_name": "office",
+            "temperature": 21.5,
+        }
+
+    async def test_projection_does_not_affect_other_clients(self, manager):
+        slim, full = _mock_ws(), _mock_ws()
+        await manager.connect(slim, "slim")
+        await manager.connect(full, "full")
+        await manager.subscribe("slim", set(), fields=["temperature"])
+
+        await manager.broadcast_reading(dict(self.READING))
+        await manager.flush()
+
+        assert "raw_data" not in _sent(slim, "reading")[0]["data"]
+        assert "raw_data" in _sent(full, "reading")[0]["data"]
+        assert manager.frames_encoded == 2
+
+    async def test_max_rate_keeps_latest_value(self, manager):
+        ws = _mock_ws()
+        await manager.connect(ws, "c1")
+        await manager.subscribe("c1", {"office"}, max_rate=20)  # one per 50ms
+
+        for temperature in (20.0, 21.0, 22.0):
+            await manager.broadcast_reading(dict(self.READING, temperature=temperature))
+        await manager.flush()
+
+        # First goes out immediately, the rest are held
+        assert [m["data"]["temperature"] for m in _sent(ws, "reading")] == [20.0]
+
+        await asyncio.sleep(0.08)
+        await manager.flush()
+        assert [m["data"]["temperature"] for m in _sent(ws, "reading")] == [20.0, 22.0]
+        assert manager.get_stats()["clients"][0]["superseded"] == 1
+
+    async def test_single_held_reading_released_after_interval(self, manager):
+        ws = _mock_ws()
+        await manager.connect(ws, "c1")
+        await manager.subscribe("c1", {"office"}, max_rate=20)  # one per 50ms
+
+        for temperature in (20.0, 21.0):
+            await manager.broadcast_reading(dict(self.READING, temperature=temperature))
+        await manager.flush()
+        assert [m["data"]["temperature"] for m in _sent(ws, "reading")] == [20.0]
+
+        await asyncio.sleep(0.08)
+        await manager.flush()
+        readings = _sent(ws, "reading")
+        assert [m["data"]["temperature"] for m in readings] == [20.0, 21.0]
+        assert readings[1]["seq"] == 2
+
+    async def test_held_reading_dropped_on_unsubscribe(self, manager):
+        ws = _mock_ws()
+        await manager.connect(ws, "c1")
+        await manager.subscribe("c1", {"off*"}, max_rate=20)  # one per 50ms
+        await manager.subscribe("c1", {"kitchen"})
+
+        for temperature in (20.0, 21.0):
+            await manager.broadcast_reading(dict(self.READING, temperature=temperature))
+        await manager.flush()
+        await manager.unsubscribe("c1", {"off*"})
+
+        await asyncio.sleep(0.08)
+        await manager.flush()
+        assert [m["data"]["temperature"] for m in _sent(ws, "reading")] == [20.0]
+        conn = manager._connections["c1"]
+        assert (conn.timers, conn.throttled, conn.last_sent) == ({}, {}, {})
+
+    async def test_max_rate_is_per_device(self, manager):
+        ws = _mock_ws()
+        await manager.connect(ws, "c1")
+        await manager.subscribe("c1", {"office", "bedroom"}, max_rate=1)
+
+        await manager.broadcast_reading(dict(self.READING))
+        await manager.broadcast_reading(dict(self.READING, device_name="bedroom", topic="zigbee2mqtt/bedroom"))
+        await manager.flush()
+
+        assert len(_sent(ws, "reading")) == 2
+        await manager.disconnect_all()
+
+    async def test_invalid_options_rejected(self, manager):
+        await manager.connect(_mock_ws(), "c1")
+        with pytest.raises(ValueError):
+            await manager.subscribe("c1", {"office"}, max_rate=0)
+        with pytest.raises(ValueError):
+            await manager.subscribe("c1", {"office"}, fields="temperature")
+
+    async def test_unsubscribe_clears_options(self, manager):
+        ws = _mock_ws()
+        await manager.connect(ws, "c1")
+        await manager.subscribe("c1", {"office", "bedroom"}, fields=["temperature"])
+        await manager.unsubscribe("c1", {"office"})
+        stats = manager.get_stats()["clients"][0]
+        assert list(stats["options"]) == ["bedroom"]
+
+
+@pytest.mark.asyncio
+class TestResume:
+
+    async def test_readings_carry_sequence_numbers(self, manager):
+        ws = _mock_ws()
+        await manager.connect(ws, "c1")
+        await manager.broadcast_reading({"device_name": "office"})
+        await manager.broadcast_reading({"device_name": "bedroom"})
+        await manager.flush()
+
+        assert _sent(ws, "connected")[0]["seq"] == 0
+        assert [m["seq"] for m in _sent(ws, "reading")] == [1, 2]
+
+    async def test_batch_frame_seq_is_last_reading(self):
+        manager = WebSocketManager(batch_interval=0.05)
+        ws = _mock_ws()
+        await manager.connect(ws, "c1", protocol=PROTOCOL_BATCH)
+
+        for i in range(3):
+            await manager.broadcast_reading({"device_name": f"sensor{i}"})
+        await asyncio.sleep(0.1)
+        await manager.flush()
+
+        assert _sent(ws, "readings")[0]["seq"] == 3
+        await manager.disconnect_all()
+
+    async def test_resume_replays_missed_readings(self, manager):
+        for device in ("office", "bedroom", "office"):
+            await manager.broadcast_reading({"device_name": device})
+
+        ws = _mock_ws()
+        await manager.connect(ws, "c1")
+        await manager.subscribe("c1", {"office"})
+        assert manager.resume("c1", 1, manager.epoch)
+        await manager.flush()
+
+        assert [m["seq"] for m in _sent(ws, "reading")] == [3]
+        resumed = _sent(ws, "resumed")[0]
+        assert resumed["from"] == 1
+        assert resumed["seq"] == 3
+        assert resumed["count"] == 1
+
+    async def test_resume_batch_client_gets_one_frame(self, manager):
+        for i in range(3):
+            await manager.broadcast_reading({"device_name": f"sensor{i}"})
+
+        ws = _mock_ws()
+        await manager.connect(ws, "c1", protocol=PROTOCOL_BATCH)
+        manager.resume("c1", 0)
+        await manager.flush()
+
+        frames = _sent(ws, "readings")
+        assert len(frames) == 1
+        assert frames[0]["seq"] == 3
+        assert [r["device_name"] for r in frames[0]["data"]] == ["sensor0", "sensor1", "sensor2"]
+
+    async def test_gap_too_large(self):
+        manager = WebSocketManager(replay_size=2)
+        for i in range(5):
+            await manager.broadcast_reading({"device_name": f"sensor{i}"})
+
+        ws = _mock_ws()
+        await manager.connect(ws, "c1")
+        assert not manager.resume("c1", 1)
+        assert manager.resume("c1", 3)
+        await manager.flush()
+
+        assert _sent(ws, "gap")[0]["reason"] == "gap_too_large"
+        assert [m["seq"] for m in _sent(ws, "reading")] == [4, 5]
+        assert manager.get_stats()["gaps"] == 1
+
+    async def test_epoch_mismatch_is_a_gap(self, manager):
+        await manager.broadcast_reading({"device_name": "office"})
+
+        ws = _mock_ws()
+        await manager.connect(ws, "c1")
+        assert not manager.resume("c1", 0, epoch="restarted")
+        await manager.flush()
+
+        gap = _sent(ws, "gap")[0]
+        assert gap["reason"] == "epoch_changed"
+        assert gap["epoch"] == manager.epoch
+        assert _sent(ws, "reading") == []
+
+
+class TestTimerWheel:
+
+    @pytest.mark.asyncio
+    async def test_keys_fire_in_due_buckets(self):
+        fired = []
+        wheel = TimerWheel(lambda keys: fired.append(sorted(keys)), tick=0.01, slots=8)
+        wheel.schedule("a", 0.01)
+        wheel.schedule("b", 0.03)
+        wheel.schedule("c", 0.03)
+        wheel.schedule("d", 0.03)
+        wheel.cancel("d")
+
+        await asyncio.sleep(0.08)
+        assert fired == [["a"], ["b", "c"]]
+        assert len(wheel) == 0
+
+    @pytest.mark.asyncio
+    async def test_reschedule_moves_key(self):
+        fired = []
+        wheel = TimerWheel(lambda keys: fired.extend(keys), tick=0.01, slots=16)
+        wheel.schedule("a", 0.01)
+        wheel.schedule("a", 0.1)
+
+        await asyncio.sleep(0.04)
+        assert fired == []
+        wheel.stop()
+
+
+@pytest.mark.asyncio
+class TestHeartbeat:
+
+    @staticmethod
+    def _manager():
+        return WebSocketManager(heartbeat_interval=0.05, heartbeat_timeout=0.05, heartbeat_tick=0.01)
+
+    async def test_idle_connection_is_pinged(self):
+        manager = self._manager()
+        ws = _mock_ws()
+        await manager.connect(ws, "c1")
+
+        await asyncio.sleep(0.08)
+        await manager.flush()
+
+        assert len(_sent(ws, "ping")) == 1
+        assert manager.get_stats()["clients"][0]["awaiting_pong"]
+        await manager.disconnect_all()
+
+    async def test_unanswered_ping_reaps_connection(self):
+        manager = self._manager()
+        ws = _mock_ws()
+        await manager.connect(ws, "c1")
+
+        await asyncio.sleep(0.2)
+
+        assert manager.get_connection_count() == 0
+        assert manager.get_stats()["heartbeat"]["reaped"] == 1
+        ws.close.assert_called_once()
+        assert ws.close.call_args.kwargs["code"] == 1001
+
+    async def test_active_connection_is_not_pinged(self):
+        manager = self._manager()
+        ws = _mock_ws()
+        await manager.connect(ws, "c1")
+
+        for _ in range(10):
+            await asyncio.sleep(0.02)
+            manager.mark_alive("c1")
+        await manager.flush()
+
+        assert _sent(ws, "ping") == []
+        assert manager.get_connection_count() == 1
+        await manager.disconnect_all()
+
+    async def test_pong_keeps_connection(self):
+        manager = self._manager()
+        ws = _mock_ws()
+        await manager.connect(ws, "c1")
+
+        await asyncio.sleep(0.08)
+        manager.mark_alive("c1")
+        await asyncio.sleep(0.05)
+
+        assert manager.get_connection_count() == 1
+        assert manager.get_stats()["heartbeat"]["reaped"] == 0
+        await manager.disconnect_all()
+
+    async def test_disconnect_cancels_heartbeat(self, manager):
+        await manager.connect(_mock_ws(), "c1")
+        await manager.disconnect("c1")
+        assert manager.get_stats()["heartbeat"]["scheduled"] == 0
+
+
+class TestLatestReadings:
+
+    def test_keeps_newest_per_device(self):
+        latest = LatestReadings()
+        t0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        t1 = datetime(2026, 1, 1, 0, 1, tzinfo=timezone.utc)
+
+        assert latest.update({"device_name": "office", "time": t1, "temperature": 21.0})
+        assert not latest.update({"device_name": "office", "time": t0, "temperature": 19.0})
+        assert latest.update({"device_name": "bedroom", "time": t0})
+
+        assert len(latest) == 2
+        assert latest.select({"office"})[0]["temperature"] == 21.0
+
+    def test_select_by_topic_and_pattern(self):
+        latest = LatestReadings()
+        latest.seed([
+            {"device_name": "living_room", "topic": "zigbee2mqtt/living_room"},
+            {"device_name": "living_kitchen", "topic": "zigbee2mqtt/living_kitchen"},
+            {"device_name": "office", "topic": "zigbee2mqtt/office"},
+        ])
+
+        assert [r["device_name"] for r in latest.select({"living_*"})] == ["living_kitchen", "living_room"]
+        assert [r["device_name"] for r in latest.select({"zigbee2mqtt/office"})] == ["office"]
+        assert len(latest.select(set())) == 3
+
+
+@pytest.mark.asyncio
+class TestSnapshot:
+
+    async def test_snapshot_of_subscribed_devices(self, manager):
+        now = datetime.now(timezone.utc)
+        await manager.broadcast_reading({"device_name": "office", "time": now, "temperature": 21.0})
+        await manager.broadcast_reading({"device_name": "bedroom", "time": now, "temperature": 18.0})
+        await manager.broadcast_reading({"device_name": "office", "time": now, "temperature": 22.0})
+
+        ws = _mock_ws()
+        await manager.connect(ws, "c1")
+        await manager.subscribe("c1", {"office"})
+        assert manager.send_snapshot("c1", {"office"}) == 1
+        await manager.flush()
+
+        snapshot = _sent(ws, "snapshot")[0]
+        assert snapshot["seq"] == 3
+        assert snapshot["data"][0]["temperature"] == 22.0
+        assert snapshot["data"][0]["last_seen_minutes"] == 0
+
+    async def test_snapshot_applies_projection(self, manager):
+        await manager.broadcast_reading({"device_name": "office", "temperature": 21.0, "humidity": 40.0})
+
+        ws = _mock_ws()
+        await manager.connect(ws, "c1")
+        await manager.subscribe("c1", {"office"}, fields=["humidity"])
+        manager.send_snapshot("c1", {"office"})
+        await manager.flush()
+
+        assert _sent(ws, "snapshot")[0]["data"] == [{"device_name": "office", "humidity": 40.0}]
+
+    async def test_seeded_cache_without_live_readings(self, manager):
+        manager.latest.seed([{"device_name": "office", "temperature": 20.0}])
+
+        ws = _mock_ws()
+        await manager.connect(ws, "c1")
+        manager.send_snapshot("c1", set())
+        await manager.flush()
+
+        assert _sent(ws, "snapshot")[0]["data"] == [{"device_name": "office", "temperature": 20.0}]
+        assert manager.get_stats()["snapshots"] == 1
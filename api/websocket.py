@@ -3,16 +3,409 @@
 # ================================
 
 import asyncio
+import fnmatch
 import json
+import math
+import re
+import time
+import uuid
+from collections import deque
 from datetime import datetime, timezone
-from typing import Dict, Set, Any, Optional
+from typing import Callable, Deque, Dict, Iterable, List, Set, Any, Optional, Pattern, Tuple, Union
 from fastapi import WebSocket, WebSocketDisconnect
 from dataclasses import dataclass, field
 import logging
 
+from config import settings
+from responses import dumps
+
 logger = logging.getLogger(__name__)
 
 
+# Protocol versions (negotiated with ?protocol= on connect)
+PROTOCOL_LEGACY = 1  # one {"type": "reading"} frame per reading
+PROTOCOL_BATCH = 2   # readings within a tick batched into {"type": "readings"}
+
+# A queued frame: pre-encoded JSON text (shared by recipients) or a dict
+Frame = Union[str, Dict[str, Any]]
+
+# Slow-consumer policies for a full outbox
+DROP_OLDEST = "drop_oldest"   # discard the oldest queued message
+COALESCE = "coalesce"         # replace a queued reading for the same device
+DISCONNECT = "disconnect"     # close the connection
+SLOW_CONSUMER_POLICIES = (DROP_OLDEST, COALESCE, DISCONNECT)
+
+# Server heartbeat, encoded once
+PING_FRAME = '{"type":"ping"}'
+
+
+class Outbox:
+    """
+    Bounded outbound message queue for one connection.
+    
+    Messages may carry a coalesce key; under the coalesce policy a new
+    message replaces a queued one with the same key in place instead of
+    growing the queue. `put` never blocks.
+    """
+    
+    def __init__(self, maxsize: int = 256, policy: str = DROP_OLDEST):
+        self.maxsize = maxsize
+        self.policy = policy
+        # Entries are [message, coalesce_key, enqueued_at]
+        self._items: Deque[list] = deque()
+        self._keyed: Dict[str, list] = {}
+        self._ready = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._in_flight = 0
+        self.closed = False
+        
+        self.dropped = 0
+        self.coalesced = 0
+    
+    def put(self, message: Frame, key: Optional[str] = None) -> bool:
+        """
+        Queue a message.
+        
+        Returns False if the outbox overflowed under the disconnect policy.
+        """
+        if self.closed:
+            return True
+        
+        now = time.monotonic()
+        
+        if self.policy != COALESCE:
+            key = None
+        
+        if key is not None:
+            entry = self._keyed.get(key)
+            if entry is not None:
+                entry[0] = message
+                entry[2] = now
+                self.coalesced += 1
+                return True
+        
+        if len(self._items) >= self.maxsize:
+            if self.policy == DISCONNECT:
+                return False
+            oldest = self._items.popleft()
+            if oldest[1] is not None:
+                self._keyed.pop(oldest[1], None)
+            self.dropped += 1
+        
+        entry = [message, key, now]
+        self._items.append(entry)
+        if key is not None:
+            self._keyed[key] = entry
+        
+        self._idle.clear()
+        self._ready.set()
+        return True
+    
+    async def get(self) -> Tuple[Frame, float]:
+        """Wait for the next message; returns (message, enqueued_at)."""
+        while not self._items:
+            self._ready.clear()
+            await self._ready.wait()
+        
+        message, key, enqueued_at = self._items.popleft()
+        if key is not None:
+            del self._keyed[key]
+        self._in_flight += 1
+        return message, enqueued_at
+    
+    def task_done(self):
+        """Mark the message returned by get() as sent."""
+        self._in_flight -= 1
+        if not self._items and not self._in_flight:
+            self._idle.set()
+    
+    def close(self):
+        """Discard queued messages and release anyone waiting in join()."""
+        self.closed = True
+        self._items.clear()
+        self._keyed.clear()
+        self._in_flight = 0
+        self._idle.set()
+    
+    async def join(self):
+        """Wait until every queued message has been sent."""
+        await self._idle.wait()
+    
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class SubscriptionIndex:
+    """
+    Inverted index from device name / topic to subscribed client ids.
+    
+    Clients with no subscriptions are in the wildcard set and receive
+    everything. Subscriptions containing glob characters (`living_*`,
+    `zigbee2mqtt/*`) are compiled once; the patterns matching a given name
+    are cached until the set of patterns changes, so routing a reading costs
+    time proportional to the clients who want it.
+    """
+    
+    MAX_CACHED_NAMES = 4096
+    
+    def __init__(self):
+        self._exact: Dict[str, Set[str]] = {}
+        self._patterns: Dict[str, Tuple[Pattern, Set[str]]] = {}
+        self._wildcard: Set[str] = set()
+        self._matches: Dict[str, Tuple[str, ...]] = {}
+    
+    @staticmethod
+    def is_pattern(name: str) -> bool:
+        return any(c in name for c in "*?[")
+    
+    def add_client(self, client_id: str):
+        """Add a client to the wildcard set (no subscriptions, receives everything)."""
+        self._wildcard.add(client_id)
+    
+    def subscribe(self, client_id: str, names: Set[str]):
+        for name in names:
+            if self.is_pattern(name):
+                entry = self._patterns.get(name)
+                if entry is None:
+                    entry = (re.compile(fnmatch.translate(name)), set())
+                    self._patterns[name] = entry
+                    self._matches.clear()
+                entry[1].add(client_id)
+            else:
+                self._exact.setdefault(name, set()).add(client_id)
+        
+        if names:
+            self._wildcard.discard(client_id)
+    
+    def unsubscribe(self, client_id: str, names: Set[str]):
+        """Remove subscriptions (the client is not moved back to the wildcard set)."""
+        for name in names:
+            if self.is_pattern(name):
+                entry = self._patterns.get(name)
+                if entry is not None:
+                    entry[1].discard(client_id)
+                    if not entry[1]:
+                        del self._patterns[name]
+                        self._matches.clear()
+            else:
+                clients = self._exact.get(name)
+                if clients is not None:
+                    clients.discard(client_id)
+                    if not clients:
+                        del self._exact[name]
+    
+    def remove_client(self, client_id: str, names: Set[str]):
+        """Drop a client and all its subscriptions."""
+        self.unsubscribe(client_id, names)
+        self._wildcard.discard(client_id)
+    
+    def _matching_patterns(self, name: str) -> Tuple[str, ...]:
+        matches = self._matches.get(name)
+        if matches is None:
+            matches = tuple(
+                pattern for pattern, (regex, _) in self._patterns.items()
+                if regex.match(name)
+            )
+            if len(self._matches) >= self.MAX_CACHED_NAMES:
+                self._matches.clear()
+            self._matches[name] = matches
+        return matches
+    
+    def route(self, *names: str) -> Set[str]:
+        """Return the ids of clients that want a message for any of `names`."""
+        targets = set(self._wildcard)
+        
+        for name in names:
+            if not name:
+                continue
+            clients = self._exact.get(name)
+            if clients:
+                targets |= clients
+            if self._patterns:
+                for pattern in self._matching_patterns(name):
+                    targets |= self._patterns[pattern][1]
+        
+        return targets
+    
+    def is_subscribed(self, client_id: str, *names: str) -> bool:
+        """Whether a client's own subscriptions (not the wildcard set) cover any of `names`."""
+        for name in names:
+            if not name:
+                continue
+            if client_id in self._exact.get(name, ()):
+                return True
+            if self._patterns and any(
+                client_id in self._patterns[pattern][1] for pattern in self._matching_patterns(name)
+            ):
+                return True
+        return False
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel: one event-loop timer for any number of timeouts.
+    
+    Keys are bucketed into `slots` buckets `tick` seconds apart and the
+    callback receives all keys of a bucket at once when it comes due.
+    Delays beyond the wheel's span are clamped, so callbacks should
+    re-check and reschedule. The loop timer only runs while keys are
+    scheduled.
+    """
+    
+    def __init__(self, callback: Callable[[Set[str]], None], tick: float = 1.0, slots: int = 64):
+        self.callback = callback
+        self.tick = tick
+        self._slots: List[Set[str]] = [set() for _ in range(max(slots, 2))]
+        self._where: Dict[str, int] = {}
+        self._cursor = 0
+        self._handle: Optional[asyncio.TimerHandle] = None
+    
+    def schedule(self, key: str, delay: float):
+        """(Re)schedule a key to fire after roughly `delay` seconds."""
+        self.cancel(key)
+        ticks = min(max(1, math.ceil(delay / self.tick)), len(self._slots) - 1)
+        slot = (self._cursor + ticks) % len(self._slots)
+        self._slots[slot].add(key)
+        self._where[key] = slot
+        
+        if self._handle is None:
+            loop = asyncio.get_running_loop()
+            self._handle = loop.call_later(self.tick, self._advance)
+    
+    def cancel(self, key: str):
+        slot = self._where.pop(key, None)
+        if slot is not None:
+            self._slots[slot].discard(key)
+    
+    def _advance(self):
+        self._handle = None
+        self._cursor = (self._cursor + 1) % len(self._slots)
+        due = self._slots[self._cursor]
+        self._slots[self._cursor] = set()
+        for key in due:
+            del self._where[key]
+        
+        if due:
+            try:
+                self.callback(due)
+            except Exception:
+                logger.exception("Timer wheel callback failed")
+        
+        if self._where and self._handle is None:
+            loop = asyncio.get_running_loop()
+            self._handle = loop.call_later(self.tick, self._advance)
+    
+    def stop(self):
+        """Cancel everything."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        for slot in self._slots:
+            slot.clear()
+        self._where.clear()
+    
+    def __len__(self) -> int:
+        return len(self._where)
+
+
+class LatestReadings:
+    """
+    Most recent reading per device, kept current from broadcast readings.
+    
+    Serves subscribe snapshots without touching the database. An older
+    reading arriving late never replaces a newer one.
+    """
+    
+    def __init__(self):
+        self._readings: Dict[str, Dict[str, Any]] = {}
+    
+    def update(self, reading: Dict[str, Any]) -> bool:
+        """Store a reading if it's the newest for its device."""
+        device_name = reading.get("device_name")
+        if not device_name:
+            return False
+        
+        current = self._readings.get(device_name)
+        if current is not None:
+            new_time, current_time = reading.get("time"), current.get("time")
+            if (
+                new_time is not None and current_time is not None
+                and type(new_time) is type(current_time)
+                and new_time < current_time
+            ):
+                return False
+        
+        self._readings[device_name] = reading
+        return True
+    
+    def seed(self, readings: Iterable[Dict[str, Any]]):
+        """Prime the cache (e.g. from the latest_readings view on startup)."""
+        for reading in readings:
+            self.update(reading)
+    
+    def select(self, names: Set[str]) -> List[Dict[str, Any]]:
+        """Latest readings whose device name or topic matches `names` (all if empty)."""
+        readings = sorted(self._readings.values(), key=lambda r: r.get("device_name", ""))
+        if not names:
+            return readings
+        
+        exact = {name for name in names if not SubscriptionIndex.is_pattern(name)}
+        patterns = [name for name in names if SubscriptionIndex.is_pattern(name)]
+        return [
+            reading for reading in readings
+            if reading.get("device_name") in exact
+            or reading.get("topic") in exact
+            or any(
+                fnmatch.fnmatchcase(reading.get("device_name", ""), pattern)
+                or fnmatch.fnmatchcase(reading.get("topic", ""), pattern)
+                for pattern in patterns
+            )
+        ]
+    
+    def __len__(self) -> int:
+        return len(self._readings)
+
+
+# Always included when a subscription projects fields
+IDENTITY_FIELDS = ("time", "topic", "device_name")
+
+
+@dataclass(frozen=True)
+class SubscriptionOptions:
+    """Per-subscription delivery options."""
+    max_rate: Optional[float] = None          # updates/second per device, latest wins
+    fields: Optional[Tuple[str, ...]] = None  # projection (plus IDENTITY_FIELDS)
+    
+    @classmethod
+    def parse(cls, max_rate: Any = None, fields: Any = None) -> "SubscriptionOptions":
+        """Validate options from a subscribe message; raises ValueError."""
+        if max_rate is not None:
+            if isinstance(max_rate, bool) or not isinstance(max_rate, (int, float)) or max_rate <= 0:
+                raise ValueError("max_rate must be a positive number of updates per second")
+            max_rate = float(max_rate)
+        
+        if fields is not None:
+            if not isinstance(fields, list) or not all(isinstance(f, str) for f in fields):
+                raise ValueError("fields must be a list of field names")
+            fields = tuple(f for f in dict.fromkeys(fields) if f not in IDENTITY_FIELDS)
+        
+        return cls(max_rate=max_rate, fields=fields)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "max_rate": self.max_rate,
+            "fields": list(self.fields) if self.fields is not None else None,
+        }
+
+
+def project(reading: Dict[str, Any], fields: Optional[Tuple[str, ...]]) -> Dict[str, Any]:
+    """Keep only the identity fields and `fields` of a reading."""
+    if fields is None:
+        return reading
+    return {k: reading[k] for k in IDENTITY_FIELDS + fields if k in reading}
+
+
 @dataclass
 class ConnectionInfo:
     """Information about a WebSocket connection."""
@@ -20,6 +413,51 @@ class ConnectionInfo:
     user_id: Optional[str] = None
     connected_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
     subscriptions: Set[str] = field(default_factory=set)
+    protocol: int = PROTOCOL_LEGACY
+    outbox: Outbox = field(default_factory=Outbox)
+    writer: Optional[asyncio.Task] = None
+    sent: int = 0
+    lag_ms: float = 0.0
+    max_lag_ms: float = 0.0
+    # Subscription name (or "*" for all) -> delivery options
+    options: Dict[str, SubscriptionOptions] = field(default_factory=dict)
+    # Throttling state per device: last delivery, pending latest value, timer
+    last_sent: Dict[str, float] = field(default_factory=dict)
+    throttled: Dict[str, Tuple[int, Dict[str, Any], Optional[Tuple[str, ...]]]] = field(default_factory=dict)
+    timers: Dict[str, asyncio.TimerHandle] = field(default_factory=dict)
+    superseded: int = 0
+    # Heartbeat: last message from the client, unanswered ping. One-way
+    # transports (SSE) can't reply; pings only keep their stream alive.
+    last_seen: float = field(default_factory=time.monotonic)
+    ping_sent_at: Optional[float] = None
+    replies_to_pings: bool = True
+    
+    def wants(self, device_name: str, topic: str) -> bool:
+        """Whether this client's subscriptions cover a reading."""
+        if not self.subscriptions or device_name in self.subscriptions or topic in self.subscriptions:
+            return True
+        return any(
+            SubscriptionIndex.is_pattern(name) and (
+                fnmatch.fnmatchcase(device_name, name) or fnmatch.fnmatchcase(topic, name)
+            )
+            for name in self.subscriptions
+        )
+    
+    def options_for(self, device_name: str, topic: str) -> Optional[SubscriptionOptions]:
+        """Options of the subscription a reading matched, if any."""
+        if not self.options:
+            return None
+        
+        for name in (device_name, topic):
+            if name in self.options:
+                return self.options[name]
+        
+        for name, options in self.options.items():
+            if SubscriptionIndex.is_pattern(name) and (
+                fnmatch.fnmatchcase(device_name, name) or fnmatch.fnmatchcase(topic, name)
+            ):
+                return options
+        return None
 
 
 class WebSocketManager:
@@ -31,54 +469,286 @@ class WebSocketManager:
     - Broadcast to all clients
     - Topic-based subscriptions
     - Automatic cleanup on disconnect
+    - Per-connection bounded outbox drained by its own writer task, so a
+      slow client never delays the others
+    - Broadcast frames encoded once and shared by all recipients
+    - Readings batched per tick for clients that negotiated PROTOCOL_BATCH
+    - Per-subscription throttling (max_rate) and field projection (fields)
+    - Sequence-numbered readings and a replay ring so reconnecting clients
+      can resume where they left off
+    - Server heartbeat: idle connections are pinged and reaped if they
+      don't answer, scheduled on a single timer wheel
+    - Latest reading per device cached in memory for subscribe snapshots
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        queue_size: int = 256,
+        policy: str = DROP_OLDEST,
+        batch_interval: float = 0.1,
+        replay_size: int = 1000,
+        heartbeat_interval: float = 30.0,
+        heartbeat_timeout: float = 10.0,
+        heartbeat_tick: float = 1.0,
+    ):
+        if policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {policy}")
+        
         self._connections: Dict[str, ConnectionInfo] = {}
+        self._index = SubscriptionIndex()
         self._lock = asyncio.Lock()
+        self.queue_size = queue_size
+        self.policy = policy
+        self.slow_consumer_disconnects = 0
+        
+        # Readings waiting for the next batch tick, with their batch
+        # recipients and each recipient's projection
+        self.batch_interval = batch_interval
+        self._batch: List[Tuple[int, Dict[str, Any], List[Tuple[str, Optional[Tuple[str, ...]]]]]] = []
+        self._batch_handle: Optional[asyncio.TimerHandle] = None
+        self.frames_encoded = 0
+        
+        # Readings are numbered per process; the epoch changes on restart
+        # (and differs between workers) so stale sequence numbers are detected.
+        self.epoch = uuid.uuid4().hex[:12]
+        self._seq = 0
+        self._replay: Deque[Tuple[int, Dict[str, Any]]] = deque(maxlen=replay_size)
+        self.resumes = 0
+        self.gaps = 0
+        
+        # Connections with no message for heartbeat_interval are pinged and
+        # reaped if nothing arrives within heartbeat_timeout (0 disables)
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self._heartbeats = TimerWheel(
+            self._check_heartbeats,
+            tick=heartbeat_tick,
+            slots=math.ceil(max(heartbeat_interval, heartbeat_timeout) / heartbeat_tick) + 1,
+        )
+        self.pings_sent = 0
+        self.reaped = 0
+        
+        self.latest = LatestReadings()
+        self.snapshots = 0
     
     async def connect(
         self,
         websocket: WebSocket,
         client_id: str,
         user_id: Optional[str] = None,
+        protocol: int = PROTOCOL_LEGACY,
+        replies_to_pings: bool = True,
     ):
-        """Accept and register a new WebSocket connection."""
+        """
+        Accept and register a new connection.
+        
+        `websocket` may be any transport with the WebSocket send/close
+        methods (see sse.SSETransport).
+        """
         await websocket.accept()
         
+        conn = ConnectionInfo(
+            websocket=websocket,
+            user_id=user_id,
+            protocol=protocol,
+            replies_to_pings=replies_to_pings,
+            outbox=Outbox(self.queue_size, self.policy),
+        )
+        
         async with self._lock:
-            self._connections[client_id] = ConnectionInfo(
-                websocket=websocket,
-                user_id=user_id,
-            )
+            self._connections[client_id] = conn
+            self._index.add_client(client_id)
+        
+        conn.writer = asyncio.create_task(self._writer(client_id, conn))
+        if self.heartbeat_interval > 0:
+            self._heartbeats.schedule(client_id, self.heartbeat_interval)
         
         logger.info(f"WebSocket connected: {client_id}")
         
         # Send welcome message
-        await self._send_to_client(client_id, {
+        self.send_to_client(client_id, {
             "type": "connected",
             "client_id": client_id,
+            "protocol": protocol,
+            "epoch": self.epoch,
+            "seq": self._seq,
             "timestamp": datetime.now(timezone.utc).isoformat(),
         })
     
+    async def _writer(self, client_id: str, conn: ConnectionInfo):
+        """Drain a connection's outbox onto its socket."""
+        outbox = conn.outbox
+        
+        while True:
+            message, enqueued_at = await outbox.get()
+            try:
+                if isinstance(message, str):
+                    await conn.websocket.send_text(message)
+                else:
+                    await conn.websocket.send_json(message)
+            except Exception as e:
+                logger.warning(f"Failed to send to {client_id}: {e}")
+                outbox.close()
+                self._remove(client_id, conn)
+                return
+            
+            conn.sent += 1
+            conn.lag_ms = round((time.monotonic() - enqueued_at) * 1000, 2)
+            conn.max_lag_ms = max(conn.max_lag_ms, conn.lag_ms)
+            outbox.task_done()
+    
+    def _remove(self, client_id: str, conn: Optional[ConnectionInfo] = None) -> Optional[ConnectionInfo]:
+        """Unregister a connection and stop its writer."""
+        current = self._connections.get(client_id)
+        if current is None or (conn is not None and current is not conn):
+            return None
+        
+        del self._connections[client_id]
+        self._index.remove_client(client_id, current.subscriptions)
+        self._heartbeats.cancel(client_id)
+        for timer in current.timers.values():
+            timer.cancel()
+        current.timers.clear()
+        current.outbox.close()
+        if current.writer is not None and current.writer is not asyncio.current_task():
+            current.writer.cancel()
+        return current
+    
     async def disconnect(self, client_id: str):
         """Remove a WebSocket connection."""
         async with self._lock:
-            if client_id in self._connections:
-                del self._connections[client_id]
+            if self._remove(client_id):
                 logger.info(f"WebSocket disconnected: {client_id}")
     
-    async def subscribe(self, client_id: str, topics: Set[str]):
-        """Subscribe a client to specific device topics."""
+    async def _close_slow_consumer(self, client_id: str, conn: ConnectionInfo):
+        """Disconnect a client whose outbox overflowed."""
+        if self._remove(client_id, conn) is None:
+            return
+        
+        self.slow_consumer_disconnects += 1
+        logger.warning(f"Disconnecting slow WebSocket consumer: {client_id}")
+        try:
+            await conn.websocket.close(code=1013, reason="Client too slow")
+        except Exception:
+            pass
+    
+    def mark_alive(self, client_id: str):
+        """Record a message from a client (any message answers a ping)."""
+        conn = self._connections.get(client_id)
+        if conn is not None:
+            conn.last_seen = time.monotonic()
+            conn.ping_sent_at = None
+    
+    def _check_heartbeats(self, client_ids: Iterable[str]):
+        """Timer wheel callback: ping idle connections, reap unresponsive ones."""
+        now = time.monotonic()
+        
+        for client_id in client_ids:
+            conn = self._connections.get(client_id)
+            if conn is None:
+                continue
+            
+            if conn.ping_sent_at is not None:
+                waited = now - conn.ping_sent_at
+                if waited >= self.heartbeat_timeout:
+                    asyncio.create_task(self._reap(client_id, conn))
+                else:
+                    self._heartbeats.schedule(client_id, self.heartbeat_timeout - waited)
+                continue
+            
+            idle = now - conn.last_seen
+            if idle >= self.heartbeat_interval:
+                self.pings_sent += 1
+                self._enqueue(client_id, conn, PING_FRAME)
+                if conn.replies_to_pings:
+                    conn.ping_sent_at = now
+                    self._heartbeats.schedule(client_id, self.heartbeat_timeout)
+                else:
+                    conn.last_seen = now
+                    self._heartbeats.schedule(client_id, self.heartbeat_interval)
+            else:
+                self._heartbeats.schedule(client_id, self.heartbeat_interval - idle)
+    
+    async def _reap(self, client_id: str, conn: ConnectionInfo):
+        """Disconnect a client that didn't answer a ping."""
+        if self._remove(client_id, conn) is None:
+            return
+        
+        self.reaped += 1
+        logger.warning(f"Reaping unresponsive WebSocket connection: {client_id}")
+        try:
+            await conn.websocket.close(code=1001, reason="Heartbeat timeout")
+        except Exception:
+            pass
+    
+    def _encode(self, message: Dict[str, Any]) -> str:
+        """Encode a broadcast frame once for all of its recipients."""
+        self.frames_encoded += 1
+        return dumps(message).decode()
+    
+    def _enqueue(self, client_id: str, conn: ConnectionInfo, message: Frame, key: Optional[str] = None):
+        """Queue a message for a connection, applying the slow-consumer policy."""
+        if not conn.outbox.put(message, key):
+            asyncio.create_task(self._close_slow_consumer(client_id, conn))
+    
+    async def subscribe(
+        self,
+        client_id: str,
+        topics: Set[str],
+        max_rate: Optional[float] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Optional[SubscriptionOptions]:
+        """
+        Subscribe a client to specific device topics.
+        
+        `max_rate` and `fields` apply to these topics, or to everything the
+        client receives when `topics` is empty. Raises ValueError for
+        invalid options.
+        """
+        options = None
+        if max_rate is not None or fields is not None:
+            options = SubscriptionOptions.parse(max_rate, fields)
+        
         async with self._lock:
             if client_id in self._connections:
-                self._connections[client_id].subscriptions.update(topics)
+                conn = self._connections[client_id]
+                conn.subscriptions.update(topics)
+                self._index.subscribe(client_id, topics)
+                
+                for name in topics or {"*"}:
+                    if options is not None:
+                        conn.options[name] = options
+                    else:
+                        conn.options.pop(name, None)
+        
+        return options
     
     async def unsubscribe(self, client_id: str, topics: Set[str]):
         """Unsubscribe a client from specific device topics."""
         async with self._lock:
             if client_id in self._connections:
-                self._connections[client_id].subscriptions -= topics
+                conn = self._connections[client_id]
+                topics = topics & conn.subscriptions
+                conn.subscriptions -= topics
+                for name in topics:
+                    conn.options.pop(name, None)
+                self._index.unsubscribe(client_id, topics)
+                if not conn.subscriptions:
+                    self._index.add_client(client_id)
+                self._drop_throttle_state(client_id, conn)
+    
+    def _drop_throttle_state(self, client_id: str, conn: ConnectionInfo):
+        """Forget held readings and send times of devices no subscription covers any more."""
+        for device in set(conn.last_sent) | set(conn.throttled):
+            held = conn.throttled.get(device)
+            topic = held[1].get("topic", "") if held is not None else ""
+            if self._index.is_subscribed(client_id, device, topic):
+                continue
+            timer = conn.timers.pop(device, None)
+            if timer is not None:
+                timer.cancel()
+            conn.throttled.pop(device, None)
+            conn.last_sent.pop(device, None)
     
     async def broadcast_reading(self, reading: Dict[str, Any]):
         """
@@ -86,62 +756,288 @@ class WebSocketManager:
         
         Only sends to clients subscribed to the device's topic,
         or to all clients if they have no subscriptions (subscribe to all).
+        Subscriptions may be glob patterns such as `living_*`.
+        Messages are queued per client; this never waits on a socket.
         """
-        message = {
-            "type": "reading",
-            "data": reading,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-        }
-        
         device_name = reading.get("device_name", "")
         topic = reading.get("topic", "")
         
-        async with self._lock:
-            disconnected = []
+        self._seq += 1
+        seq = self._seq
+        self._replay.append((seq, reading))
+        self.latest.update(reading)
+        
+        # Encoded frames for this reading, per projection
+        frames: Dict[Optional[Tuple[str, ...]], str] = {}
+        batched = []
+        
+        for client_id in self._index.route(device_name, topic):
+            conn = self._connections.get(client_id)
+            if conn is None:
+                continue
             
-            for client_id, conn in self._connections.items():
-                # Send if no subscriptions (all) or if subscribed to this device
-                should_send = (
-                    not conn.subscriptions or
-                    device_name in conn.subscriptions or
-                    topic in conn.subscriptions
-                )
-                
-                if should_send:
-                    try:
-                        await conn.websocket.send_json(message)
-                    except Exception as e:
-                        logger.warning(f"Failed to send to {client_id}: {e}")
-                        disconnected.append(client_id)
+            options = conn.options_for(device_name, topic)
+            fields = options.fields if options is not None else None
+            
+            if options is not None and options.max_rate:
+                if self._throttle(client_id, conn, seq, reading, options):
+                    continue
             
-            # Clean up disconnected clients
-            for client_id in disconnected:
-                del self._connections[client_id]
+            if conn.protocol >= PROTOCOL_BATCH:
+                batched.append((client_id, fields))
+            else:
+                self._send_reading(client_id, conn, seq, reading, fields, frames)
+        
+        if batched:
+            self._queue_batch(seq, reading, batched)
+    
+    def _send_reading(
+        self,
+        client_id: str,
+        conn: ConnectionInfo,
+        seq: int,
+        reading: Dict[str, Any],
+        fields: Optional[Tuple[str, ...]],
+        frames: Dict[Optional[Tuple[str, ...]], str],
+    ):
+        """Queue a protocol 1 reading frame, reusing an encoding from `frames`."""
+        frame = frames.get(fields)
+        if frame is None:
+            frame = self._encode({
+                "type": "reading",
+                "seq": seq,
+                "data": project(reading, fields),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+            })
+            frames[fields] = frame
+        
+        key = f"reading:{reading.get('device_name') or reading.get('topic', '')}"
+        self._enqueue(client_id, conn, frame, key)
+    
+    def _queue_batch(
+        self,
+        seq: int,
+        reading: Dict[str, Any],
+        recipients: List[Tuple[str, Optional[Tuple[str, ...]]]],
+    ):
+        """Add a reading to the current batch tick."""
+        self._batch.append((seq, reading, recipients))
+        if self.batch_interval <= 0:
+            self._flush_batch()
+        elif self._batch_handle is None:
+            loop = asyncio.get_running_loop()
+            self._batch_handle = loop.call_later(self.batch_interval, self._flush_batch)
+    
+    def _throttle(
+        self,
+        client_id: str,
+        conn: ConnectionInfo,
+        seq: int,
+        reading: Dict[str, Any],
+        options: SubscriptionOptions,
+    ) -> bool:
+        """
+        Apply max_rate for a client and device.
+        
+        Returns False if the reading may be sent now. Otherwise it is held
+        as the device's latest value (replacing any held one) and sent when
+        the interval elapses; returns True.
+        """
+        device = reading.get("device_name") or reading.get("topic", "")
+        now = time.monotonic()
+        
+        if device in conn.throttled:
+            conn.throttled[device] = (seq, reading, options.fields)
+            conn.superseded += 1
+            return True
+        
+        interval = 1.0 / options.max_rate
+        last = conn.last_sent.get(device)
+        if last is None or now - last >= interval:
+            conn.last_sent[device] = now
+            return False
+        
+        conn.throttled[device] = (seq, reading, options.fields)
+        loop = asyncio.get_running_loop()
+        conn.timers[device] = loop.call_later(
+            last + interval - now,
+            self._release_throttled,
+            client_id,
+            conn,
+            device,
+        )
+        return True
+    
+    def _release_throttled(self, client_id: str, conn: ConnectionInfo, device: str):
+        """Send a device's held reading once its throttle interval has passed."""
+        conn.timers.pop(device, None)
+        held = conn.throttled.pop(device, None)
+        if held is None or self._connections.get(client_id) is not conn:
+            return
+        
+        seq, reading, fields = held
+        if not self._index.is_subscribed(client_id, device, reading.get("topic", "")):
+            conn.last_sent.pop(device, None)
+            return
+        conn.last_sent[device] = time.monotonic()
+        
+        if conn.protocol >= PROTOCOL_BATCH:
+            self._queue_batch(seq, reading, [(client_id, fields)])
+        else:
+            self._send_reading(client_id, conn, seq, reading, fields, {})
+    
+    def _flush_batch(self):
+        """Send the readings buffered during this tick as one frame per client."""
+        self._batch_handle = None
+        batch, self._batch = self._batch, []
+        
+        # Readings (by position, with projection) each client should get
+        per_client: Dict[str, List[Tuple[int, Optional[Tuple[str, ...]]]]] = {}
+        for i, (_, _, recipients) in enumerate(batch):
+            for client_id, fields in recipients:
+                per_client.setdefault(client_id, []).append((i, fields))
+        
+        # Clients receiving the same readings share one encoded frame
+        groups: Dict[Tuple[Tuple[int, Optional[Tuple[str, ...]]], ...], List[str]] = {}
+        for client_id, items in per_client.items():
+            groups.setdefault(tuple(items), []).append(client_id)
+        
+        timestamp = datetime.now(timezone.utc).isoformat()
+        for items, client_ids in groups.items():
+            frame = self._encode({
+                "type": "readings",
+                "seq": max(batch[i][0] for i, _ in items),
+                "data": [project(batch[i][1], fields) for i, fields in items],
+                "timestamp": timestamp,
+            })
+            for client_id in client_ids:
+                conn = self._connections.get(client_id)
+                if conn is not None:
+                    self._enqueue(client_id, conn, frame)
     
     async def broadcast_all(self, message: Dict[str, Any]):
         """Broadcast a message to all connected clients."""
-        async with self._lock:
-            disconnected = []
-            
-            for client_id, conn in self._connections.items():
-                try:
-                    await conn.websocket.send_json(message)
-                except Exception as e:
-                    logger.warning(f"Failed to send to {client_id}: {e}")
-                    disconnected.append(client_id)
-            
-            # Clean up disconnected clients
-            for client_id in disconnected:
-                del self._connections[client_id]
+        frame = self._encode(message)
+        for client_id, conn in list(self._connections.items()):
+            self._enqueue(client_id, conn, frame)
     
-    async def _send_to_client(self, client_id: str, message: Dict[str, Any]):
-        """Send a message to a specific client."""
-        async with self._lock:
-            if client_id in self._connections:
-                try:
-                    await self._connections[client_id].websocket.send_json(message)
-                except Exception as e:
-                    logger.warning(f"Failed to send to {client_id}: {e}")
+    def resume(self, client_id: str, resume_from: int, epoch: Optional[str] = None) -> bool:
+        """
+        Replay readings a reconnecting client missed since `resume_from`.
+        
+        Only readings matching the client's current subscriptions are
+        replayed (with its projections, without throttling), followed by a
+        {"type": "resumed"} frame. If the epoch doesn't match or the ring no
+        longer reaches back far enough, a {"type": "gap"} frame is sent
+        instead and the client should reload history. Returns True if
+        the replay succeeded.
+        """
+        conn = self._connections.get(client_id)
+        if conn is None:
+            return False
+        
+        oldest = self._replay[0][0] if self._replay else self._seq + 1
+        reason = None
+        if epoch is not None and epoch != self.epoch:
+            reason = "epoch_changed"
+        elif resume_from > self._seq:
+            reason = "unknown_seq"
+        elif resume_from < oldest - 1:
+            reason = "gap_too_large"
+        
+        if reason is not None:
+            self.gaps += 1
+            self.send_to_client(client_id, {
+                "type": "gap",
+                "reason": reason,
+                "epoch": self.epoch,
+                "seq": self._seq,
+            })
+            return False
+        
+        missed = []
+        for seq, reading in self._replay:
+            if seq <= resume_from:
+                continue
+            device_name = reading.get("device_name", "")
+            topic = reading.get("topic", "")
+            if conn.wants(device_name, topic):
+                options = conn.options_for(device_name, topic)
+                missed.append((seq, project(reading, options.fields if options else None)))
+        
+        # Readings hold datetimes, so encode them like broadcast frames
+        if conn.protocol >= PROTOCOL_BATCH:
+            if missed:
+                self._enqueue(client_id, conn, self._encode({
+                    "type": "readings",
+                    "seq": missed[-1][0],
+                    "data": [reading for _, reading in missed],
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                }))
+        else:
+            for seq, reading in missed:
+                self._enqueue(client_id, conn, self._encode({
+                    "type": "reading",
+                    "seq": seq,
+                    "data": reading,
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                }))
+        
+        self.resumes += 1
+        self.send_to_client(client_id, {
+            "type": "resumed",
+            "from": resume_from,
+            "seq": self._seq,
+            "count": len(missed),
+        })
+        return True
+    
+    def send_snapshot(self, client_id: str, names: Set[str]) -> int:
+        """
+        Send the latest cached reading of each device matching `names`
+        (everything the client receives if empty), with the client's
+        projections applied. Returns the number of readings sent.
+        """
+        conn = self._connections.get(client_id)
+        if conn is None:
+            return 0
+        
+        now = datetime.now(timezone.utc)
+        data = []
+        for reading in self.latest.select(names):
+            device_name = reading.get("device_name", "")
+            topic = reading.get("topic", "")
+            if not conn.wants(device_name, topic):
+                continue
+            options = conn.options_for(device_name, topic)
+            entry = dict(project(reading, options.fields if options else None))
+            if isinstance(reading.get("time"), datetime):
+                entry["last_seen_minutes"] = int((now - reading["time"]).total_seconds() // 60)
+            data.append(entry)
+        
+        self.snapshots += 1
+        self._enqueue(client_id, conn, self._encode({
+            "type": "snapshot",
+            "seq": self._seq,
+            "data": data,
+            "timestamp": now.isoformat(),
+        }))
+        return len(data)
+    
+    def send_to_client(self, client_id: str, message: Dict[str, Any]):
+        """Queue a message for a specific client."""
+        conn = self._connections.get(client_id)
+        if conn is not None:
+            self._enqueue(client_id, conn, message)
+    
+    async def flush(self):
+        """Send any pending batch, then wait until every outbox has been sent."""
+        if self._batch_handle is not None:
+            self._batch_handle.cancel()
+            self._flush_batch()
+        
+        for conn in list(self._connections.values()):
+            await conn.outbox.join()
     
     def get_connection_count(self) -> int:
         """Get number of active connections."""
@@ -149,25 +1045,61 @@ class WebSocketManager:
     
     async def disconnect_all(self):
         """Disconnect all WebSocket connections (for shutdown)."""
+        if self._batch_handle is not None:
+            self._batch_handle.cancel()
+            self._batch_handle = None
+        self._batch = []
+        self._heartbeats.stop()
+        
         async with self._lock:
-            for client_id, conn in list(self._connections.items()):
+            for client_id in list(self._connections):
+                conn = self._remove(client_id)
                 try:
                     await conn.websocket.close(code=1001, reason="Server shutdown")
                 except Exception as e:
                     logger.warning(f"Error closing connection {client_id}: {e}")
-            self._connections.clear()
         logger.info("All WebSocket connections closed")
     
     def get_stats(self) -> Dict[str, Any]:
         """Get WebSocket statistics."""
         return {
             "active_connections": len(self._connections),
+            "queue_size": self.queue_size,
+            "slow_consumer_policy": self.policy,
+            "slow_consumer_disconnects": self.slow_consumer_disconnects,
+            "batch_interval_ms": round(self.batch_interval * 1000),
+            "frames_encoded": self.frames_encoded,
+            "epoch": self.epoch,
+            "seq": self._seq,
+            "replay_size": len(self._replay),
+            "resumes": self.resumes,
+            "gaps": self.gaps,
+            "latest_devices": len(self.latest),
+            "snapshots": self.snapshots,
+            "heartbeat": {
+                "interval": self.heartbeat_interval,
+                "timeout": self.heartbeat_timeout,
+                "scheduled": len(self._heartbeats),
+                "pings_sent": self.pings_sent,
+                "reaped": self.reaped,
+            },
             "clients": [
                 {
                     "client_id": cid,
                     "user_id": conn.user_id,
                     "connected_at": conn.connected_at.isoformat(),
                     "subscriptions": list(conn.subscriptions),
+                    "protocol": conn.protocol,
+                    "queued": len(conn.outbox),
+                    "sent": conn.sent,
+                    "dropped": conn.outbox.dropped,
+                    "coalesced": conn.outbox.coalesced,
+                    "lag_ms": conn.lag_ms,
+                    "max_lag_ms": conn.max_lag_ms,
+                    "options": {name: o.to_dict() for name, o in conn.options.items()},
+                    "superseded": conn.superseded,
+                    "idle_s": round(time.monotonic() - conn.last_seen, 1),
+                    "awaiting_pong": conn.ping_sent_at is not None,
                 }
                 for cid, conn in self._connections.items()
             ],
@@ -175,4 +1107,11 @@ class WebSocketManager:
 
 
 # Global WebSocket manager instance
-ws_manager = WebSocketManager()
+ws_manager = WebSocketManager(
+    queue_size=settings.ws_send_queue_size,
+    policy=settings.ws_slow_consumer_policy,
+    batch_interval=settings.ws_batch_interval_ms / 1000,
+    replay_size=settings.ws_replay_size,
+    heartbeat_interval=settings.ws_heartbeat_interval,
+    heartbeat_timeout=settings.ws_heartbeat_timeout,
+)
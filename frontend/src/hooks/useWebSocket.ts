@@ -3,14 +3,22 @@
 // ================================
 
 import { useState, useEffect, useCallback, useRef } from 'react';
-import type { WebSocketMessage, ConnectionStatus, SensorReading } from '../types';
+import type { WebSocketMessage, ConnectionStatus, SensorReading, SensorLatest } from '../types';
 
-const WS_URL = import.meta.env.VITE_WS_URL || `ws://${window.location.host}/ws/sensors`;
+const WS_BASE_URL = import.meta.env.VITE_WS_URL || `ws://${window.location.host}/ws/sensors`;
+// Protocol 2: readings arrive batched per server tick as {type: 'readings', data: [...]}
+const WS_PROTOCOL = 2;
+const WS_URL = `${WS_BASE_URL}${WS_BASE_URL.includes('?') ? '&' : '?'}protocol=${WS_PROTOCOL}`;
 const RECONNECT_DELAY = 3000;
 const MAX_RECONNECT_ATTEMPTS = 10;
 
 interface UseWebSocketOptions {
   onReading?: (reading: SensorReading) => void;
+  // Called when missed readings couldn't be replayed after a reconnect;
+  // history should be reloaded
+  onGap?: () => void;
+  // Latest reading per device, sent by the server after each subscribe
+  onSnapshot?: (readings: SensorLatest[]) => void;
   autoConnect?: boolean;
 }
 
@@ -24,7 +32,7 @@ interface UseWebSocketReturn {
 }
 
 export function useWebSocket(options: UseWebSocketOptions = {}): UseWebSocketReturn {
-  const { onReading, autoConnect = true } = options;
+  const { onReading, onGap, onSnapshot, autoConnect = true } = options;
   
   const [status, setStatus] = useState<ConnectionStatus>('disconnected');
   const [lastMessage, setLastMessage] = useState<WebSocketMessage | null>(null);
@@ -33,12 +41,25 @@ export function useWebSocket(options: UseWebSocketOptions = {}): UseWebSocketRet
   const reconnectAttempts = useRef(0);
   const reconnectTimeout = useRef<ReturnType<typeof setTimeout>>();
   const onReadingRef = useRef(onReading);
+  const onGapRef = useRef(onGap);
+  const onSnapshotRef = useRef(onSnapshot);
+  // Position in the server's reading stream, used to resume after a reconnect
+  const lastSeq = useRef<number | null>(null);
+  const epoch = useRef<string | null>(null);
 
-  // Keep callback ref updated
+  // Keep callback refs updated
   useEffect(() => {
     onReadingRef.current = onReading;
   }, [onReading]);
 
+  useEffect(() => {
+    onGapRef.current = onGap;
+  }, [onGap]);
+
+  useEffect(() => {
+    onSnapshotRef.current = onSnapshot;
+  }, [onSnapshot]);
+
   const connect = useCallback(() => {
     if (wsRef.current?.readyState === WebSocket.OPEN) {
       return;
@@ -47,7 +68,10 @@ export function useWebSocket(options: UseWebSocketOptions = {}): UseWebSocketRet
     setStatus('connecting');
 
     try {
-      const ws = new WebSocket(WS_URL);
+      const url = lastSeq.current !== null && epoch.current
+        ? `${WS_URL}&resume_from=${lastSeq.current}&epoch=${epoch.current}`
+        : WS_URL;
+      const ws = new WebSocket(url);
 
       ws.onopen = () => {
         console.log('[WebSocket] Connected');
@@ -77,8 +101,33 @@ export function useWebSocket(options: UseWebSocketOptions = {}): UseWebSocketRet
           const message: WebSocketMessage = JSON.parse(event.data);
           setLastMessage(message);
 
-          if (message.type === 'reading' && message.data && onReadingRef.current) {
-            onReadingRef.current(message.data);
+          if (message.type === 'connected') {
+            // Only adopt the server position on a fresh start; when resuming,
+            // replayed readings (or a gap) move it forward
+            if (lastSeq.current === null || message.epoch !== epoch.current) {
+              lastSeq.current = message.seq ?? null;
+            }
+            epoch.current = message.epoch ?? null;
+          } else if (message.type === 'ping') {
+            // Server heartbeat; unanswered pings get the connection closed
+            ws.send(JSON.stringify({ type: 'pong' }));
+          } else if (message.type === 'gap') {
+            console.log('[WebSocket] Missed readings unavailable:', message.reason);
+            lastSeq.current = message.seq ?? null;
+            epoch.current = message.epoch ?? null;
+            onGapRef.current?.();
+          } else if (message.seq !== undefined) {
+            lastSeq.current = Math.max(lastSeq.current ?? 0, message.seq);
+          }
+
+          if (message.type === 'snapshot' && Array.isArray(message.data)) {
+            onSnapshotRef.current?.(message.data as SensorLatest[]);
+          } else if (message.data && onReadingRef.current) {
+            if (message.type === 'readings' && Array.isArray(message.data)) {
+              message.data.forEach((reading) => onReadingRef.current?.(reading));
+            } else if (message.type === 'reading' && !Array.isArray(message.data)) {
+              onReadingRef.current(message.data);
+            }
           }
         } catch (error) {
           console.error('[WebSocket] Failed to parse message', error);
@@ -108,7 +157,7 @@ export function useWebSocket(options: UseWebSocketOptions = {}): UseWebSocketRet
   const subscribe = useCallback((devices: string[]) => {
     if (wsRef.current?.readyState === WebSocket.OPEN) {
       wsRef.current.send(JSON.stringify({
-        action: 'subscribe',
+        type: 'subscribe',
         devices,
       }));
     }
@@ -117,7 +166,7 @@ export function useWebSocket(options: UseWebSocketOptions = {}): UseWebSocketRet
   const unsubscribe = useCallback((devices: string[]) => {
     if (wsRef.current?.readyState === WebSocket.OPEN) {
       wsRef.current.send(JSON.stringify({
-        action: 'unsubscribe',
+        type: 'unsubscribe',
         devices,
       }));
     }
@@ -84,9 +84,14 @@ export interface AuthState {
 }
 
 export interface WebSocketMessage {
-  type: 'connected' | 'reading' | 'error' | 'subscribed' | 'unsubscribed';
-  data?: SensorReading;
+  type: 'connected' | 'reading' | 'readings' | 'error' | 'subscribed' | 'unsubscribed' | 'resumed' | 'gap' | 'ping' | 'snapshot';
+  data?: SensorReading | SensorReading[] | SensorLatest[];
   client_id?: string;
+  protocol?: number;
+  epoch?: string;
+  seq?: number;
+  count?: number;
+  reason?: string;
   timestamp?: string;
   message?: string;
 }
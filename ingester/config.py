@@ -52,6 +52,16 @@ class Settings(BaseSettings):
         description="Database connection pool size"
     )
     
+    # Live Reading Events (PostgreSQL NOTIFY, consumed by the API)
+    notify_enabled: bool = Field(
+        default=True,
+        description="Publish written readings with NOTIFY for live WebSocket updates"
+    )
+    notify_channel: str = Field(
+        default="sensor_readings",
+        description="NOTIFY channel for live reading events"
+    )
+    
     # Health Check Server
     health_host: str = Field(
         default="0.0.0.0",
@@ -12,6 +12,7 @@ from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.exc import SQLAlchemyError
 
 from config import settings
+from events import encode_events
 from logger import logger
 from parser import ParsedReading
 
@@ -25,6 +26,7 @@ class DatabaseWriter:
     - Batch inserts for efficiency
     - Automatic reconnection
     - Write statistics
+    - Live reading events via NOTIFY (delivered on commit)
     """
     
     def __init__(self):
@@ -32,6 +34,7 @@ class DatabaseWriter:
         self.SessionLocal = None
         self.write_count = 0
         self.error_count = 0
+        self.notify_count = 0
         self.last_write_time = None
         self._connected = False
     
@@ -151,6 +154,16 @@ class DatabaseWriter:
                         },
                     )
                 
+                # Publish live events; NOTIFY is only delivered if this commits
+                if settings.notify_enabled:
+                    payloads = encode_events(readings)
+                    for payload in payloads:
+                        session.execute(
+                            text("SELECT pg_notify(:channel, :payload)"),
+                            {"channel": settings.notify_channel, "payload": payload},
+                        )
+                    self.notify_count += len(payloads)
+                
                 self.write_count += len(readings)
                 self.last_write_time = datetime.utcnow()
                 
@@ -178,6 +191,7 @@ class DatabaseWriter:
             "connected": self._connected,
             "writes": self.write_count,
             "errors": self.error_count,
+            "notifications": self.notify_count,
             "last_write": self.last_write_time.isoformat() if self.last_write_time else None,
         }
 
@@ -0,0 +1,83 @@
+# ================================
+# SensorPulse Ingester - Live Reading Events
+# ================================
+#
+# Compact, batched reading events published with PostgreSQL NOTIFY in the
+# same transaction as the insert, so the API only hears about readings
+# that were committed. The API decodes them in api/live.py.
+#
+# Payload (JSON, one NOTIFY per chunk):
+#   {
+#     "v": 1,
+#     "id": "<batch id>-<chunk index>",  (unique; lets the API drop duplicates)
+#     "sent": <epoch ms when the batch was written>,
+#     "r": [[time_ms, topic, device_name, temperature, humidity,
+#            battery, linkquality, raw_data], ...]
+#   }
+#
+# NOTIFY payloads must be shorter than 8000 bytes, so a batch is split into
+# as many chunks as needed. A reading that doesn't fit on its own is sent
+# without raw_data.
+
+import json
+import time
+import uuid
+from typing import Any, List
+
+from parser import ParsedReading
+
+EVENT_VERSION = 1
+MAX_PAYLOAD_BYTES = 7900  # PostgreSQL limit is 8000, keep some headroom
+
+
+def _row(reading: ParsedReading, raw_data: Any) -> list:
+    return [
+        int(reading.time.timestamp() * 1000),
+        reading.topic,
+        reading.device_name,
+        reading.temperature,
+        reading.humidity,
+        reading.battery,
+        reading.linkquality,
+        raw_data,
+    ]
+
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, separators=(",", ":"), default=str)
+
+
+def encode_events(readings: List[ParsedReading], max_bytes: int = MAX_PAYLOAD_BYTES) -> List[str]:
+    """Encode readings into one or more NOTIFY payloads under max_bytes each."""
+    batch_id = uuid.uuid4().hex
+    sent = int(time.time() * 1000)
+
+    def payload(index: int, rows: List[str]) -> str:
+        header = _dumps({"v": EVENT_VERSION, "id": f"{batch_id}-{index}", "sent": sent, "r": []})
+        return header[:-2] + ",".join(rows) + "]}"
+
+    # Sized for the longest chunk id we could emit
+    overhead = len(payload(9999, []).encode())
+
+    chunks: List[List[str]] = []
+    rows: List[str] = []
+    size = overhead
+
+    for reading in readings:
+        row = _dumps(_row(reading, reading.raw_data))
+        if overhead + len(row.encode()) > max_bytes:
+            row = _dumps(_row(reading, None))
+
+        row_size = len(row.encode()) + 1  # separating comma
+        if rows and size + row_size > max_bytes:
+            chunks.append(rows)
+            rows = []
+            size = overhead
+
+        rows.append(row)
+        size += row_size
+
+    if rows:
+        chunks.append(rows)
+
+    return [payload(i, rows) for i, rows in enumerate(chunks)]